@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""Namespaces of the cached pages of the app, see ``validator.cache``."""
+
+# list and details of the signers, invalidated when a signer or user changes
+SIGNERS_NAMESPACE = "signers"
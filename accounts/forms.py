@@ -6,6 +6,7 @@ import re
 from validator.logger import module_logger
 from .models import CustomUser, SignerUser
 from .services.pbs_extractor_service import PublicKeyExtractor
+from .services.pbs_validation_service import ValidatePublicKey
 
 logger = module_logger(__name__)
 
@@ -83,8 +84,10 @@ class SignerUserForm(forms.ModelForm):
                 raise forms.ValidationError("Invalid certificate.")
         else:
             raise forms.ValidationError("Certificate is required.")
+        fingerprint = ValidatePublicKey(self.calculated_public_key).get_fingerprint()
         if (
-            SignerUser.objects.filter(public_key=self.calculated_public_key)
+            fingerprint
+            and SignerUser.objects.filter(public_key_fingerprint=fingerprint)
             .exclude(user=self.user)
             .exists()
         ):
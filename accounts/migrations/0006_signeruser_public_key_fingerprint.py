@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 4.2.2 on 2026-10-18 14:38
+
+import base64
+import binascii
+import hashlib
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def get_fingerprint(public_key):
+    """Get the SHA-256 of the SubjectPublicKeyInfo of a PEM or trimmed key."""
+    trimmed_key = (
+        public_key.replace("-----BEGIN PUBLIC KEY-----", "")
+        .replace("-----END PUBLIC KEY-----", "")
+        .replace("\n", "")
+        .strip()
+    )
+    try:
+        return hashlib.sha256(base64.b64decode(trimmed_key, validate=True)).hexdigest()
+    except (binascii.Error, ValueError):
+        return None
+
+
+def backfill_public_key_fingerprints(apps, schema_editor):
+    """Set the fingerprint of the public key of every existing signer."""
+    SignerUser = apps.get_model("accounts", "SignerUser")
+    signers = (
+        SignerUser.objects.exclude(public_key__isnull=True)
+        .exclude(public_key="")
+        .only("pk", "public_key")
+    )
+    batch = []
+    for signer in signers.iterator(chunk_size=BATCH_SIZE):
+        signer.public_key_fingerprint = get_fingerprint(signer.public_key)
+        batch.append(signer)
+        if len(batch) == BATCH_SIZE:
+            SignerUser.objects.bulk_update(batch, ["public_key_fingerprint"])
+            batch = []
+    SignerUser.objects.bulk_update(batch, ["public_key_fingerprint"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_alter_customuser_email"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="signeruser",
+            name="public_key_fingerprint",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                help_text="SHA-256 of the SubjectPublicKeyInfo of the public key",
+                max_length=64,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(
+            backfill_public_key_fingerprints, migrations.RunPython.noop
+        ),
+    ]
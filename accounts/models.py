@@ -3,6 +3,8 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from accounts.services.pbs_validation_service import ValidatePublicKey
+
 
 class CustomUser(AbstractUser):
     """Custom User Model."""
@@ -36,6 +38,14 @@ class SignerUser(models.Model):
     public_key = models.TextField(
         unique=True, blank=True, null=True, help_text="Public key of the Signer"
     )
+    public_key_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+        help_text="SHA-256 of the SubjectPublicKeyInfo of the public key",
+    )
     nic_number = models.CharField(
         max_length=15, help_text="National Identity Card Number of the Signer"
     )
@@ -69,6 +79,18 @@ class SignerUser(models.Model):
         """Return the string representation of the object."""
         return f"{self.pk}"
 
+    def save(self, *args, **kwargs):
+        """Save the signer with the fingerprint of its public key."""
+        self.public_key_fingerprint = None
+        if self.public_key:
+            self.public_key_fingerprint = ValidatePublicKey(
+                self.public_key
+            ).get_fingerprint()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "public_key" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "public_key_fingerprint"}
+        super().save(*args, **kwargs)
+
 
 class ValidatorUser(models.Model):
     """Model for Validator User."""
@@ -1,12 +1,7 @@
 # -*- coding: utf-8 -*-
-import warnings
 from asn1crypto import cms
 from accounts.services.pbs_validation_service import ValidatePublicKey
-from signature_validator.services.pdf_validation_service import PdfSignatureValidator
-
-from cryptography.hazmat.backends import default_backend
-from cryptography import x509
-from cryptography.hazmat.primitives import serialization
+from signature_validator.services.certificate_cache import certificate_cache
 
 
 class PublicKeyExtractor:
@@ -20,33 +15,34 @@ class PublicKeyExtractor:
 
     def get_public_key_from_cer(self):
         """Extract public key from the certificate file."""
-        # negative number is set by adobe, to bypass the warning log this is added
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            cert = x509.load_der_x509_certificate(self.cert_data, default_backend())
-        public_key_bytes = cert.public_key().public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo,
-        )
-        public_key_string = public_key_bytes.decode("utf-8")
-        self.public_key = public_key_string
+        self.public_key = certificate_cache.get_certificate(
+            self.cert_data
+        ).public_key_pem
 
     def extract_public_key_from_p7c(self):
         """Extract public key from the certificate file."""
-        content = cms.ContentInfo.load(self.cert_data).native
-        certificate = content["content"]["certificates"][0]
-        pbk, pbk_str = PdfSignatureValidator.get_public_key_from_certification(
-            certificate
-        )
-        self.public_key = pbk_str
+        self.public_key = certificate_cache.get_certificate(
+            self.get_certificate_der_from_p7c()
+        ).public_key_pem
 
     def extract_public_key_from_fdf(self):
         """Extract public key from the certificate file."""
+        self.public_key = certificate_cache.get_certificate(
+            self.get_certificate_der_from_fdf()
+        ).public_key_pem
+
+    def get_certificate_der_from_p7c(self) -> bytes:
+        """Get the DER encoded first certificate of the PKCS7 certificate file."""
+        content = cms.ContentInfo.load(self.cert_data)
+        return content["content"]["certificates"][0].chosen.dump()
+
+    def get_certificate_der_from_fdf(self) -> bytes:
+        """Get the DER encoded certificate of the FDF certificate file."""
         n = self.cert_data.find(b"/Certs[")
         start = self.cert_data.find(b"(", n)
         end = self.cert_data.find(b")]/Type/Import>>", start)
         cert_data = self.cert_data[start + 1 : end]  # noqa
-        edited = (
+        return (
             cert_data.replace(b"\\r", b"\r")
             .replace(b"\\n", b"\n")
             .replace(b"\\\\", b"\\")
@@ -54,16 +50,20 @@ class PublicKeyExtractor:
             .replace(b"\\(", b"(")
             .replace(b"\\)", b")")
         )
-        # negative number is set by adobe, to bypass the warning log this is added
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            cert = x509.load_der_x509_certificate(edited, default_backend())
-        public_key_bytes = cert.public_key().public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo,
-        )
-        public_key_string = public_key_bytes.decode("utf-8")
-        self.public_key = public_key_string
+
+    def get_certificate_der(self):
+        """Get the DER encoded certificate from the certificate file.
+
+        :returns
+            bytes: DER encoded certificate, None for unsupported file types
+        """
+        if self.file_name.endswith(".cer"):
+            return self.cert_data
+        elif self.file_name.endswith(".p7c"):
+            return self.get_certificate_der_from_p7c()
+        elif self.file_name.endswith(".fdf"):
+            return self.get_certificate_der_from_fdf()
+        return None
 
     def get_public_key(self):
         """Extract public key from the certificate file.
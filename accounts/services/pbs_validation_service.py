@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import base64
+import binascii
+import hashlib
 import string
 
 from cryptography.hazmat.primitives import serialization
@@ -53,6 +56,29 @@ class ValidatePublicKey:
             logger.info(f"Public key: {self.key} is invalid pem public key.")
             return False
 
+    def get_der(self):
+        """Get the SubjectPublicKeyInfo DER of the PEM or trimmed key.
+
+        :returns
+            bytes: DER of the key, None when the key is not base64 encoded
+        """
+        self.trim_key()
+        try:
+            return base64.b64decode(self.key, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+
+    def get_fingerprint(self):
+        """Get the SHA-256 of the SubjectPublicKeyInfo of the PEM or trimmed key.
+
+        :returns
+            str: hex fingerprint, None when the key is not base64 encoded
+        """
+        public_key_der = self.get_der()
+        if public_key_der is None:
+            return None
+        return hashlib.sha256(public_key_der).hexdigest()
+
     def trim_key(self):
         """Trim the public key."""
         self.key = (
@@ -1,11 +1,16 @@
 # -*- coding: utf-8 -*-
 from django.conf import settings
 from django.core.mail import send_mail
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from validator.cache import invalidate
+from .cache import SIGNERS_NAMESPACE
 from .models import SignerUser, CustomUser, ValidatorUser
 
+# fields of a user shown by the signer pages
+SIGNER_PAGE_USER_FIELDS = frozenset(("username", "email", "date_joined"))
+
 
 @receiver(post_save, sender=SignerUser)
 def send_verified_or_rejected_email(sender, instance, created, **kwargs):
@@ -37,3 +42,21 @@ def create_signer_validator_profile(sender, instance, created, **kwargs):
             signer.save()
         elif instance.user_type == CustomUser.UserType.validator:
             ValidatorUser.objects.create(user=instance)
+
+
+@receiver(post_save, sender=SignerUser)
+@receiver(post_delete, sender=SignerUser)
+def invalidate_signer_pages(sender, instance, **kwargs):
+    """Signal to invalidate the cached signer pages when a signer changes."""
+    invalidate(SIGNERS_NAMESPACE)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_signer_pages_of_user(sender, instance, update_fields=None, **kwargs):
+    """Signal to invalidate the signer pages when a shown user field changes.
+
+    Logins only save ``last_login``, they keep the pages cached.
+    """
+    if update_fields is None or SIGNER_PAGE_USER_FIELDS & set(update_fields):
+        invalidate(SIGNERS_NAMESPACE)
@@ -1,3 +1,5 @@
+import hashlib
+
 import pytest
 from django.apps import apps
 from django.conf import settings
@@ -5,6 +7,8 @@ from django.contrib import auth
 from django.urls import reverse
 
 from accounts.models import CustomUser
+from accounts.services.pbs_extractor_service import PublicKeyExtractor
+from signature_validator.services.certificate_cache import certificate_cache
 from accounts.tests.factories import UserFactory
 
 pytestmark = pytest.mark.django_db
@@ -379,5 +383,15 @@ class TestSignerUserUpdateView:
                     signer.refresh_from_db()
                     assert signer.public_key == public_key
                     assert signer.nic_number == nic_number
+                    cert_file.seek(0)
+                    certificate_der = PublicKeyExtractor(
+                        cert_file_name, cert_file.read()
+                    ).get_certificate_der()
+                    public_key_der = certificate_cache.get_certificate(
+                        certificate_der
+                    ).public_key_der
+                    assert signer.public_key_fingerprint == (
+                        hashlib.sha256(public_key_der).hexdigest()
+                    )
                     assert nic_image_name in signer.nic_image.name
                     assert pp_name in signer.profile_image.name
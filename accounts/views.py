@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from functools import partial
+
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView
@@ -13,6 +15,8 @@ from django.views.generic.edit import CreateView
 from django_filters.views import FilterView
 
 from validator import settings
+from validator.cache import CachedPageMixin, cached
+from .cache import SIGNERS_NAMESPACE
 from .filters import SignerUserFilter
 from .forms import CustomUserCreationForm, SignerUserForm
 from .models import CustomUser, SignerUser
@@ -143,18 +147,24 @@ def activate(request, uidb64, token):
         return redirect(reverse_lazy("accounts:login"))
 
 
-class SignerUserListView(FilterView):
-    """View for listing all the signers with filters."""
+class SignerUserListView(CachedPageMixin, FilterView):
+    """View for listing all the signers with filters.
+
+    The pages are cached until a signer or user changes.
+    """
 
     template_name = "accounts/signer_list.html"
     model = SignerUser
     context_object_name = "signers"
     filterset_class = SignerUserFilter
     paginate_by = 10
+    cache_namespaces = (SIGNERS_NAMESPACE,)
 
     def get_queryset(self):
         """Get the queryset for the view."""
-        return SignerUser.objects.filter(active=True)
+        return (
+            SignerUser.objects.filter(active=True).select_related("user").order_by("id")
+        )
 
 
 class SignerDetailsView(LoginRequiredMixin, DetailView):
@@ -163,3 +173,16 @@ class SignerDetailsView(LoginRequiredMixin, DetailView):
     model = SignerUser
     template_name = "accounts/signer_detail.html"
     context_object_name = "signer"
+
+    def get_queryset(self):
+        """Get the queryset for the view."""
+        return SignerUser.objects.select_related("user")
+
+    def get_object(self, queryset=None):
+        """Get the signer from the cache, or from the database on a miss."""
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        return cached(
+            (SIGNERS_NAMESPACE,),
+            f"signer:{pk}",
+            partial(super().get_object, queryset),
+        )
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+import sys
+
+from benchmarks.runner import main
+
+
+sys.exit(main())
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+import argparse
+import glob
+import http.cookiejar
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+BENCHMARKS_ROOT = Path(__file__).resolve().parent
+DEFAULT_FILES = str(BENCHMARKS_ROOT.parent / "tests" / "files" / "*.pdf")
+
+# path of each endpoint and the statuses of a successful upload
+ENDPOINTS = {
+    "form": ("/", (302,)),
+    "api": ("/api/signatures/", (201, 202)),
+    "bulk": ("/api/signatures/bulk/", (200, 202)),
+}
+
+Sample = namedtuple("Sample", ("endpoint", "seconds", "status", "ok"))
+
+
+class NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses, a valid form upload redirects."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        """Do not follow the redirect."""
+        return None
+
+
+def encode_multipart(fields: dict, files: list) -> tuple:
+    """Encode form fields and ``(field, name, content)`` files as multipart.
+
+    :returns
+        tuple: body and content type of the request
+    """
+    boundary = uuid.uuid4().hex
+    lines = []
+    for name, value in fields.items():
+        lines.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"'
+            f"\r\n\r\n{value}\r\n".encode()
+        )
+    for field, name, content in files:
+        lines.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+            f'filename="{name}"\r\nContent-Type: application/pdf\r\n\r\n'.encode()
+        )
+        lines.append(content)
+        lines.append(b"\r\n")
+    lines.append(f"--{boundary}--\r\n".encode())
+    return b"".join(lines), f"multipart/form-data; boundary={boundary}"
+
+
+class UploadClient:
+    """HTTP client of one simulated user, with its own session cookies."""
+
+    def __init__(self, base_url: str, timeout: float):
+        """Initialize the client of the server at ``base_url``."""
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), NoRedirectHandler
+        )
+
+    def get_cookie(self, name: str):
+        """Get the value of a session cookie."""
+        for cookie in self.cookies:
+            if cookie.name == name:
+                return cookie.value
+        return None
+
+    def request(self, path: str, data: bytes = None, headers=None) -> int:
+        """Send a request and read the whole response.
+
+        :returns
+            int: status of the response
+        """
+        request = urllib.request.Request(
+            self.base_url + path, data=data, headers=headers or {}
+        )
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+
+    def login(self, username: str, password: str):
+        """Log in through the login form so that form uploads are accepted."""
+        self.request("/accounts/login/")
+        body = urllib.parse.urlencode(
+            {
+                "username": username,
+                "password": password,
+                "csrfmiddlewaretoken": self.get_cookie("csrftoken"),
+            }
+        ).encode()
+        status = self.request(
+            "/accounts/login/",
+            body,
+            {"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        if status != 302:
+            raise RuntimeError(f"Login of {username} failed with status {status}")
+
+    def upload(self, endpoint: str, files: list) -> int:
+        """Upload ``(name, content)`` files to the endpoint."""
+        path, _ = ENDPOINTS[endpoint]
+        fields = {}
+        headers = {}
+        if endpoint == "form":
+            fields["csrfmiddlewaretoken"] = self.get_cookie("csrftoken")
+            parts = [("pdf_file", *files[0])]
+        elif endpoint == "api":
+            parts = [("pdf_file", *files[0])]
+        else:
+            parts = [("files", name, content) for name, content in files]
+        body, headers["Content-Type"] = encode_multipart(fields, parts)
+        return self.request(path, body, headers)
+
+
+class LoadTest:
+    """Replay a weighted mix of uploads at a fixed concurrency."""
+
+    def __init__(self, arguments):
+        """Initialize the load test with the parsed command line."""
+        self.arguments = arguments
+        self.documents = [
+            (os.path.basename(path), Path(path).read_bytes())
+            for path in sorted(glob.glob(arguments.files))
+        ]
+        if not self.documents:
+            raise RuntimeError(f"No PDF files match {arguments.files}")
+        self.mix = parse_mix(arguments.mix)
+        self.requests = itertools.count()
+        self.samples = []
+        self.lock = threading.Lock()
+
+    def run(self) -> dict:
+        """Run the simulated users and get the report by endpoint."""
+        deadline = time.monotonic() + self.arguments.duration
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.arguments.concurrency) as executor:
+            users = [
+                executor.submit(self.run_user, index, deadline)
+                for index in range(self.arguments.concurrency)
+            ]
+            for user in users:
+                user.result()
+        return get_report(self.samples, time.perf_counter() - start)
+
+    def run_user(self, index: int, deadline: float):
+        """Upload until the deadline or until the request budget is spent."""
+        # API clients are anonymous, a session would make the API enforce CSRF
+        api_client = UploadClient(self.arguments.base_url, self.arguments.timeout)
+        form_client = UploadClient(self.arguments.base_url, self.arguments.timeout)
+        if "form" in self.mix:
+            form_client.login(self.arguments.username, self.arguments.password)
+        chooser = random.Random(self.arguments.seed + index)
+        endpoints, weights = zip(*self.mix.items())
+        while time.monotonic() < deadline:
+            if next(self.requests) >= self.arguments.requests:
+                return
+            endpoint = chooser.choices(endpoints, weights)[0]
+            count = self.arguments.bulk_size if endpoint == "bulk" else 1
+            files = chooser.sample(self.documents, min(count, len(self.documents)))
+            client = form_client if endpoint == "form" else api_client
+            start = time.perf_counter()
+            try:
+                status = client.upload(endpoint, files)
+            except OSError:
+                status = None
+            seconds = time.perf_counter() - start
+            ok = status in ENDPOINTS[endpoint][1]
+            with self.lock:
+                self.samples.append(Sample(endpoint, seconds, status, ok))
+
+
+def parse_mix(mix: str) -> dict:
+    """Parse the ``endpoint=weight`` pairs of the mix."""
+    weights = {}
+    for pair in mix.split(","):
+        endpoint, _, weight = pair.partition("=")
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {endpoint}, use {', '.join(ENDPOINTS)}")
+        if float(weight or 1) > 0:
+            weights[endpoint] = float(weight or 1)
+    return weights
+
+
+def percentile(values: list, percent: float) -> float:
+    """Get the nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def get_report(samples: list, elapsed: float) -> dict:
+    """Get the latency, throughput and error rate of every endpoint."""
+    by_endpoint = defaultdict(list)
+    for sample in sorted(samples, key=lambda sample: sample.endpoint):
+        by_endpoint[sample.endpoint].append(sample)
+    if samples:
+        by_endpoint["all"] = samples
+    report = {}
+    for endpoint, endpoint_samples in by_endpoint.items():
+        latencies = sorted(sample.seconds for sample in endpoint_samples)
+        errors = sum(not sample.ok for sample in endpoint_samples)
+        statuses = defaultdict(int)
+        for sample in endpoint_samples:
+            statuses[str(sample.status)] += 1
+        report[endpoint] = {
+            "requests": len(endpoint_samples),
+            "requests_per_s": len(endpoint_samples) / elapsed if elapsed else None,
+            "error_rate": errors / len(endpoint_samples),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "statuses": dict(statuses),
+        }
+    return report
+
+
+def create_user(username: str, password: str):
+    """Create the active user of the form uploads in the database of the server."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "validator.settings")
+    import django
+
+    django.setup()
+    from django.contrib.auth import get_user_model
+
+    user, _ = get_user_model().objects.get_or_create(
+        username=username, defaults={"email": f"{username}@example.com"}
+    )
+    user.is_active = True
+    user.set_password(password)
+    user.save()
+
+
+def write_report(report: dict):
+    """Write the report as a table."""
+    sys.stdout.write(
+        f"{'endpoint':<10}{'requests':>10}{'req/s':>10}{'errors':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}\n"
+    )
+    for endpoint, row in report.items():
+        sys.stdout.write(
+            f"{endpoint:<10}{row['requests']:>10}{row['requests_per_s']:>10.1f}"
+            f"{row['error_rate']:>9.1%}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}\n"
+        )
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """Get the parser of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load_test",
+        description="Replay PDF uploads against a running server, e.g. one started "
+        "with EMAIL_BACKEND=django.core.mail.backends.locmem.EmailBackend so no "
+        "mail leaves the machine, and report latency, throughput and errors.",
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--mix",
+        default="form=1,api=1",
+        help="weights of the endpoints, of form, api and bulk",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument(
+        "--requests", type=int, default=sys.maxsize, help="stop after this many"
+    )
+    parser.add_argument("--files", default=DEFAULT_FILES, help="glob of PDF files")
+    parser.add_argument("--bulk-size", type=int, default=10)
+    parser.add_argument("--username", default="loadtest")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument(
+        "--create-user",
+        action="store_true",
+        help="create the user in the local database of the server first",
+    )
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the report as JSON")
+    return parser
+
+
+def main(argv=None) -> int:
+    """Run the load test.
+
+    :returns
+        int: exit status, 1 when a request failed
+    """
+    arguments = get_parser().parse_args(argv)
+    if arguments.create_user:
+        create_user(arguments.username, arguments.password)
+    report = LoadTest(arguments).run()
+    write_report(report)
+    if arguments.output:
+        arguments.output.write_text(json.dumps(report, indent=2))
+    return 1 if report and report["all"]["error_rate"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
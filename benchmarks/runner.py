@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+
+
+BENCHMARKS_ROOT = Path(__file__).resolve().parent
+
+SIZES = {
+    "1KB": 1024,
+    "64KB": 64 * 1024,
+    "1MB": 1024**2,
+    "16MB": 16 * 1024**2,
+    "256MB": 256 * 1024**2,
+    "1GB": 1024**3,
+}
+
+PROFILES = {
+    "quick": {
+        "sizes": ["1KB", "1MB", "16MB"],
+        "signatures": [1, 10],
+        "digests": ["sha256"],
+        "certificates": [1],
+    },
+    "full": {
+        "sizes": list(SIZES),
+        "signatures": [1, 10, 50, 200],
+        "digests": ["sha1", "sha256", "sha512"],
+        "certificates": [1, 5],
+    },
+}
+
+
+class BenchmarkCase(
+    namedtuple("BenchmarkCase", ("size", "signatures", "digest", "certificates"))
+):
+    """One combination of the corpus matrix."""
+
+    __slots__ = ()
+
+    @property
+    def name(self) -> str:
+        """Get the name of the case, used for its file and in the baseline."""
+        return f"{self.size}-{self.signatures}sig-{self.digest}-{self.certificates}cert"
+
+
+def get_cases(sizes, signatures, digests, certificates) -> list[BenchmarkCase]:
+    """Get the cases of the matrix of the corpus."""
+    return [
+        BenchmarkCase(*case)
+        for case in itertools.product(sizes, signatures, digests, certificates)
+    ]
+
+
+def build_corpus(cases, corpus_dir: Path) -> dict:
+    """Write the PDFs of the cases which are not in the corpus directory yet.
+
+    :returns
+        dict: paths of the PDFs by the name of their case
+    """
+    from signature_validator.tests.pdf_generator import SignedPdfGenerator
+
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    generators = {}
+    paths = {}
+    for case in cases:
+        path = corpus_dir / f"{case.name}.pdf"
+        paths[case.name] = path
+        if path.exists():
+            continue
+        key = (case.digest, case.certificates)
+        if key not in generators:
+            generators[key] = SignedPdfGenerator(case.digest, case.certificates)
+        write_line(f"Generating {path.name}")
+        partial_path = path.with_suffix(".partial")
+        generators[key].write(partial_path, SIZES[case.size], case.signatures)
+        partial_path.rename(path)
+    return paths
+
+
+def initialize_worker():
+    """Set up Django in the measuring process and silence the validation logs."""
+    django.setup()
+    logging.disable(logging.INFO)
+
+
+def measure(path: str, repeats: int, validator_options: dict) -> dict:
+    """Validate the PDF in a fresh process and measure it.
+
+    The certificate and signature caches are cleared before every run, so
+    each run pays for the whole validation.
+    """
+    from signature_validator.services.certificate_cache import certificate_cache
+    from signature_validator.services.pdf_validation_service import (
+        PdfSignatureValidator,
+        signature_result_cache,
+    )
+
+    timings = []
+    valid = True
+    for _ in range(repeats):
+        certificate_cache.clear()
+        signature_result_cache.clear()
+        validator = PdfSignatureValidator(path, **validator_options)
+        start = time.perf_counter()
+        validator.validate()
+        timings.append(time.perf_counter() - start)
+        valid = valid and validator.is_hashes_valid and validator.is_signatures_valid
+    file_size = os.path.getsize(path)
+    seconds = statistics.median(timings)
+    return {
+        "file_size": file_size,
+        "seconds": seconds,
+        "best_seconds": min(timings),
+        "mb_per_s": file_size / 1024**2 / seconds if seconds else None,
+        # kilobytes on Linux, bytes on macOS
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / (1024**2 if sys.platform == "darwin" else 1024),
+        "valid": bool(valid),
+    }
+
+
+def run_cases(paths: dict, repeats: int, validator_options: dict) -> dict:
+    """Measure every PDF in its own process, so peak RSS is per case."""
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name, path in paths.items():
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=context, initializer=initialize_worker
+        ) as executor:
+            result = executor.submit(
+                measure, str(path), repeats, validator_options
+            ).result()
+        results[name] = result
+        write_line(
+            f"{name:<40} {result['seconds'] * 1000:>10.2f} ms "
+            f"{result['mb_per_s'] or 0:>10.1f} MB/s "
+            f"{result['peak_rss_mb']:>8.1f} MB RSS"
+            + ("" if result["valid"] else "  INVALID")
+        )
+    return results
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """Compare the results with the baseline.
+
+    :returns
+        list: descriptions of the cases slower or larger than the tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        if not result["valid"]:
+            regressions.append(f"{name}: the signatures were not validated")
+        expected = baseline.get("cases", {}).get(name)
+        if expected is None:
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            limit = expected[metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {result[metric]:.4f} > {expected[metric]:.4f}"
+                    f" + {tolerance:.0%}"
+                )
+    return regressions
+
+
+def parse_option(option: str) -> tuple:
+    """Parse a ``key=value`` validator option, numbers are converted."""
+    key, _, value = option.partition("=")
+    try:
+        return key, int(value)
+    except ValueError:
+        return key, value
+
+
+def parse_list(value: str, item_type=str) -> list:
+    """Parse a comma separated list of the command line."""
+    return [item_type(item) for item in value.split(",") if item]
+
+
+def write_line(line: str):
+    """Write a line of the report."""
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """Get the parser of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark PdfSignatureValidator.validate() on synthetic "
+        "signed PDFs and compare the results with a stored baseline.",
+    )
+    parser.add_argument("--profile", choices=PROFILES, default="quick")
+    parser.add_argument("--sizes", help=f"comma separated, of {', '.join(SIZES)}")
+    parser.add_argument("--signatures", help="comma separated signature counts")
+    parser.add_argument("--digests", help="comma separated digest algorithms")
+    parser.add_argument("--certificates", help="comma separated certificate counts")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--validator-option",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="option of PdfSignatureValidator, e.g. use_mmap=1",
+    )
+    parser.add_argument("--corpus-dir", type=Path, default=BENCHMARKS_ROOT / "corpus")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument(
+        "--baseline", type=Path, default=BENCHMARKS_ROOT / "baseline.json"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the baseline instead of comparing them",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown and RSS growth over the baseline, 0.25 is 25%%",
+    )
+    return parser
+
+
+def main(argv=None) -> int:
+    """Run the benchmarks.
+
+    :returns
+        int: exit status, 1 when a case regressed against the baseline
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "validator.settings")
+    arguments = get_parser().parse_args(argv)
+    profile = PROFILES[arguments.profile]
+    cases = get_cases(
+        parse_list(arguments.sizes) if arguments.sizes else profile["sizes"],
+        (
+            parse_list(arguments.signatures, int)
+            if arguments.signatures
+            else profile["signatures"]
+        ),
+        parse_list(arguments.digests) if arguments.digests else profile["digests"],
+        (
+            parse_list(arguments.certificates, int)
+            if arguments.certificates
+            else profile["certificates"]
+        ),
+    )
+    validator_options = dict(map(parse_option, arguments.validator_option))
+
+    paths = build_corpus(cases, arguments.corpus_dir)
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "validator_options": validator_options,
+        "repeats": arguments.repeats,
+        "cases": run_cases(paths, arguments.repeats, validator_options),
+    }
+    if arguments.output:
+        arguments.output.write_text(json.dumps(results, indent=2))
+    if arguments.save_baseline:
+        arguments.baseline.write_text(json.dumps(results, indent=2))
+        write_line(f"Baseline saved to {arguments.baseline}")
+        return 0
+    if not arguments.baseline.exists():
+        write_line(f"No baseline at {arguments.baseline}, nothing to compare")
+        return 0
+    regressions = compare_with_baseline(
+        results["cases"],
+        json.loads(arguments.baseline.read_text()),
+        arguments.tolerance,
+    )
+    for regression in regressions:
+        write_line(f"REGRESSION {regression}")
+    return 1 if regressions else 0
@@ -1,11 +1,41 @@
 import pytest
+from django.core.cache import cache
 
 from accounts.models import SignerUser
 from accounts.services.pbs_extractor_service import PublicKeyExtractor
 from accounts.tests.factories import UserFactory
+from signature_validator.services.metrics import metrics
+from signature_validator.services.validation_cache_service import (
+    validation_result_cache,
+)
 from validator import settings
 
 
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, monkeypatch):
+    """Write the metrics of the tests to a directory of their own."""
+    directory = tmp_path / "metrics"
+    monkeypatch.setattr(metrics, "directory", str(directory))
+    return directory
+
+
+@pytest.fixture(autouse=True)
+def page_cache(settings):
+    """Cache the pages of the tests in memory, empty for every test."""
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    cache.clear()
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def validation_result_memory():
+    """Start every test without validation results cached in the process."""
+    validation_result_cache.memory.clear()
+    return validation_result_cache.memory
+
+
 @pytest.fixture
 def activated_user_signer_type():
     """Return an active signer user."""
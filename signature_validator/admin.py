@@ -2,7 +2,7 @@
 from django.contrib import admin
 from django.forms import BaseInlineFormSet
 
-from .models import SignatureValidator, PdfDocumentValidator
+from .models import Certificate, SignatureValidator, PdfDocumentValidator
 
 
 class SignatureValidatorInlineFormSet(BaseInlineFormSet):
@@ -57,9 +57,12 @@ class PdfDocumentValidatorAdmin(admin.ModelAdmin):
         "is_hashes_valid",
         "is_signatures_valid",
         "user",
+        "validation_time",
         "created",
         "updated",
     )
+    exclude = ("timings",)
+    readonly_fields = ("stage_timings",)
     search_fields = (
         "pdf_file",
         "is_signed",
@@ -78,5 +81,31 @@ class PdfDocumentValidatorAdmin(admin.ModelAdmin):
         "updated",
     )
 
+    @admin.display(description="Validation time (ms)")
+    def validation_time(self, obj):
+        """Get the milliseconds spent in all stages of the validation."""
+        if not obj.timings:
+            return None
+        return round(sum(obj.timings.values()), 1)
+
+    @admin.display(description="Timings (ms)")
+    def stage_timings(self, obj):
+        """Get the milliseconds spent in each stage of the validation."""
+        if not obj.timings:
+            return "-"
+        return ", ".join(f"{stage}: {ms}" for stage, ms in obj.timings.items())
+
 
 admin.site.register(PdfDocumentValidator, PdfDocumentValidatorAdmin)
+
+
+class CertificateAdmin(admin.ModelAdmin):
+    """CertificateAdmin for the deduplicated signer certificates."""
+
+    list_display = ("pk", "subject", "issuer", "fingerprint", "created")
+    search_fields = ("fingerprint", "subject", "issuer")
+    readonly_fields = ("fingerprint", "subject", "issuer", "created")
+    exclude = ("public_key_der", "certificate_der")
+
+
+admin.site.register(Certificate, CertificateAdmin)
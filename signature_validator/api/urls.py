@@ -2,11 +2,12 @@
 from rest_framework.routers import DefaultRouter
 
 
-from signature_validator.api.views import PdfValidateViewSet
+from signature_validator.api.views import PdfValidateViewSet, ValidationJobViewSet
 
 
 router = DefaultRouter()
 router.register("signatures", PdfValidateViewSet, "signatures")
+router.register("validation-jobs", ValidationJobViewSet, "validation-jobs")
 
 
 urlpatterns = router.urls
@@ -1,9 +1,35 @@
 # -*- coding: utf-8 -*-
-from rest_framework import viewsets
-from rest_framework.permissions import AllowAny
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
 
-from signature_validator.models import PdfDocumentValidator
-from signature_validator.serializers import PdfValidateSerializer
+from signature_validator.filters import PdfDocumentValidatorFilter
+from signature_validator.models import PdfDocumentValidator, ValidationJob
+from signature_validator.pagination import KeysetPagination
+from signature_validator.renderers import NDJSONRenderer
+from signature_validator.serializers import (
+    BulkValidateResultSerializer,
+    BulkValidateSerializer,
+    PdfValidateSerializer,
+    SignatureResultSerializer,
+    ValidationJobSerializer,
+)
+from signature_validator.services.bulk_upload_service import BulkUploadService
+from signature_validator.services.document_validation_service import (
+    DocumentValidationService,
+)
+from signature_validator.upload_handlers import HashingUploadHandler
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
 
 
 class PdfValidateViewSet(viewsets.ModelViewSet):
@@ -11,13 +37,193 @@ class PdfValidateViewSet(viewsets.ModelViewSet):
 
     permission_classes = [AllowAny]
     serializer_class = PdfValidateSerializer
+    # lists are read a page at a time after the cursor of the next and previous
+    # links, with a fixed number of queries, see KeysetPagination
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PdfDocumentValidatorFilter
+    list_actions = ("list", "mine")
+    # with Accept: application/x-ndjson results are streamed as they finish
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+
+    def initialize_request(self, request, *args, **kwargs):
+        """Hash the uploads while they arrive, before the body is parsed."""
+        request.upload_handlers = [HashingUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
 
     def get_serializer_context(self):
-        """Pass the request object to the serializer."""
+        """Pass the request object, and the fields of a list, to the serializer."""
         context = super().get_serializer_context()
         context.update({"user": self.request.user})
+        if self.action in self.list_actions:
+            context["fields"] = self.get_sparse_fields()
         return context
 
+    def get_sparse_fields(self):
+        """Get the fields of the ``?fields=`` query parameter, None for all.
+
+        :returns
+            list: names of the fields to serialize
+        """
+        fields = self.request.query_params.get("fields")
+        if not fields:
+            return None
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = set(names) - set(PdfValidateSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError(
+                {"fields": f"Unknown fields: {', '.join(sorted(unknown))}"}
+            )
+        return names
+
+    def get_queryset(self):
+        """Return the documents, with their signatures when they are shown."""
+        queryset = PdfDocumentValidator.objects.all()
+        fields = self.get_sparse_fields() if self.action in self.list_actions else None
+        if fields is None or "validated_list" in fields:
+            queryset = queryset.prefetch_related("signaturevalidator_set")
+        return queryset
+
+    def is_streaming(self) -> bool:
+        """Check if the client accepts results streamed as NDJSON."""
+        return self.request.accepted_renderer.format == NDJSONRenderer.format
+
+    def create(self, request, *args, **kwargs):
+        """Validate the PDF, or queue it and return the job to poll.
+
+        A queued upload found in the result cache is not queued, the document
+        is returned at once.
+        """
+        if not settings.VALIDATION_JOBS_ASYNC:
+            if self.is_streaming():
+                return self.stream_create(request)
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pdf_validator = serializer.save()
+        if not hasattr(pdf_validator, "validation_job"):
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        job = pdf_validator.validation_job
+        status_url = reverse(
+            "validation-jobs-detail", kwargs={"pk": job.pk}, request=request
+        )
+        return Response(
+            ValidationJobSerializer(job, context=self.get_serializer_context()).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": status_url},
+        )
+
+    @action(detail=False, methods=["post"], serializer_class=BulkValidateSerializer)
+    def bulk(self, request, *args, **kwargs):
+        """Validate many PDF files, or the PDFs of a ZIP archive, at once."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        service = BulkUploadService(request.user)
+        if "archive" in serializer.validated_data:
+            entries = service.read_archive(serializer.validated_data["archive"])
+        else:
+            entries = service.read_files(serializer.validated_data["files"])
+        if self.is_streaming():
+            return StreamingHttpResponse(
+                self.stream_bulk_results(service.validate(entries)),
+                content_type=NDJSONRenderer.media_type,
+            )
+        results = sorted(service.validate(entries), key=lambda r: r["index"])
+        return Response(
+            {
+                "count": len(results),
+                "errors": sum(result["error"] is not None for result in results),
+                "results": BulkValidateResultSerializer(
+                    results, many=True, context=self.get_serializer_context()
+                ).data,
+            },
+            status=(
+                status.HTTP_202_ACCEPTED
+                if settings.VALIDATION_JOBS_ASYNC
+                else status.HTTP_200_OK
+            ),
+        )
+
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def mine(self, request, *args, **kwargs):
+        """List the documents of the user, latest first, like the HTML list."""
+        queryset = self.filter_queryset(self.get_queryset().filter(user=request.user))
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    def stream_create(self, request) -> StreamingHttpResponse:
+        """Store the PDF and stream its signature results as they are verified."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pdf_file = serializer.validated_data["pdf_file"]
+        pdf_validator = PdfDocumentValidator.objects.create(pdf_file=pdf_file)
+        service = DocumentValidationService(
+            pdf_validator, getattr(pdf_file, "content_sha256", None)
+        )
+        return StreamingHttpResponse(
+            self.stream_signatures(service),
+            status=status.HTTP_201_CREATED,
+            content_type=NDJSONRenderer.media_type,
+        )
+
+    def stream_signatures(self, service: DocumentValidationService):
+        """Yield a line per verified signature, then a line for the document.
+
+        The document stored for the stream is removed again when its results
+        are not saved, after an error or when the client goes away.
+        """
+        saved = False
+        try:
+            validator = service.get_validator()
+            for index, verified_data in enumerate(service.iter_validate(validator)):
+                yield NDJSONRenderer.render_line(
+                    {
+                        "type": "signature",
+                        "index": index,
+                        **SignatureResultSerializer(verified_data).data,
+                    }
+                )
+            pdf_validator = service.save_signatures(validator)
+            saved = True
+            yield NDJSONRenderer.render_line(
+                {
+                    "type": "document",
+                    **PdfValidateSerializer(
+                        pdf_validator, context=self.get_serializer_context()
+                    ).data,
+                }
+            )
+        except Exception as e:
+            # the status line is already sent, the error ends the stream instead
+            logger.error(f"Error streaming validation results: {e}")
+            yield NDJSONRenderer.render_line({"type": "error", "error": str(e)})
+        finally:
+            if not saved:
+                service.pdf_validator.pdf_file.delete(save=False)
+                service.pdf_validator.delete()
+
+    def stream_bulk_results(self, results):
+        """Yield a line per document of a bulk upload as soon as it is validated."""
+        context = self.get_serializer_context()
+        try:
+            for result in results:
+                yield NDJSONRenderer.render_line(
+                    BulkValidateResultSerializer(result, context=context).data
+                )
+        except Exception as e:
+            # the status line is already sent, the error ends the stream instead
+            logger.error(f"Error streaming bulk validation results: {e}")
+            yield NDJSONRenderer.render_line({"type": "error", "error": str(e)})
+
+
+class ValidationJobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Viewset to poll the status of a queued validation by its id."""
+
+    permission_classes = [AllowAny]
+    serializer_class = ValidationJobSerializer
+
     def get_queryset(self):
-        """Return active signer users."""
-        return PdfDocumentValidator.objects.all()
+        """Return the jobs with their documents and results."""
+        return ValidationJob.objects.select_related(
+            "pdf_document_validator"
+        ).prefetch_related("pdf_document_validator__signaturevalidator_set")
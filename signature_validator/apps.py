@@ -7,3 +7,7 @@ class SignatureValidatorConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "signature_validator"
+
+    def ready(self):
+        """Import signals so signals can be used."""
+        import signature_validator.signals  # noqa
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""Namespaces of the cached pages of the app, see ``validator.cache``."""
+
+# totals and charts of the report, invalidated when the daily rollup changes
+REPORT_NAMESPACE = "report"
+
+
+def get_result_namespace(pk) -> str:
+    """Get the namespace of the result pages of a document.
+
+    It is invalidated when the document, its signatures or its validation
+    job are saved.
+    """
+    return f"pdf-result:{pk}"
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import datetime
+
+
+class ValidationResultEncoder(json.JSONEncoder):
+    """Encode validation results, keeping bytes and datetimes restorable."""
+
+    def default(self, o):
+        """Tag the values JSON cannot hold so that the decoder can restore them."""
+        if isinstance(o, (bytes, bytearray)):
+            return {"__bytes__": bytes(o).hex()}
+        if isinstance(o, datetime):
+            return {"__datetime__": o.isoformat()}
+        return super().default(o)
+
+
+class ValidationResultDecoder(json.JSONDecoder):
+    """Decode validation results encoded by ``ValidationResultEncoder``."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the decoder with the hook restoring the tagged values."""
+        kwargs["object_hook"] = self.restore
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def restore(obj):
+        """Restore bytes and datetimes from their tagged values."""
+        if "__bytes__" in obj:
+            return bytes.fromhex(obj["__bytes__"])
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        return obj
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import django_filters
+
+from .models import PdfDocumentValidator
+
+
+class PdfDocumentValidatorFilter(django_filters.FilterSet):
+    """Filter for PdfDocumentValidator model, every filter has an index."""
+
+    user = django_filters.NumberFilter(field_name="user")
+    created_after = django_filters.IsoDateTimeFilter(
+        field_name="created", lookup_expr="gte"
+    )
+    created_before = django_filters.IsoDateTimeFilter(
+        field_name="created", lookup_expr="lt"
+    )
+
+    class Meta:
+        """Meta class for PdfDocumentValidatorFilter."""
+
+        model = PdfDocumentValidator
+        fields = ["user", "is_signed", "created_after", "created_before"]
@@ -1,14 +1,16 @@
 # -*- coding: utf-8 -*-
-from django import forms
+from datetime import timedelta
 
-from accounts.models import SignerUser, CustomUser
-from accounts.services.pbs_validation_service import ValidatePublicKey
-from signature_validator.services.pdf_validation_service import PdfSignatureValidator
-from validator.logger import module_logger
-from .models import PdfDocumentValidator, SignatureValidator
-from .services.email_service import EmailService
+from django import forms
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
 
-logger = module_logger(__name__)
+from .models import PdfDocumentValidator
+from .services.daily_stat_service import GRANULARITIES
+from .services.document_validation_service import DocumentValidationService
+from .services.validation_cache_service import validation_result_cache
+from .services.validation_job_service import enqueue_validation
 
 
 class PdfValidateForm(forms.ModelForm):
@@ -35,108 +37,52 @@ class PdfValidateForm(forms.ModelForm):
         return pdf_file
 
     def save(self, commit=True):
-        """Override save method to validate PDF."""
-        pdf_validator = super().save()
-        validator = PdfSignatureValidator(pdf_validator.pdf_file.path)
-        validator.validate()
-        pdf_validator.is_signed = validator.is_signed
-        pdf_validator.is_hashes_valid = validator.is_hashes_valid
-        pdf_validator.is_signatures_valid = validator.is_signatures_valid
+        """Override save method to validate PDF, or queue it for the workers.
+
+        A PDF found in the result cache by the hash of the upload is not
+        queued, its result is saved at once.
+        """
+        pdf_validator = super().save(commit=False)
         # save user
         if self.request.user.is_authenticated:
             pdf_validator.user = self.request.user
         pdf_validator.save()
-        emails_to_be_sent = []
-        distinct_people_signed = set()
-
-        if self.is_validated_data_available(validator):
-            for index, validated_data in enumerate(
-                validator.validated_data_list, start=1
-            ):
-                validated_data["pdf_document_validator"] = pdf_validator
-                validated_data["signature_name"] = f"Signature {index}"
-                distinct_people_signed.add(validated_data["serial_number"])
-                if "public_key" in validated_data:
-                    self.validate_and_trim_public_key(validated_data)
-                    signature_validator = SignatureValidator.objects.create(
-                        **validated_data
-                    )
-                    self.set_signer_verification(
-                        emails_to_be_sent, signature_validator, validated_data
-                    )
-        self.send_invite_emails(emails_to_be_sent, pdf_validator)
-        pdf_validator.all_signers_verified = self.is_all_signers_verified(pdf_validator)
-        pdf_validator.distinct_people_signed = len(distinct_people_signed)
-        pdf_validator.save()
-        return pdf_validator
-
-    @staticmethod
-    def is_validated_data_available(validator) -> bool:
-        """Check if validated data is available."""
-        return (
-            validator
-            and hasattr(validator, "validated_data_list")
-            and validator.validated_data_list
-        )
-
-    @staticmethod
-    def is_all_signers_verified(pdf_validator) -> bool:
-        """Check if all signers are verified."""
-        signatures = SignatureValidator.objects.filter(
-            pdf_document_validator=pdf_validator
-        ).values_list("verified_signer")
-        if not signatures.exists():
-            return False
-        return all([signature[0] for signature in signatures])
-
-    @staticmethod
-    def validate_and_trim_public_key(validated_data):
-        """Validate and trim the public key."""
-        validator = ValidatePublicKey(validated_data["public_key"])
-        validator.trim_key()
-        validated_data["public_key"] = validator.key
-
-    def send_invite_emails(self, emails_to_be_sent, pdf_validator):
-        """Send invite emails to the signers."""
-        if emails_to_be_sent:
-            EmailService.send_invite_email(
-                emails_to_be_sent, pdf_validator.pdf_file.path, self.request
-            )
-
-    @staticmethod
-    def set_signer_verification(
-        emails_to_be_sent: list,
-        signature_validator: SignatureValidator,
-        validated_data: dict,
-    ):
-        """Check if the signer exists in the system and set proper messages."""
-        user = CustomUser.objects.filter(email=validated_data["email_of_signer"])
-        sign_user = SignerUser.objects.filter(
-            public_key=validated_data["public_key"], active=True
-        )
-        if user.exists() and sign_user.exists():
-            signature_validator.verified_signer = True
-            signature_validator.signer_user = sign_user.first()
-            signature_validator.save()
-        else:
-            PdfValidateForm.set_messages(emails_to_be_sent, signature_validator)
-        signature_validator.save()
-
-    @staticmethod
-    def set_messages(emails_to_be_sent, signature_validator):
-        """Set messages for the signature."""
-        if signature_validator.email_of_signer:
-            if signature_validator.email_of_signer not in emails_to_be_sent:
-                emails_to_be_sent.append(signature_validator.email_of_signer)
-            signature_validator.message = (
-                f"{signature_validator.email_of_signer} is not registered in the "
-                f"system, we have already sent an invitation email, please contact "
-                f"signer to signup in the system."
-            )
-            logger.info("Sending signup invitation email to the signer.")
-        else:
-            signature_validator.message = (
-                f"{signature_validator.email_of_signer} is not provided in the "
-                f"signature, please contact signer to create a signature with email"
-                f" and personal details."
+        document_hash = getattr(self.cleaned_data["pdf_file"], "content_sha256", None)
+        signup_url = self.request.build_absolute_uri(reverse("accounts:signup"))
+        if settings.VALIDATION_JOBS_ASYNC and not validation_result_cache.contains(
+            document_hash
+        ):
+            enqueue_validation(pdf_validator, document_hash, signup_url)
+            return pdf_validator
+        service = DocumentValidationService(pdf_validator, document_hash, signup_url)
+        return service.save_verified_signatures(service.validate())
+
+
+class ReportRangeForm(forms.Form):
+    """Form for the date range and granularity of the report charts."""
+
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 3660
+
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+    granularity = forms.ChoiceField(
+        choices=[(granularity, granularity) for granularity in GRANULARITIES],
+        required=False,
+    )
+
+    def clean(self):
+        """Default to the last 30 days by day, and check the range."""
+        cleaned_data = super().clean()
+        end = cleaned_data.get("end") or timezone.localdate()
+        start = cleaned_data.get("start") or end - timedelta(days=self.DEFAULT_DAYS - 1)
+        if start > end:
+            raise forms.ValidationError("The start must not be after the end.")
+        if (end - start).days >= self.MAX_DAYS:
+            raise forms.ValidationError(
+                f"The range must not be longer than {self.MAX_DAYS} days."
             )
+        cleaned_data["start"] = start
+        cleaned_data["end"] = end
+        cleaned_data["granularity"] = cleaned_data.get("granularity") or "day"
+        return cleaned_data
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from signature_validator.services.daily_stat_service import DailyStatService
+
+
+class Command(BaseCommand):
+    """Recount the daily rollup of the report from the documents and users."""
+
+    help = "Rebuild the daily counts of documents and users shown by the report."
+
+    def handle(self, *args, **options):
+        """Rebuild the rollup."""
+        days = DailyStatService.rebuild()
+        self.stdout.write(f"Rebuilt the daily stats of {days} days")
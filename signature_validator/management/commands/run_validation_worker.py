@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from signature_validator.services.validation_job_service import ValidationWorker
+
+
+class Command(BaseCommand):
+    """Run queued validation jobs, start more processes to scale out."""
+
+    help = "Claim queued PDF validation jobs from the database and run them."
+
+    def add_arguments(self, parser):
+        """Add the arguments of the command."""
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for jobs.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before looking for jobs when the queue is empty.",
+        )
+        parser.add_argument(
+            "--worker-id", help="Name the worker claims jobs with, host:pid by default."
+        )
+
+    def handle(self, *args, **options):
+        """Run the worker until it is stopped or the burst is done."""
+        worker = ValidationWorker(options["worker_id"])
+        self.stdout.write(f"Validation worker {worker.worker_id} started")
+        try:
+            jobs_run = worker.run(
+                burst=options["burst"], poll_interval=options["poll_interval"]
+            )
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(f"Validation worker {worker.worker_id} ran {jobs_run} jobs")
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.2 on 2026-10-18 14:14
+
+from django.db import migrations, models
+import signature_validator.encoders
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signature_validator", "0003_add_signer_user_as_fk_to_signature_validator"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ValidationResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "document_hash",
+                    models.CharField(help_text="SHA-256 of the PDF", max_length=64),
+                ),
+                (
+                    "policy_version",
+                    models.CharField(
+                        help_text="Validator and trust policy the result is valid for",
+                        max_length=64,
+                    ),
+                ),
+                ("is_signed", models.BooleanField(default=False)),
+                ("is_hashes_valid", models.BooleanField(default=False)),
+                ("is_signatures_valid", models.BooleanField(default=False)),
+                (
+                    "validated_data_list",
+                    models.JSONField(
+                        blank=True,
+                        decoder=signature_validator.encoders.ValidationResultDecoder,
+                        encoder=signature_validator.encoders.ValidationResultEncoder,
+                        null=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="validationresult",
+            constraint=models.UniqueConstraint(
+                fields=("document_hash", "policy_version"),
+                name="unique_validation_result_per_policy",
+            ),
+        ),
+    ]
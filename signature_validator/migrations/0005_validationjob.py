@@ -0,0 +1,69 @@
+# Generated by Django 4.2.2 on 2026-10-18 14:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signature_validator", "0004_validationresult"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ValidationJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        db_index=True,
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "verify_signers",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Verify the signers and invite unknown signers",
+                    ),
+                ),
+                (
+                    "document_hash",
+                    models.CharField(blank=True, max_length=64, null=True),
+                ),
+                ("signup_url", models.CharField(blank=True, max_length=255, null=True)),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("error", models.TextField(blank=True, null=True)),
+                ("claimed_by", models.CharField(blank=True, max_length=255, null=True)),
+                ("claimed_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                (
+                    "pdf_document_validator",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="validation_job",
+                        to="signature_validator.pdfdocumentvalidator",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signature_validator", "0005_validationjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pdfdocumentvalidator",
+            name="timings",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.2 on 2026-10-18 14:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signature_validator", "0006_pdfdocumentvalidator_timings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Certificate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=64, unique=True)),
+                ("public_key_der", models.BinaryField()),
+                ("certificate_der", models.BinaryField(blank=True, null=True)),
+                ("subject", models.TextField(blank=True, null=True)),
+                ("issuer", models.TextField(blank=True, null=True)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="signaturevalidator",
+            name="certificate",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="signature_validator.certificate",
+            ),
+        ),
+    ]
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import base64
+import binascii
+import hashlib
+
+from django.db import migrations
+
+
+CHUNK_SIZE = 1000
+# ids of the signatures named in the error of undecodable public keys
+MAX_REPORTED_IDS = 20
+
+
+def get_public_key_der(public_key):
+    """Get the SubjectPublicKeyInfo DER of a PEM or trimmed public key."""
+    trimmed_key = (
+        public_key.replace("-----BEGIN PUBLIC KEY-----", "")
+        .replace("-----END PUBLIC KEY-----", "")
+        .replace("\n", "")
+        .strip()
+    )
+    try:
+        return base64.b64decode(trimmed_key, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def iter_chunks(queryset):
+    """Iterate the rows in primary key order, one chunk at a time."""
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:CHUNK_SIZE])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def get_signatures_to_move(SignatureValidator):
+    """Get the signatures with a public key that is not in a certificate row."""
+    return (
+        SignatureValidator.objects.filter(
+            public_key__isnull=False, certificate__isnull=True
+        )
+        .exclude(public_key="")
+        .only("pk", "public_key")
+    )
+
+
+def check_public_keys(signatures):
+    """Fail before anything is moved if a public key can not be decoded.
+
+    The next migration drops the public keys of the signatures, a key left
+    out of the certificate table would be lost.
+    """
+    invalid_ids = [
+        signature.pk
+        for chunk in iter_chunks(signatures)
+        for signature in chunk
+        if get_public_key_der(signature.public_key) is None
+    ]
+    if invalid_ids:
+        raise ValueError(
+            f"{len(invalid_ids)} signatures have a public key that is not base64 "
+            f"encoded, fix or clear them before migrating, ids: "
+            f"{invalid_ids[:MAX_REPORTED_IDS]}"
+        )
+
+
+def deduplicate_certificates(apps, schema_editor):
+    """Point every signature to the certificate row of its public key."""
+    Certificate = apps.get_model("signature_validator", "Certificate")
+    SignatureValidator = apps.get_model("signature_validator", "SignatureValidator")
+    signatures = get_signatures_to_move(SignatureValidator)
+    check_public_keys(signatures)
+    for chunk in iter_chunks(signatures):
+        public_keys = {}
+        for signature in chunk:
+            public_key_der = get_public_key_der(signature.public_key)
+            fingerprint = hashlib.sha256(public_key_der).hexdigest()
+            public_keys[fingerprint] = public_key_der
+            signature.certificate_fingerprint = fingerprint
+        Certificate.objects.bulk_create(
+            [
+                Certificate(fingerprint=fingerprint, public_key_der=public_key_der)
+                for fingerprint, public_key_der in public_keys.items()
+            ],
+            ignore_conflicts=True,
+        )
+        certificates = Certificate.objects.in_bulk(
+            list(public_keys), field_name="fingerprint"
+        )
+        for signature in chunk:
+            signature.certificate = certificates[signature.certificate_fingerprint]
+        SignatureValidator.objects.bulk_update(chunk, ["certificate"])
+
+
+def restore_public_keys(apps, schema_editor):
+    """Copy the public key of the certificate back to every signature."""
+    SignatureValidator = apps.get_model("signature_validator", "SignatureValidator")
+    signatures = SignatureValidator.objects.filter(
+        certificate__isnull=False
+    ).select_related("certificate")
+    for chunk in iter_chunks(signatures):
+        for signature in chunk:
+            signature.public_key = base64.b64encode(
+                bytes(signature.certificate.public_key_der)
+            ).decode()
+        SignatureValidator.objects.bulk_update(chunk, ["public_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signature_validator", "0007_certificate"),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_certificates, restore_public_keys),
+    ]
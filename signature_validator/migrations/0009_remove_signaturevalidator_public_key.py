@@ -0,0 +1,35 @@
+# Generated by Django 4.2.2 on 2026-10-18 14:39
+
+from django.db import migrations
+
+
+def check_public_keys_moved(apps, schema_editor):
+    """Fail if a public key about to be dropped is not in the certificate table."""
+    SignatureValidator = apps.get_model("signature_validator", "SignatureValidator")
+    not_moved = (
+        SignatureValidator.objects.filter(
+            public_key__isnull=False, certificate__isnull=True
+        )
+        .exclude(public_key="")
+        .count()
+    )
+    if not_moved:
+        raise ValueError(
+            f"{not_moved} signatures have a public key that is not in the "
+            f"certificate table, migrate back to 0007 and fix them first"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signature_validator", "0008_deduplicate_signature_certificates"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_public_keys_moved, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="signaturevalidator",
+            name="public_key",
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 4.2.2 on 2026-10-18 14:43
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def count_daily_stats(apps, schema_editor):
+    """Count the documents and users of every existing day."""
+    DailyStat = apps.get_model("signature_validator", "DailyStat")
+    PdfDocumentValidator = apps.get_model("signature_validator", "PdfDocumentValidator")
+    CustomUser = apps.get_model("accounts", "CustomUser")
+    days = defaultdict(dict)
+    documents = (
+        PdfDocumentValidator.objects.annotate(day=TruncDate("created"))
+        .values("day")
+        .annotate(
+            documents=Count("pk"),
+            signed_documents=Count("pk", filter=Q(is_signed=True)),
+            verified_documents=Count("pk", filter=Q(all_signers_verified=True)),
+        )
+        .order_by()
+    )
+    users = (
+        CustomUser.objects.annotate(day=TruncDate("date_joined"))
+        .values("day")
+        .annotate(
+            users=Count("pk"),
+            active_users=Count("pk", filter=Q(is_active=True)),
+            signers=Count("pk", filter=Q(user_type="signer")),
+        )
+        .order_by()
+    )
+    for row in [*documents, *users]:
+        days[row.pop("day")].update(row)
+    DailyStat.objects.bulk_create(
+        DailyStat(date=day, **counts) for day, counts in sorted(days.items())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_signeruser_public_key_fingerprint"),
+        ("signature_validator", "0009_remove_signaturevalidator_public_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                (
+                    "documents",
+                    models.IntegerField(default=0, help_text="Validated documents"),
+                ),
+                (
+                    "signed_documents",
+                    models.IntegerField(default=0, help_text="Signed documents"),
+                ),
+                (
+                    "verified_documents",
+                    models.IntegerField(
+                        default=0, help_text="Documents with all signers verified"
+                    ),
+                ),
+                ("users", models.IntegerField(default=0, help_text="Users joined")),
+                (
+                    "active_users",
+                    models.IntegerField(
+                        default=0, help_text="Users joined that are active"
+                    ),
+                ),
+                (
+                    "signers",
+                    models.IntegerField(default=0, help_text="Signer users joined"),
+                ),
+            ],
+        ),
+        migrations.RunPython(count_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.2 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signature_validator", "0010_dailystat"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pdfdocumentvalidator",
+            index=models.Index(
+                fields=["user", "-created", "-id"], name="pdf_user_created_id_idx"
+            ),
+        ),
+    ]
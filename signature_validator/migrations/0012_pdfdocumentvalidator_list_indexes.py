@@ -0,0 +1,24 @@
+# Generated by Django 4.2.2 on 2026-10-18 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signature_validator", "0011_pdfdocumentvalidator_user_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pdfdocumentvalidator",
+            index=models.Index(fields=["-created", "-id"], name="pdf_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="pdfdocumentvalidator",
+            index=models.Index(
+                fields=["is_signed", "-created", "-id"],
+                name="pdf_signed_created_id_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.2 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("signature_validator", "0012_pdfdocumentvalidator_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="validationjob",
+            name="claim_token",
+            field=models.UUIDField(
+                blank=True, help_text="Token of the current claim of the job", null=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="validationjob",
+            name="claimed_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Claim time, refreshed while the job runs",
+                null=True,
+            ),
+        ),
+    ]
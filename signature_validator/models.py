@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
+import base64
+
 from django.db import models
 from django.urls import reverse
 
 from accounts.models import CustomUser, SignerUser
+from .encoders import ValidationResultDecoder, ValidationResultEncoder
 
 
 class PdfDocumentValidator(models.Model):
@@ -17,9 +20,27 @@ class PdfDocumentValidator(models.Model):
     )
     all_signers_verified = models.BooleanField(default=False)
     distinct_people_signed = models.IntegerField(default=0)
+    # milliseconds spent in each stage of the validation
+    timings = models.JSONField(blank=True, null=True)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        """Meta class for PdfDocumentValidator."""
+
+        indexes = [
+            # the documents of a user, latest first, read by keyset pagination
+            models.Index(
+                fields=("user", "-created", "-id"), name="pdf_user_created_id_idx"
+            ),
+            # all documents and the signed or unsigned ones, for the API list
+            models.Index(fields=("-created", "-id"), name="pdf_created_id_idx"),
+            models.Index(
+                fields=("is_signed", "-created", "-id"),
+                name="pdf_signed_created_id_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.pdf_file.name
 
@@ -28,6 +49,30 @@ class PdfDocumentValidator(models.Model):
         return reverse("signature-validator-view:pdf-result", kwargs={"pk": self.pk})
 
 
+class Certificate(models.Model):
+    """Model to store a signer certificate once, however many signatures use it.
+
+    Certificates are deduplicated by the SHA-256 of their SubjectPublicKeyInfo,
+    the fingerprint signers are matched with. The certificate and its parsed
+    names are unknown for signatures saved before this table existed.
+    """
+
+    fingerprint = models.CharField(max_length=64, unique=True)
+    public_key_der = models.BinaryField()
+    certificate_der = models.BinaryField(blank=True, null=True)
+    subject = models.TextField(blank=True, null=True)
+    issuer = models.TextField(blank=True, null=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.subject or self.fingerprint
+
+    @property
+    def public_key(self) -> str:
+        """Get the public key as the trimmed PEM stored for signers."""
+        return base64.b64encode(bytes(self.public_key_der)).decode()
+
+
 class SignatureValidator(models.Model):
     """Model to store signature validation data."""
 
@@ -49,9 +94,122 @@ class SignatureValidator(models.Model):
     signature_algorithm = models.CharField(max_length=255, blank=True, null=True)
     digest_algorithm = models.CharField(max_length=255, blank=True, null=True)
     message_digest = models.TextField(blank=True, null=True)
-    public_key = models.TextField(blank=True, null=True)
+    certificate = models.ForeignKey(
+        Certificate, blank=True, null=True, on_delete=models.PROTECT
+    )
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.signature_name
+
+    @property
+    def public_key(self):
+        """Get the public key of the signer from its certificate."""
+        if self.certificate is None:
+            return None
+        return self.certificate.public_key
+
+
+class ValidationResult(models.Model):
+    """Model to store the signature results of a document by its content hash."""
+
+    document_hash = models.CharField(max_length=64, help_text="SHA-256 of the PDF")
+    policy_version = models.CharField(
+        max_length=64, help_text="Validator and trust policy the result is valid for"
+    )
+    is_signed = models.BooleanField(default=False)
+    is_hashes_valid = models.BooleanField(default=False)
+    is_signatures_valid = models.BooleanField(default=False)
+    validated_data_list = models.JSONField(
+        blank=True,
+        null=True,
+        encoder=ValidationResultEncoder,
+        decoder=ValidationResultDecoder,
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta class for ValidationResult."""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=("document_hash", "policy_version"),
+                name="unique_validation_result_per_policy",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.document_hash}-{self.policy_version}"
+
+
+class ValidationJob(models.Model):
+    """Model to queue the validation of an uploaded document for the workers."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    pdf_document_validator = models.OneToOneField(
+        PdfDocumentValidator, on_delete=models.CASCADE, related_name="validation_job"
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=PENDING, db_index=True
+    )
+    verify_signers = models.BooleanField(
+        default=True, help_text="Verify the signers and invite unknown signers"
+    )
+    document_hash = models.CharField(max_length=64, blank=True, null=True)
+    signup_url = models.CharField(max_length=255, blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    claimed_by = models.CharField(max_length=255, blank=True, null=True)
+    claim_token = models.UUIDField(
+        blank=True, null=True, help_text="Token of the current claim of the job"
+    )
+    claimed_at = models.DateTimeField(
+        blank=True, null=True, help_text="Claim time, refreshed while the job runs"
+    )
+    finished_at = models.DateTimeField(blank=True, null=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.pk}-{self.status}"
+
+    @property
+    def is_finished(self) -> bool:
+        """Check if the job will not run anymore."""
+        return self.status in (self.DONE, self.FAILED)
+
+
+class DailyStat(models.Model):
+    """Model to store the counts of one day shown by the report.
+
+    The counts are updated when documents and users are saved, so the report
+    reads a date range in a single indexed query. Documents are counted on
+    the day they were uploaded and users on the day they joined. Run the
+    ``rebuild_daily_stats`` command to recount them from the source tables.
+    """
+
+    date = models.DateField(unique=True)
+    documents = models.IntegerField(default=0, help_text="Validated documents")
+    signed_documents = models.IntegerField(default=0, help_text="Signed documents")
+    verified_documents = models.IntegerField(
+        default=0, help_text="Documents with all signers verified"
+    )
+    users = models.IntegerField(default=0, help_text="Users joined")
+    active_users = models.IntegerField(
+        default=0, help_text="Users joined that are active"
+    )
+    signers = models.IntegerField(default=0, help_text="Signer users joined")
+
+    def __str__(self):
+        return str(self.date)
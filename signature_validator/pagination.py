@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(Exception):
+    """Raised for a cursor that was not made by the paginator."""
+
+
+def is_count_requested(params, name: str = "count") -> bool:
+    """Check if the query string asks for the total count, e.g. ``?count=1``."""
+    return params.get(name, "").lower() in ("1", "true", "yes")
+
+
+class KeysetPage:
+    """Page of a ``KeysetPaginator``, with the cursors of its neighbours."""
+
+    def __init__(self, object_list: list, next_cursor: str, previous_cursor: str):
+        """Initialize the page with its objects and cursors."""
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        """Check if there are objects after the page."""
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        """Check if there are objects before the page."""
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        """Check if the page is not the only one."""
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate a queryset by the values of its ordering, without ``OFFSET``.
+
+    A cursor holds the ordering values of the last object of a page, the
+    next page starts after them, so any page is read with one query served
+    by an index on the ordering. The ordering must be unique, end it with
+    the primary key. Pages are not numbered, the total is only counted on
+    ``count``.
+    """
+
+    def __init__(self, queryset, per_page: int, ordering=("-created", "-id")):
+        """Initialize the paginator of the queryset."""
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip("-") for field in self.ordering]
+
+    @property
+    def count(self) -> int:
+        """Count all objects, a query of its own."""
+        return self.queryset.count()
+
+    def encode_cursor(self, obj, reverse: bool) -> str:
+        """Encode the ordering values of the object as a cursor."""
+        values = []
+        for field in self.fields:
+            value = getattr(obj, field)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        position = json.dumps([values, reverse], separators=(",", ":"))
+        return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> tuple:
+        """Decode the ordering values and direction of a cursor.
+
+        Every value must be a string or a number, the ordering fields of a
+        cursor made by the paginator are never null.
+
+        :returns
+            tuple: values of the ordering fields and if the page is before them
+        """
+        try:
+            position = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values, reverse = json.loads(position)
+            if (
+                not isinstance(values, list)
+                or len(values) != len(self.fields)
+                or not all(isinstance(value, (str, int, float)) for value in values)
+                or not isinstance(reverse, bool)
+            ):
+                raise InvalidCursor(cursor)
+            model_fields = map(self.queryset.model._meta.get_field, self.fields)
+            values = [field.to_python(v) for field, v in zip(model_fields, values)]
+        except (binascii.Error, ValueError, TypeError, ValidationError) as e:
+            raise InvalidCursor(cursor) from e
+        return values, reverse
+
+    def get_position_filter(self, values: list, reverse: bool) -> Q:
+        """Get the filter of the objects after, or before, the values."""
+        conditions = []
+        for index, ordering in enumerate(self.ordering):
+            descending = ordering.startswith("-") != reverse
+            lookup = f"{self.fields[index]}__{'lt' if descending else 'gt'}"
+            conditions.append(
+                Q(
+                    **dict(zip(self.fields[:index], values[:index])),
+                    **{lookup: values[index]},
+                )
+            )
+        return reduce(or_, conditions)
+
+    def get_page(self, cursor: str = None) -> KeysetPage:
+        """Get the first page, or the page of a cursor."""
+        queryset = self.queryset.order_by(*self.ordering)
+        reverse = False
+        if cursor:
+            values, reverse = self.decode_cursor(cursor)
+            if reverse:
+                queryset = queryset.reverse()
+            queryset = queryset.filter(self.get_position_filter(values, reverse))
+        objects = list(queryset[: self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[: self.per_page]
+        if reverse:
+            objects.reverse()
+        # the page of a cursor always has the page it was reached from next to it
+        has_next = has_more if not reverse else bool(objects)
+        has_previous = has_more if reverse else bool(cursor and objects)
+        return KeysetPage(
+            objects,
+            self.encode_cursor(objects[-1], False) if has_next else None,
+            self.encode_cursor(objects[0], True) if has_previous else None,
+        )
+
+
+class KeysetPagination(BasePagination):
+    """Keyset pagination of the API, see ``KeysetPaginator``.
+
+    Responses have ``next`` and ``previous`` links and the ``results``, the
+    ``count`` is only added for ``?count=true``.
+    """
+
+    page_size = 10
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering = ("-created", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Get the objects of the page of the request."""
+        self.request = request
+        paginator = KeysetPaginator(
+            queryset, self.get_page_size(request), self.ordering
+        )
+        try:
+            self.page = paginator.get_page(
+                request.query_params.get(self.cursor_query_param)
+            )
+        except InvalidCursor:
+            raise NotFound("Invalid cursor")
+        self.count = None
+        if is_count_requested(request.query_params, self.count_query_param):
+            self.count = paginator.count
+        return self.page.object_list
+
+    def get_page_size(self, request) -> int:
+        """Get the page size of the request, at most ``max_page_size``."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_link(self, cursor: str):
+        """Get the URL of the page of the cursor."""
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        """Get the response with the links to the neighbour pages."""
+        response = {}
+        if self.count is not None:
+            response["count"] = self.count
+        response["next"] = self.get_link(self.page.next_cursor)
+        response["previous"] = self.get_link(self.page.previous_cursor)
+        response["results"] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        """Get the schema of the paginated response."""
+        return {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer"},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
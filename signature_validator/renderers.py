@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render newline delimited JSON, one line per item of a list."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render a list as one line per item and anything else as one line."""
+        if data is None:
+            return b""
+        if isinstance(data, list):
+            return b"".join(self.render_line(item) for item in data)
+        return self.render_line(data)
+
+    @staticmethod
+    def render_line(data) -> bytes:
+        """Render one item as a line of compact JSON."""
+        return (
+            json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+            + "\n"
+        ).encode("utf-8")
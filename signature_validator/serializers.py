@@ -1,10 +1,23 @@
 # -*- coding: utf-8 -*-
+import zipfile
+
+from django.conf import settings
 from rest_framework import serializers
 
 from accounts.models import CustomUser
 from accounts.serializers import UserSerializer
-from signature_validator.services.pdf_validation_service import PdfSignatureValidator
-from signature_validator.models import PdfDocumentValidator, SignatureValidator
+from signature_validator.models import (
+    PdfDocumentValidator,
+    SignatureValidator,
+    ValidationJob,
+)
+from signature_validator.services.document_validation_service import (
+    DocumentValidationService,
+)
+from signature_validator.services.validation_cache_service import (
+    validation_result_cache,
+)
+from signature_validator.services.validation_job_service import enqueue_validation
 
 
 class SignatureValidateSerializer(serializers.ModelSerializer):
@@ -33,7 +46,23 @@ class SignatureValidateSerializer(serializers.ModelSerializer):
         )
 
 
-class PdfValidateSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """Keep only the fields named by the ``fields`` of the serializer context.
+
+    The views pass the fields of the ``?fields=`` query parameter, serializers
+    nested in others have no such context and keep all their fields.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the serializer without the fields that are not asked for."""
+        super().__init__(*args, **kwargs)
+        fields = self.context.get("fields")
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class PdfValidateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for PDF signature validator model."""
 
     user = UserSerializer(read_only=True, source="validator_user.user")
@@ -63,20 +92,84 @@ class PdfValidateSerializer(serializers.ModelSerializer):
         )
 
     def create(self, validated_data):
-        """Override create method to save logged-in user to signature."""
+        """Override create method to save logged-in user to signature.
+
+        A PDF found in the result cache by the hash of the upload is not queued.
+        """
+        document_hash = getattr(validated_data["pdf_file"], "content_sha256", None)
         pdf_validator = PdfDocumentValidator.objects.create(**validated_data)
         user: CustomUser = self.context.get("user")
         if user and hasattr(user, "validator_user"):
             pdf_validator.validator_user = user.validator_user
-        validator = PdfSignatureValidator(pdf_validator.pdf_file.path)
-        validator.validate()
-        pdf_validator.is_signed = validator.is_signed
-        pdf_validator.is_hashes_valid = validator.is_hashes_valid
-        pdf_validator.is_signatures_valid = validator.is_signatures_valid
-
-        # createing related signature validations
-        for validated_data in validator.validated_data_list:
-            validated_data["pdf_document_validator"] = pdf_validator
-            SignatureValidator.objects.create(**validated_data)
-        pdf_validator.save()
-        return pdf_validator
+        if settings.VALIDATION_JOBS_ASYNC and not validation_result_cache.contains(
+            document_hash
+        ):
+            enqueue_validation(pdf_validator, document_hash, verify_signers=False)
+            return pdf_validator
+        service = DocumentValidationService(pdf_validator, document_hash)
+        return service.save_signatures(service.validate())
+
+
+class ValidationJobSerializer(serializers.ModelSerializer):
+    """Serializer for the status of a queued validation."""
+
+    document = PdfValidateSerializer(read_only=True, source="pdf_document_validator")
+
+    class Meta:
+        """Meta-class for ValidationJobSerializer."""
+
+        model = ValidationJob
+        fields = (
+            "id",
+            "status",
+            "attempts",
+            "error",
+            "created",
+            "finished_at",
+            "document",
+        )
+        read_only_fields = fields
+
+
+class SignatureResultSerializer(serializers.Serializer):
+    """Serializer for the result of one signature as soon as it is verified."""
+
+    signature_name = serializers.CharField()
+    signing_time = serializers.DateTimeField()
+    serial_number = serializers.CharField(required=False)
+    hash_valid = serializers.BooleanField(required=False)
+    signature_valid = serializers.BooleanField(required=False)
+
+
+class BulkValidateSerializer(serializers.Serializer):
+    """Serializer for a bulk upload of PDF files or of one ZIP archive."""
+
+    files = serializers.ListField(
+        child=serializers.FileField(), required=False, allow_empty=False
+    )
+    archive = serializers.FileField(required=False)
+
+    def validate_archive(self, archive):
+        """Check the archive is a ZIP file."""
+        if not zipfile.is_zipfile(archive):
+            raise serializers.ValidationError(
+                "Invalid file format, only ZIP is allowed."
+            )
+        archive.seek(0)
+        return archive
+
+    def validate(self, attrs):
+        """Check either the files or the archive are uploaded."""
+        if ("files" in attrs) == ("archive" in attrs):
+            raise serializers.ValidationError("Upload either files or an archive.")
+        return attrs
+
+
+class BulkValidateResultSerializer(serializers.Serializer):
+    """Serializer for the result of one file of a bulk upload."""
+
+    index = serializers.IntegerField()
+    name = serializers.CharField()
+    error = serializers.CharField(allow_null=True)
+    document = PdfValidateSerializer(required=False)
+    job = ValidationJobSerializer(required=False)
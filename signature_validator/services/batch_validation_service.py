@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import atexit
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+
+from signature_validator.services.certificate_cache import (
+    warm_certificate_cache_on_start,
+)
+from signature_validator.services.pdf_validation_service import PdfSignatureValidator
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
+
+process_pool = None
+process_pool_size = 0
+process_pool_lock = threading.Lock()
+
+
+def initialize_worker():
+    """Set up Django in a new worker process and warm its certificate cache."""
+    django.setup()
+    warm_certificate_cache_on_start()
+
+
+def get_process_pool(max_processes: int) -> ProcessPoolExecutor:
+    """Get the process pool shared by all batches, creating it when needed.
+
+    Workers are spawned rather than forked so that they never share database
+    connections or locks with the web process. A pool of another size is
+    replaced, it finishes the documents other batches already submitted.
+    """
+    global process_pool, process_pool_size
+    with process_pool_lock:
+        if process_pool is None or process_pool_size != max_processes:
+            if process_pool is not None:
+                process_pool.shutdown(wait=False)
+            process_pool = ProcessPoolExecutor(
+                max_workers=max_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=initialize_worker,
+            )
+            process_pool_size = max_processes
+        return process_pool
+
+
+@atexit.register
+def shutdown_process_pool(broken_pool=None):
+    """Shut the process pool down, or only replace it if it is the broken pool.
+
+    The futures of a broken pool already failed, they are not cancelled.
+    """
+    global process_pool, process_pool_size
+    with process_pool_lock:
+        if process_pool is None or broken_pool not in (None, process_pool):
+            return
+        if broken_pool is None:
+            process_pool.shutdown(wait=True, cancel_futures=True)
+        else:
+            process_pool.shutdown(wait=False)
+        process_pool = None
+        process_pool_size = 0
+
+
+def validate_source(source, validator_options: dict) -> dict:
+    """Validate one PDF in a worker process, errors are returned not raised."""
+    if isinstance(source, (bytes, bytearray)):
+        validator = PdfSignatureValidator(None, pdf_data=source, **validator_options)
+    else:
+        validator = PdfSignatureValidator(os.fspath(source), **validator_options)
+    try:
+        validator.validate()
+        error = None
+    except Exception as e:
+        logger.error(f"Error validating {validator.file_path or 'PDF data'}: {e}")
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "error": error,
+        **validator.__dict__(),
+        "timings": validator.timings.as_dict(),
+    }
+
+
+class BatchValidationService:
+    """Validate many PDFs on a persistent pool of worker processes.
+
+    The pool is shared by every batch of the process and stays alive between
+    batches, so the certificate caches of its workers stay warm. At most
+    ``max_in_flight`` documents are submitted at a time, the sources are
+    consumed only as results are taken, and a failing document yields an
+    error result without stopping the batch.
+    """
+
+    def __init__(self, max_processes=None, max_in_flight=None, validator_options=None):
+        """Initialize the service with the pool size and the validator options."""
+        self.max_processes = max_processes or settings.BATCH_VALIDATION_PROCESSES
+        self.max_in_flight = max_in_flight or 2 * self.max_processes
+        if validator_options is None:
+            validator_options = settings.PDF_VALIDATOR_OPTIONS
+        self.validator_options = validator_options
+
+    def validate_many(self, sources):
+        """Validate PDF paths or bytes and yield the results as they finish.
+
+        Each result is the dictionary of the validator with the ``index`` of
+        the source and an ``error`` which is None when validation succeeded.
+        """
+        pool = get_process_pool(self.max_processes)
+        sources = enumerate(sources)
+        in_flight = {}
+        for index, source in itertools.islice(sources, self.max_in_flight):
+            pool = self.submit(pool, in_flight, index, source)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, source = in_flight.pop(future)
+                yield self.get_result(future, index, source)
+                for next_index, next_source in itertools.islice(sources, 1):
+                    pool = self.submit(pool, in_flight, next_index, next_source)
+
+    def submit(self, pool, in_flight, index, source) -> ProcessPoolExecutor:
+        """Submit a source to the pool, replacing the pool if it is broken."""
+        if isinstance(source, memoryview):
+            source = source.tobytes()
+        try:
+            future = pool.submit(validate_source, source, self.validator_options)
+        except BrokenProcessPool:
+            shutdown_process_pool(broken_pool=pool)
+            pool = get_process_pool(self.max_processes)
+            future = pool.submit(validate_source, source, self.validator_options)
+        in_flight[future] = (index, source)
+        return pool
+
+    @staticmethod
+    def get_result(future, index, source) -> dict:
+        """Get the result of a finished document.
+
+        A document the pool did not validate, because its worker died, its
+        future was cancelled or it could not be sent to the worker, becomes
+        an error result instead of stopping the batch.
+        """
+        try:
+            result = future.result()
+        except (CancelledError, Exception) as e:
+            logger.error(f"Error getting the result of document {index}: {e!r}")
+            file_path = None if isinstance(source, (bytes, bytearray)) else source
+            result = {
+                "error": f"{type(e).__name__}: {e}",
+                "file_path": file_path,
+                "is_signed": False,
+                "is_hashes_valid": False,
+                "is_signatures_valid": False,
+                "validated_data_list": None,
+                "timings": {},
+            }
+        return {"index": index, **result}
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import itertools
+import zipfile
+import zlib
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+
+from signature_validator.models import PdfDocumentValidator
+from signature_validator.services.batch_validation_service import (
+    BatchValidationService,
+)
+from signature_validator.services.document_validation_service import (
+    DocumentValidationService,
+)
+from signature_validator.services.metrics import metrics
+from signature_validator.services.pdf_validation_service import PdfSignatureValidator
+from signature_validator.services.validation_cache_service import (
+    get_document_hash,
+    validation_result_cache,
+)
+from signature_validator.services.validation_job_service import enqueue_validation
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
+
+# errors of reading a corrupt, encrypted or unsupported member of a ZIP archive
+ARCHIVE_MEMBER_ERRORS = (
+    zipfile.BadZipFile,
+    zlib.error,
+    EOFError,
+    RuntimeError,
+    NotImplementedError,
+)
+
+
+class BulkUploadService:
+    """Store and validate many uploaded PDFs in one request.
+
+    The PDFs are read one at a time, from the uploaded files or member by
+    member from a ZIP archive without extracting it, and validated on the
+    batch process pool while the next ones are read. Every PDF is stored as
+    a document like a single upload, the pool validates the stored file and
+    the result of an identical document is reused from the validation result
+    cache. Uploaded files are stored as they are, with the hash taken while
+    they were received, only archive members are hashed here. Results are
+    yielded as they finish.
+    """
+
+    def __init__(self, user=None):
+        """Initialize the service with the user the documents belong to."""
+        self.user = user if user and user.is_authenticated else None
+
+    @staticmethod
+    def read_files(files):
+        """Check the uploaded files and yield them as ``(name, file, error)``."""
+        for file in files:
+            if not file.name.lower().endswith(".pdf"):
+                yield file.name, None, "Invalid file format, only PDF is allowed."
+            elif file.size > settings.BULK_UPLOAD_MAX_FILE_SIZE:
+                yield file.name, None, "File is too large."
+            else:
+                yield file.name, file, None
+
+    @classmethod
+    def read_archive(cls, archive):
+        """Read the PDF members of a ZIP archive as ``(name, file, error)``.
+
+        A member that can not be read is an error entry, the other members
+        of the archive are still read.
+        """
+        with zipfile.ZipFile(archive) as zip_file:
+            for member in zip_file.infolist():
+                if member.is_dir():
+                    continue
+                if not member.filename.lower().endswith(".pdf"):
+                    yield member.filename, None, (
+                        "Invalid file format, only PDF is allowed."
+                    )
+                elif member.file_size > settings.BULK_UPLOAD_MAX_FILE_SIZE:
+                    yield member.filename, None, "File is too large."
+                else:
+                    yield cls.read_member(zip_file, member)
+
+    @staticmethod
+    def read_member(zip_file: zipfile.ZipFile, member: zipfile.ZipInfo) -> tuple:
+        """Read a member of a ZIP archive as a ``(name, file, error)`` entry.
+
+        The size in the header of the member is not trusted, at most the
+        largest accepted file size is decompressed. The file of the member
+        holds its hash as ``content_sha256``, like an uploaded file.
+        """
+        try:
+            with zip_file.open(member) as file:
+                content = file.read(settings.BULK_UPLOAD_MAX_FILE_SIZE + 1)
+        except ARCHIVE_MEMBER_ERRORS as e:
+            logger.warning(f"Error reading {member.filename} of the archive: {e}")
+            return member.filename, None, f"Invalid archive member: {e}"
+        if len(content) > settings.BULK_UPLOAD_MAX_FILE_SIZE:
+            return member.filename, None, "File is too large."
+        file = ContentFile(content, name=member.filename)
+        file.content_sha256 = hashlib.sha256(content).hexdigest()
+        return member.filename, file, None
+
+    def store(self, name: str, file: File) -> tuple[PdfDocumentValidator, str]:
+        """Store the PDF as a document of the user.
+
+        :returns
+            tuple: stored document and the SHA-256 of the PDF
+        """
+        pdf_validator = PdfDocumentValidator(user=self.user)
+        document_hash = getattr(file, "content_sha256", None)
+        pdf_validator.pdf_file.save(name.rsplit("/", 1)[-1], file)
+        # files not received by HashingUploadHandler are hashed once stored
+        document_hash = document_hash or get_document_hash(pdf_validator.pdf_file.path)
+        return pdf_validator, document_hash
+
+    def validate(self, entries):
+        """Validate the PDFs of the entries and yield the result of each.
+
+        Each result holds the ``index`` and ``name`` of the entry, an
+        ``error`` which is None when it was validated, and the stored
+        ``document``. Queued validations hold their ``job`` instead.
+        Documents the validation failed for are stored without results.
+        """
+        if settings.VALIDATION_JOBS_ASYNC:
+            yield from self.enqueue(entries)
+            return
+        # documents by their index in the sources of the batch
+        documents = {}
+        # results of the entries rejected or found in the cache
+        finished = []
+
+        def sources():
+            batch_index = itertools.count()
+            for index, (name, file, error) in enumerate(entries):
+                if error is not None:
+                    finished.append(self.get_result(index, name, error))
+                    continue
+                pdf_validator, document_hash = self.store(name, file)
+                if self.save_cached_result(pdf_validator, document_hash):
+                    finished.append(self.get_result(index, name, None, pdf_validator))
+                    continue
+                documents[next(batch_index)] = (
+                    index,
+                    name,
+                    pdf_validator,
+                    document_hash,
+                )
+                yield pdf_validator.pdf_file.path
+
+        service = BatchValidationService()
+        for result in service.validate_many(sources()):
+            index, name, pdf_validator, document_hash = documents.pop(result["index"])
+            self.save_result(pdf_validator, document_hash, result)
+            yield self.get_result(index, name, result["error"], pdf_validator)
+            while finished:
+                yield finished.pop(0)
+        yield from finished
+
+    def enqueue(self, entries):
+        """Store the PDFs of the entries and queue their validation."""
+        for index, (name, file, error) in enumerate(entries):
+            if error is not None:
+                yield self.get_result(index, name, error)
+                continue
+            pdf_validator, document_hash = self.store(name, file)
+            job = enqueue_validation(pdf_validator, document_hash, verify_signers=False)
+            yield self.get_result(index, name, None, pdf_validator, job)
+
+    @staticmethod
+    def save_cached_result(
+        pdf_validator: PdfDocumentValidator, document_hash: str
+    ) -> bool:
+        """Save the cached result of an identical document, if there is one.
+
+        :returns
+            bool: True when the result was found in the cache
+        """
+        validator = PdfSignatureValidator(pdf_validator.pdf_file.path)
+        with validator.timings.stage("cache_lookup"):
+            result = validation_result_cache.get(document_hash)
+        if result is None:
+            return False
+        validator.load_result(result)
+        service = DocumentValidationService(pdf_validator)
+        service.save_signatures(service.set_result(validator))
+        return True
+
+    @staticmethod
+    def save_result(
+        pdf_validator: PdfDocumentValidator, document_hash: str, result: dict
+    ):
+        """Save the flags and signatures validated by the process pool.
+
+        Successful results are cached for identical documents, a failed
+        validation only saves its timings and is counted as an error.
+        """
+        validator = PdfSignatureValidator(pdf_validator.pdf_file.path)
+        validator.timings.load(result["timings"])
+        service = DocumentValidationService(pdf_validator)
+        if result["error"] is not None:
+            metrics.inc("documents_validated_total", outcome="error")
+            service.save_timings(validator)
+            return
+        validator.load_result(result)
+        validation_result_cache.set(document_hash, result)
+        service.save_signatures(service.set_result(validator))
+
+    @staticmethod
+    def get_result(index, name, error, pdf_validator=None, job=None) -> dict:
+        """Get the result of one entry of the upload."""
+        result = {"index": index, "name": name, "error": error}
+        if pdf_validator is not None:
+            result["document"] = pdf_validator
+        if job is not None:
+            result["job"] = job
+        return result
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
+
+# chunks are fed to every interested digest before moving on, a small chunk
+# stays in the CPU cache while it is hashed by several digests
+HASH_CHUNK_SIZE = 256 * 1024
+
+
+class ByteRangeHasher:
+    """Hash the byte ranges of all signatures of a document in a single pass.
+
+    Each incremental signature covers the document from byte 0 up to its own
+    revision, so the byte ranges share long prefixes. Instead of hashing the
+    document from the start for each signature, one running digest per
+    algorithm walks the file once and is forked with ``copy()`` at the end of
+    each first section. The fork then only hashes the short second section
+    that follows the signature contents.
+    """
+
+    def __init__(self, pdf_bytes):
+        """Initialize the hasher with the bytes (or memory map) of the PDF."""
+        self.pdf_bytes = pdf_bytes
+        self.byte_ranges = {}
+        self.bytes_hashed = 0
+
+    def add(self, key, byte_range, digest_algorithms):
+        """Register a byte range to be hashed with the given digest algorithms.
+
+        Algorithms unknown to ``hashlib`` are skipped, the signature using them
+        has no digest to compare with and is reported as invalid.
+        """
+        sections = (
+            self.clamp_section(byte_range[0], byte_range[1]),
+            self.clamp_section(byte_range[2], byte_range[3]),
+        )
+        self.byte_ranges[key] = (
+            sections,
+            set(digest_algorithms) & hashlib.algorithms_available,
+        )
+
+    def clamp_section(self, start, length) -> tuple[int, int]:
+        """Clamp a section to the file the same way slicing the bytes would."""
+        size = len(self.pdf_bytes)
+        start = min(max(start, 0), size)
+        return start, min(max(start + length, start), size)
+
+    def digests(self) -> dict:
+        """Hash all registered byte ranges and return their digests.
+
+        :returns
+            dict: ``{key: {digest_algorithm: digest}}``
+        """
+        prefix_ends = {}
+        forks = {}
+        tasks = []
+        for key, (sections, digest_algorithms) in self.byte_ranges.items():
+            first, second = sections
+            for digest_algorithm in digest_algorithms:
+                if first[0] == 0 and second[0] >= first[1]:
+                    # forked from the running prefix digest at the end of the
+                    # first section, only the second section is left to hash
+                    task = [key, digest_algorithm, None, [second]]
+                    forks.setdefault(first[1], []).append(task)
+                    prefix_ends[digest_algorithm] = max(
+                        prefix_ends.get(digest_algorithm, 0), first[1]
+                    )
+                else:
+                    task = [key, digest_algorithm, hashlib.new(digest_algorithm)]
+                    task.append([first, second])
+                tasks.append(task)
+
+        prefixes = {
+            digest_algorithm: hashlib.new(digest_algorithm)
+            for digest_algorithm in prefix_ends
+        }
+        boundaries = set(prefix_ends.values()) | set(forks)
+        for task in tasks:
+            for start, end in task[3]:
+                boundaries.update((start, end))
+        boundaries = sorted(boundaries | {0})
+
+        with memoryview(self.pdf_bytes) as view:
+            for start, end in zip(boundaries, boundaries[1:] + [None]):
+                for task in forks.get(start, []):
+                    task[2] = prefixes[task[1]].copy()
+                if end is None:
+                    break
+                digests = [
+                    prefixes[digest_algorithm]
+                    for digest_algorithm, prefix_end in prefix_ends.items()
+                    if start < prefix_end
+                ]
+                digests.extend(
+                    task[2]
+                    for task in tasks
+                    if any(s <= start and end <= e for s, e in task[3])
+                )
+                if digests:
+                    self.update(view, start, end, digests)
+
+        logger.info(
+            f"Hashed {self.bytes_hashed} bytes for "
+            f"{len(self.byte_ranges)} byte ranges"
+        )
+        results = {key: {} for key in self.byte_ranges}
+        for key, digest_algorithm, digest, _ in tasks:
+            results[key][digest_algorithm] = digest.digest()
+        return results
+
+    def update(self, view, start, end, digests):
+        """Feed the bytes between start and end to every digest chunk by chunk."""
+        for offset in range(start, end, HASH_CHUNK_SIZE):
+            with view[offset : min(offset + HASH_CHUNK_SIZE, end)] as chunk:  # noqa
+                for digest in digests:
+                    digest.update(chunk)
+        self.bytes_hashed += end - start
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import hashlib
+from collections import namedtuple
+
+from asn1crypto import x509
+from cryptography.hazmat.primitives import serialization
+from django.conf import settings
+
+from signature_validator.services.lru_cache import LRUCache
+from signature_validator.services.metrics import metrics
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
+
+CachedCertificate = namedtuple(
+    "CachedCertificate",
+    (
+        "fingerprint",
+        "certificate_der",
+        "public_key",
+        "public_key_der",
+        "public_key_pem",
+    ),
+)
+
+
+class CertificateCache(LRUCache):
+    """LRU cache of parsed certificates keyed by the SHA-256 of the certificate.
+
+    Documents are signed by a limited set of recurring certificates, the
+    verifier key and its DER and PEM encodings are built once per certificate
+    instead of once per signature.
+    """
+
+    def get_certificate(self, certificate_der: bytes) -> CachedCertificate:
+        """Get the parsed certificate, loading it on a cache miss."""
+        fingerprint = hashlib.sha256(certificate_der).hexdigest()
+        return self.get_or_set(
+            fingerprint, lambda: self.load_certificate(fingerprint, certificate_der)
+        )
+
+    @staticmethod
+    def load_certificate(fingerprint, certificate_der: bytes) -> CachedCertificate:
+        """Load the public key from the SubjectPublicKeyInfo of the certificate."""
+        certificate = x509.Certificate.load(certificate_der)
+        public_key_der = certificate.public_key.dump()
+        public_key = serialization.load_der_public_key(public_key_der)
+        public_key_pem = public_key.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode("utf-8")
+        return CachedCertificate(
+            fingerprint, certificate_der, public_key, public_key_der, public_key_pem
+        )
+
+    def warm_from_signers(self) -> int:
+        """Load the certificates uploaded by the active signers into the cache.
+
+        :returns
+            int: number of certificates loaded
+        """
+        # imported here, the accounts app depends on the validation services
+        from accounts.models import SignerUser
+        from accounts.services.pbs_extractor_service import PublicKeyExtractor
+
+        loaded = 0
+        signers = SignerUser.objects.filter(active=True).exclude(certificate="")
+        for signer in signers.iterator():
+            try:
+                with signer.certificate.open("rb") as certificate:
+                    extractor = PublicKeyExtractor(
+                        signer.certificate.name, certificate.read()
+                    )
+                certificate_der = extractor.get_certificate_der()
+                if certificate_der is not None:
+                    self.get_certificate(certificate_der)
+                    loaded += 1
+            except Exception as e:
+                logger.error(f"Error loading certificate of signer {signer.pk}: {e}")
+        logger.info(f"Loaded {loaded} signer certificates into the certificate cache")
+        return loaded
+
+
+certificate_cache = CertificateCache(settings.CERTIFICATE_CACHE_SIZE)
+metrics.register_cache("certificate", certificate_cache)
+
+
+def warm_certificate_cache_on_start():
+    """Warm the certificate cache when the worker starts, if it is enabled."""
+    if settings.CERTIFICATE_CACHE_WARM_ON_START:
+        certificate_cache.warm_from_signers()
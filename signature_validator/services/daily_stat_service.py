@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from signature_validator.cache import REPORT_NAMESPACE
+from signature_validator.models import DailyStat, PdfDocumentValidator
+from validator.cache import invalidate
+
+
+COUNTERS = (
+    "documents",
+    "signed_documents",
+    "verified_documents",
+    "users",
+    "active_users",
+    "signers",
+)
+# fields of the documents and users the counts of the rollup depend on
+DOCUMENT_FIELDS = frozenset(("created", "is_signed", "all_signers_verified"))
+USER_FIELDS = frozenset(("date_joined", "is_active", "user_type"))
+GRANULARITIES = ("day", "week", "month")
+
+
+def get_document_counts(pdf_validator: PdfDocumentValidator):
+    """Get the day and the counts a saved document adds to the rollup.
+
+    :returns
+        tuple: day and counts, None when the document is not saved yet
+    """
+    if pdf_validator.pk is None or pdf_validator.created is None:
+        return None
+    return timezone.localdate(pdf_validator.created), {
+        "documents": 1,
+        "signed_documents": int(pdf_validator.is_signed),
+        "verified_documents": int(pdf_validator.all_signers_verified),
+    }
+
+
+def get_user_counts(user: CustomUser):
+    """Get the day and the counts a saved user adds to the rollup.
+
+    :returns
+        tuple: day and counts, None when the user is not saved yet
+    """
+    if user.pk is None or user.date_joined is None:
+        return None
+    return timezone.localdate(user.date_joined), {
+        "users": 1,
+        "active_users": int(user.is_active),
+        "signers": int(user.user_type == CustomUser.UserType.signer),
+    }
+
+
+def get_period_start(day: date, granularity: str) -> date:
+    """Get the first day of the week or month of the day."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def get_periods(start: date, end: date, granularity: str) -> list:
+    """Get the first day of every period of the range, the latest first."""
+    periods = []
+    period = get_period_start(end, granularity)
+    first_period = get_period_start(start, granularity)
+    while period >= first_period:
+        periods.append(period)
+        if granularity == "month":
+            period = (period - timedelta(days=1)).replace(day=1)
+        else:
+            period -= timedelta(days=7 if granularity == "week" else 1)
+    return periods
+
+
+def format_period(period: date, granularity: str) -> str:
+    """Format the label of a period, its first day or its month."""
+    if granularity == "month":
+        return period.strftime("%Y-%m")
+    return period.isoformat()
+
+
+class DailyStatService:
+    """Service to update and read the daily rollup of the report."""
+
+    @staticmethod
+    def add(day: date, counts: dict):
+        """Add the counts to the row of the day, creating it if needed."""
+        updates = {name: F(name) + value for name, value in counts.items() if value}
+        if not updates:
+            return
+        if not DailyStat.objects.filter(date=day).update(**updates):
+            DailyStat.objects.bulk_create([DailyStat(date=day)], ignore_conflicts=True)
+            DailyStat.objects.filter(date=day).update(**updates)
+        invalidate(REPORT_NAMESPACE)
+
+    @classmethod
+    def apply_change(cls, old, new):
+        """Replace the old counts of a row by its new counts.
+
+        ``old`` and ``new`` are the ``(day, counts)`` of the row before and
+        after it changed, None when it did not exist.
+        """
+        deltas = defaultdict(lambda: defaultdict(int))
+        if old is not None:
+            for name, value in old[1].items():
+                deltas[old[0]][name] -= value
+        if new is not None:
+            for name, value in new[1].items():
+                deltas[new[0]][name] += value
+        for day, counts in deltas.items():
+            cls.add(day, counts)
+
+    @staticmethod
+    def count_days() -> dict:
+        """Count the documents and users of every day from their tables."""
+        days = defaultdict(dict)
+        documents = (
+            PdfDocumentValidator.objects.annotate(day=TruncDate("created"))
+            .values("day")
+            .annotate(
+                documents=Count("pk"),
+                signed_documents=Count("pk", filter=Q(is_signed=True)),
+                verified_documents=Count("pk", filter=Q(all_signers_verified=True)),
+            )
+            .order_by()
+        )
+        users = (
+            CustomUser.objects.annotate(day=TruncDate("date_joined"))
+            .values("day")
+            .annotate(
+                users=Count("pk"),
+                active_users=Count("pk", filter=Q(is_active=True)),
+                signers=Count("pk", filter=Q(user_type=CustomUser.UserType.signer)),
+            )
+            .order_by()
+        )
+        for row in [*documents, *users]:
+            days[row.pop("day")].update(row)
+        return days
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """Recount every day of the rollup from the documents and users.
+
+        Documents and users saved while the rollup is rebuilt may be missed,
+        run it when the app is idle.
+
+        :returns
+            int: number of days with documents or users
+        """
+        with transaction.atomic():
+            days = cls.count_days()
+            DailyStat.objects.all().delete()
+            DailyStat.objects.bulk_create(
+                DailyStat(date=day, **counts) for day, counts in sorted(days.items())
+            )
+            invalidate(REPORT_NAMESPACE)
+        return len(days)
+
+    @staticmethod
+    def get_totals() -> dict:
+        """Get the counts of all days."""
+        return DailyStat.objects.aggregate(
+            **{name: Coalesce(Sum(name), 0) for name in COUNTERS}
+        )
+
+    @staticmethod
+    def get_days(start: date, end: date) -> dict:
+        """Get the counts of the days of the range that have a row."""
+        return {
+            row.pop("date"): row
+            for row in DailyStat.objects.filter(date__range=(start, end)).values(
+                "date", *COUNTERS
+            )
+        }
+
+    @staticmethod
+    def get_series(
+        days: dict, start: date, end: date, granularity: str, name: str
+    ) -> tuple:
+        """Sum a counter of ``get_days()`` by period, the latest period first.
+
+        :returns
+            tuple: labels and counts of the periods
+        """
+        totals = defaultdict(int)
+        for day, counts in days.items():
+            if start <= day <= end:
+                totals[get_period_start(day, granularity)] += counts[name]
+        periods = get_periods(start, end, granularity)
+        return (
+            [format_period(period, granularity) for period in periods],
+            [totals[period] for period in periods],
+        )
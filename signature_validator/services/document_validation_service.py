@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+from asn1crypto import x509
+from django.conf import settings
+from django.db import transaction
+
+from accounts.models import CustomUser, SignerUser
+from accounts.services.pbs_validation_service import ValidatePublicKey
+from signature_validator.models import (
+    Certificate,
+    PdfDocumentValidator,
+    SignatureValidator,
+)
+from signature_validator.services.email_service import EmailService
+from signature_validator.services.metrics import metrics
+from signature_validator.services.pdf_validation_service import PdfSignatureValidator
+from signature_validator.services.validation_cache_service import (
+    validation_result_cache,
+)
+from validator.logger import module_logger
+from validator.middleware import add_validation_time
+
+
+logger = module_logger(__name__)
+
+# stages of the validation timings spent outside the validation engine
+PERSISTENCE_STAGES = ("persist",)
+# keys of the signature results saved in the Certificate table
+CERTIFICATE_KEYS = ("public_key", "certificate")
+
+
+class DocumentValidationService:
+    """Validate a stored PDF document and persist its signature results.
+
+    Used by the upload form and the API inside the request and by the
+    validation workers for queued jobs.
+    """
+
+    def __init__(
+        self,
+        pdf_validator: PdfDocumentValidator,
+        document_hash: str = None,
+        signup_url: str = None,
+    ):
+        """Initialize the service with the document and what the upload knew.
+
+        ``document_hash`` is the SHA-256 computed while the file was uploaded
+        and ``signup_url`` is the absolute URL sent in signer invitations.
+        """
+        self.pdf_validator = pdf_validator
+        self.document_hash = document_hash
+        self.signup_url = signup_url
+
+    def validate(self) -> PdfSignatureValidator:
+        """Validate the signatures of the document and set its flags."""
+        validator = validation_result_cache.validate(
+            self.pdf_validator.pdf_file.path, self.document_hash
+        )
+        return self.set_result(validator)
+
+    def get_validator(self) -> PdfSignatureValidator:
+        """Get a validator of the stored document."""
+        return PdfSignatureValidator(
+            self.pdf_validator.pdf_file.path, **settings.PDF_VALIDATOR_OPTIONS
+        )
+
+    def iter_validate(self, validator: PdfSignatureValidator):
+        """Validate the document, yielding each signature result once verified.
+
+        The flags of the document are set when the generator is exhausted.
+        """
+        yield from validation_result_cache.iter_validate(validator, self.document_hash)
+        self.set_result(validator)
+
+    def set_result(self, validator: PdfSignatureValidator) -> PdfSignatureValidator:
+        """Set the flags of the document from a finished validation."""
+        self.pdf_validator.is_signed = validator.is_signed
+        self.pdf_validator.is_hashes_valid = validator.is_hashes_valid
+        self.pdf_validator.is_signatures_valid = validator.is_signatures_valid
+        if not validator.is_signed:
+            outcome = "unsigned"
+        elif validator.is_hashes_valid and validator.is_signatures_valid:
+            outcome = "valid"
+        else:
+            outcome = "invalid"
+        metrics.inc("documents_validated_total", outcome=outcome)
+        metrics.observe(
+            "signatures_per_document", len(validator.validated_data_list or [])
+        )
+        return validator
+
+    def save_signatures(self, validator: PdfSignatureValidator) -> PdfDocumentValidator:
+        """Save the results of every signature as they were validated."""
+        pdf_validator = self.pdf_validator
+        with transaction.atomic():
+            with validator.timings.stage("persist"):
+                validated_data_list = validator.validated_data_list or []
+                certificates = self.get_certificates(validated_data_list)
+                SignatureValidator.objects.bulk_create(
+                    map(
+                        self.get_signature_validator,
+                        validated_data_list,
+                        certificates,
+                    )
+                )
+            self.save_timings(validator)
+        return pdf_validator
+
+    def save_verified_signatures(
+        self, validator: PdfSignatureValidator
+    ) -> PdfDocumentValidator:
+        """Save the signatures, verify their signers and invite unknown signers.
+
+        The signers of all signatures are looked up at once and the rows are
+        created in bulk, the number of queries does not grow with the number
+        of signatures. Invitations are sent once the results are committed.
+        """
+        pdf_validator = self.pdf_validator
+        emails_to_be_sent = []
+        distinct_people_signed = set()
+        signed_data_list = []
+
+        with transaction.atomic():
+            with validator.timings.stage("persist"):
+                if self.is_validated_data_available(validator):
+                    for index, validated_data in enumerate(
+                        validator.validated_data_list, start=1
+                    ):
+                        validated_data["signature_name"] = f"Signature {index}"
+                        distinct_people_signed.add(validated_data["serial_number"])
+                        if "public_key" in validated_data:
+                            signed_data_list.append(validated_data)
+                signature_validators = list(
+                    map(
+                        self.get_signature_validator,
+                        signed_data_list,
+                        self.get_certificates(signed_data_list),
+                    )
+                )
+                registered_emails, signers = self.get_signers(signature_validators)
+                for signature_validator in signature_validators:
+                    self.set_signer_verification(
+                        emails_to_be_sent,
+                        signature_validator,
+                        registered_emails,
+                        signers,
+                    )
+                SignatureValidator.objects.bulk_create(signature_validators)
+            pdf_validator.all_signers_verified = self.is_all_signers_verified(
+                signature_validators
+            )
+            pdf_validator.distinct_people_signed = len(distinct_people_signed)
+            self.save_timings(validator)
+            # a worker saves in the transaction finishing its job, nobody is
+            # invited by an attempt that is rolled back
+            transaction.on_commit(lambda: self.send_invite_emails(emails_to_be_sent))
+        return pdf_validator
+
+    def save_timings(self, validator: PdfSignatureValidator):
+        """Save the document with the time spent in each stage of its validation.
+
+        The final save is the only part of the persistence not in the timings.
+        """
+        self.pdf_validator.timings = validator.timings.as_dict()
+        self.pdf_validator.save()
+        for stage, milliseconds in self.pdf_validator.timings.items():
+            metrics.observe(
+                "validation_stage_seconds", milliseconds / 1000, stage=stage
+            )
+        metrics.observe(
+            "validation_seconds", sum(self.pdf_validator.timings.values()) / 1000
+        )
+        add_validation_time(
+            sum(
+                milliseconds
+                for stage, milliseconds in self.pdf_validator.timings.items()
+                if stage not in PERSISTENCE_STAGES
+            )
+            / 1000
+        )
+
+    @staticmethod
+    def is_validated_data_available(validator) -> bool:
+        """Check if validated data is available."""
+        return (
+            validator
+            and hasattr(validator, "validated_data_list")
+            and validator.validated_data_list
+        )
+
+    @staticmethod
+    def is_all_signers_verified(signature_validators: list) -> bool:
+        """Check if all signers of the saved signatures are verified."""
+        if not signature_validators:
+            return False
+        return all(
+            signature_validator.verified_signer
+            for signature_validator in signature_validators
+        )
+
+    def get_signature_validator(
+        self, validated_data: dict, certificate: Certificate
+    ) -> SignatureValidator:
+        """Get the unsaved row of a signature result and its certificate."""
+        return SignatureValidator(
+            pdf_document_validator=self.pdf_validator,
+            certificate=certificate,
+            **{
+                key: value
+                for key, value in validated_data.items()
+                if key not in CERTIFICATE_KEYS
+            },
+        )
+
+    @staticmethod
+    def get_certificates(validated_data_list: list) -> list:
+        """Get the certificate row of each signature, creating the missing rows.
+
+        Certificates are deduplicated by the fingerprint of their public key,
+        the number of queries does not grow with the number of signatures.
+
+        :returns
+            list: certificate of each signature, None without a public key
+        """
+        fingerprints = []
+        public_keys = {}
+        for validated_data in validated_data_list:
+            public_key_der = None
+            if validated_data.get("public_key"):
+                public_key_der = ValidatePublicKey(
+                    validated_data["public_key"]
+                ).get_der()
+            if public_key_der is None:
+                fingerprints.append(None)
+                continue
+            fingerprint = hashlib.sha256(public_key_der).hexdigest()
+            fingerprints.append(fingerprint)
+            public_keys.setdefault(
+                fingerprint, (public_key_der, validated_data.get("certificate"))
+            )
+        if not public_keys:
+            return fingerprints
+        certificates = Certificate.objects.in_bulk(
+            list(public_keys), field_name="fingerprint"
+        )
+        missing_certificates = [
+            DocumentValidationService.build_certificate(fingerprint, *public_key)
+            for fingerprint, public_key in public_keys.items()
+            if fingerprint not in certificates
+        ]
+        if missing_certificates:
+            Certificate.objects.bulk_create(missing_certificates, ignore_conflicts=True)
+            certificates = Certificate.objects.in_bulk(
+                list(public_keys), field_name="fingerprint"
+            )
+        return [certificates.get(fingerprint) for fingerprint in fingerprints]
+
+    @staticmethod
+    def build_certificate(
+        fingerprint: str, public_key_der: bytes, certificate_der: bytes = None
+    ) -> Certificate:
+        """Build the row of a certificate with its parsed subject and issuer."""
+        certificate = Certificate(
+            fingerprint=fingerprint,
+            public_key_der=public_key_der,
+            certificate_der=certificate_der,
+        )
+        if certificate_der is not None:
+            parsed_certificate = x509.Certificate.load(certificate_der)
+            certificate.subject = parsed_certificate.subject.human_friendly
+            certificate.issuer = parsed_certificate.issuer.human_friendly
+        return certificate
+
+    def send_invite_emails(self, emails_to_be_sent):
+        """Send invite emails to the signers."""
+        if emails_to_be_sent:
+            EmailService.send_invite_email(
+                emails_to_be_sent,
+                self.pdf_validator.pdf_file.path,
+                signup_url=self.signup_url,
+            )
+
+    @staticmethod
+    def get_signers(signature_validators: list) -> tuple[set, dict]:
+        """Look the signers of all signatures up with one query per table.
+
+        Signers are matched by the indexed fingerprint of their public key.
+
+        :returns
+            tuple: registered emails of the signers and their active signer
+            users keyed by the fingerprint of the public key
+        """
+        emails = {
+            signature_validator.email_of_signer
+            for signature_validator in signature_validators
+            if signature_validator.email_of_signer
+        }
+        fingerprints = {
+            signature_validator.certificate.fingerprint
+            for signature_validator in signature_validators
+            if signature_validator.certificate
+        }
+        registered_emails = set()
+        signers = {}
+        if emails:
+            registered_emails = set(
+                CustomUser.objects.filter(email__in=emails).values_list(
+                    "email", flat=True
+                )
+            )
+        if registered_emails and fingerprints:
+            for signer in SignerUser.objects.filter(
+                public_key_fingerprint__in=fingerprints, active=True
+            ).order_by("pk"):
+                signers.setdefault(signer.public_key_fingerprint, signer)
+        return registered_emails, signers
+
+    @staticmethod
+    def set_signer_verification(
+        emails_to_be_sent: list,
+        signature_validator: SignatureValidator,
+        registered_emails: set,
+        signers: dict,
+    ):
+        """Check if the signer exists in the system and set proper messages."""
+        signer = None
+        if signature_validator.certificate:
+            signer = signers.get(signature_validator.certificate.fingerprint)
+        if signature_validator.email_of_signer in registered_emails and signer:
+            signature_validator.verified_signer = True
+            signature_validator.signer_user = signer
+        else:
+            DocumentValidationService.set_messages(
+                emails_to_be_sent, signature_validator
+            )
+
+    @staticmethod
+    def set_messages(emails_to_be_sent, signature_validator):
+        """Set messages for the signature."""
+        if signature_validator.email_of_signer:
+            if signature_validator.email_of_signer not in emails_to_be_sent:
+                emails_to_be_sent.append(signature_validator.email_of_signer)
+            signature_validator.message = (
+                f"{signature_validator.email_of_signer} is not registered in the "
+                f"system, we have already sent an invitation email, please contact "
+                f"signer to signup in the system."
+            )
+            logger.info("Sending signup invitation email to the signer.")
+        else:
+            signature_validator.message = (
+                f"{signature_validator.email_of_signer} is not provided in the "
+                f"signature, please contact signer to create a signature with email"
+                f" and personal details."
+            )
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
+import time
+
 from django.conf import settings
 from django.core.mail import EmailMessage
 from django.urls import reverse_lazy
 
+from signature_validator.services.metrics import metrics
 from validator.logger import module_logger
 from django.core.handlers.wsgi import WSGIRequest
 
@@ -16,8 +19,18 @@ class EmailService:
     FROM_EMAIL = settings.EMAIL_HOST_USER
 
     @staticmethod
-    def send_invite_email(emails: list, path: str, request: WSGIRequest) -> None:
-        """Send email using EmailMessage."""
+    def send_invite_email(
+        emails: list, path: str, request: WSGIRequest = None, signup_url: str = None
+    ) -> None:
+        """Send email using EmailMessage.
+
+        The sign-up link is ``signup_url`` when it is given, as it is for
+        documents validated outside the request, or built from the request.
+        """
+        if signup_url is None:
+            signup_url = request.build_absolute_uri(reverse_lazy("accounts:signup"))
+        start = time.perf_counter()
+        outcome = "sent"
         try:
             subject = "Invitation to PDf Validator"
             message = f"""
@@ -28,7 +41,7 @@ We hope this message finds you well.
 You have recently digitally signed a document, and we would like to invite you to PDf Validator to
 confirm your identity and access the platform securely. And the document you signed is attached to
 this email as well. To complete the sign-up process, please click on the following link:
-{request.build_absolute_uri(reverse_lazy('accounts:signup'))}
+{signup_url}
 
 PDf Validator is a platform designed to ensure the integrity and authenticity of PDF documents,
 providing a secure environment for document validation and verification.
@@ -55,4 +68,8 @@ PDf Validator Team """
                 email.attach(file.name, file.read(), "application/pdf")
             email.send()
         except Exception as e:
+            outcome = "failed"
             logger.error(f"Error creating EmailMessage {e}")
+        metrics.observe(
+            "email_send_seconds", time.perf_counter() - start, outcome=outcome
+        )
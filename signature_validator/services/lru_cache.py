@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe bounded least recently used cache with hit and miss counters."""
+
+    def __init__(self, maxsize: int):
+        """Initialize the cache with the maximum number of entries."""
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """Get the value of the key and mark it as recently used."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Set the value of the key, evicting the least recently used entries."""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def get_or_set(self, key, factory):
+        """Get the value of the key or set it from ``factory()`` on a miss.
+
+        The factory is called without holding the lock, concurrent misses of
+        the same key may both call it and the last value wins.
+        """
+        value = self.get(key, self)
+        if value is self:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        """Remove the key from the cache if it is present."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Get the counters of the cache."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+import atexit
+import bisect
+import fcntl
+import json
+import math
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
+
+PREFIX = "signature_validator_"
+# values of the processes that exited, and the lock of moving files into it
+ARCHIVE_FILE = "archive.json"
+ARCHIVE_LOCK_FILE = "archive.lock"
+
+SECONDS_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)
+SIGNATURES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+# type, help and histogram buckets of every metric updated by the app
+METRICS = {
+    "validation_stage_seconds": (
+        "histogram",
+        "Time spent in each stage of the validation of a document.",
+        SECONDS_BUCKETS,
+    ),
+    "validation_seconds": (
+        "histogram",
+        "Time spent in all stages of the validation of a document.",
+        SECONDS_BUCKETS,
+    ),
+    "signatures_per_document": (
+        "histogram",
+        "Signatures found in each validated document.",
+        SIGNATURES_BUCKETS,
+    ),
+    "documents_validated_total": (
+        "counter",
+        "Validated documents by outcome, valid, invalid, unsigned or error.",
+        None,
+    ),
+    "bytes_hashed_total": ("counter", "Bytes of signed byte ranges hashed.", None),
+    "email_send_seconds": (
+        "histogram",
+        "Time spent sending invitation emails by outcome, sent or failed.",
+        SECONDS_BUCKETS,
+    ),
+    "cache_hits_total": ("counter", "Cache lookups that found the entry.", None),
+    "cache_misses_total": ("counter", "Cache lookups that missed the entry.", None),
+}
+
+
+class MetricsRegistry:
+    """Counters and histograms of one process, aggregated across processes.
+
+    Updates only touch a dictionary of the process under a lock, so they are
+    cheap enough for the hot path. A background thread of the process writes
+    the values every ``flush_interval`` seconds to a file of its own in
+    ``directory``, named by host, pid and a token of the process, so a
+    reused pid never overwrites the file of a dead process. A scrape sums
+    the files of all processes, the web workers, the validation workers and
+    the batch validation pool, with the live values of the scraping process.
+
+    Counters of processes that exited are kept in an archive file. A process
+    moves its values there on exit with ``mark_process_dead()``, the files
+    of processes of the host that died without it are moved by the scrape.
+    """
+
+    def __init__(self, directory: str, flush_interval: float):
+        """Initialize the registry writing its values to ``directory``."""
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.caches = {}
+        self.host = socket.gethostname()
+        self.start_process()
+
+    def start_process(self):
+        """Start empty values of the current process, e.g. after a fork."""
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.pid = os.getpid()
+        self.token = uuid.uuid4().hex[:12]
+        self.flusher = None
+        self.dead = False
+
+    @property
+    def path(self) -> str:
+        """Get the path of the file of this process."""
+        return os.path.join(self.directory, f"{self.host}-{self.pid}-{self.token}.json")
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Increment a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+        self.start_flusher()
+
+    def observe(self, name: str, value: float, **labels):
+        """Observe a value in a histogram."""
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # a count per bucket, the last one is +Inf, and the sum
+                histogram = self.histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+            histogram[0][bisect.bisect_left(buckets, value)] += 1
+            histogram[1] += value
+        self.start_flusher()
+
+    def register_cache(self, name: str, cache):
+        """Report the hits and misses of an ``LRUCache`` of the process."""
+        self.caches[name] = cache
+
+    def snapshot(self) -> dict:
+        """Get the values of the process in the format of its file."""
+        with self.lock:
+            counters = [
+                [name, dict(labels), value]
+                for (name, labels), value in self.counters.items()
+            ]
+            histograms = [
+                [name, dict(labels), list(counts), total]
+                for (name, labels), (counts, total) in self.histograms.items()
+            ]
+        for cache_name, cache in self.caches.items():
+            counters.append(["cache_hits_total", {"cache": cache_name}, cache.hits])
+            counters.append(["cache_misses_total", {"cache": cache_name}, cache.misses])
+        return {"counters": counters, "histograms": histograms}
+
+    def start_flusher(self):
+        """Start the thread writing the values of the process, once per process."""
+        if self.flusher is not None:
+            return
+        with self.lock:
+            if self.flusher is not None:
+                return
+            self.flusher = threading.Thread(
+                target=self.run_flusher, name="metrics-flusher", daemon=True
+            )
+        self.flusher.start()
+
+    def run_flusher(self):
+        """Write the values of the process every ``flush_interval`` seconds."""
+        flusher = self.flusher
+        while self.flusher is flusher and not self.dead:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write the values of the process to its file, replacing it atomically."""
+        if self.dead:
+            return
+        try:
+            write_snapshot(self.directory, self.path, self.snapshot())
+        except OSError as e:
+            logger.error(f"Error writing metrics to {self.directory}: {e}")
+
+    @contextmanager
+    def archive_lock(self, operation: int):
+        """Lock the archive, shared to read the files or exclusive to move them."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ARCHIVE_LOCK_FILE), "a") as file:
+            fcntl.flock(file, operation)
+            yield
+
+    def archive(self, file_names: list, snapshots: list):
+        """Add the snapshots to the archive and remove the files they were in.
+
+        Must be called with the exclusive archive lock.
+        """
+        archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+        try:
+            with open(archive_path) as file:
+                snapshots = [json.load(file), *snapshots]
+        except FileNotFoundError:
+            pass
+        write_snapshot(
+            self.directory, archive_path, to_snapshot(*sum_snapshots(snapshots))
+        )
+        for file_name in file_names:
+            try:
+                os.remove(os.path.join(self.directory, file_name))
+            except FileNotFoundError:
+                pass
+
+    def mark_process_dead(self):
+        """Move the values of the exiting process to the archive."""
+        if self.dead or self.pid != os.getpid():
+            return
+        self.dead = True
+        snapshot = self.snapshot()
+        if not snapshot["histograms"] and not any(
+            value for _, _, value in snapshot["counters"]
+        ):
+            return
+        try:
+            with self.archive_lock(fcntl.LOCK_EX):
+                self.archive([os.path.basename(self.path)], [snapshot])
+        except (OSError, ValueError) as e:
+            logger.error(f"Error archiving metrics to {self.directory}: {e}")
+
+    def archive_dead_processes(self):
+        """Move the files of processes of this host that died without archiving."""
+        try:
+            file_names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        dead_file_names = []
+        for file_name in file_names:
+            parts = file_name[: -len(".json")].rsplit("-", 2)
+            if not file_name.endswith(".json") or len(parts) != 3:
+                continue
+            host, pid, _ = parts
+            if host == self.host and pid.isdigit() and not is_process_alive(int(pid)):
+                dead_file_names.append(file_name)
+        if not dead_file_names:
+            return
+        with self.archive_lock(fcntl.LOCK_EX):
+            snapshots = []
+            for file_name in dead_file_names:
+                try:
+                    snapshots.append(read_snapshot(self.directory, file_name))
+                except FileNotFoundError:
+                    continue
+            self.archive(dead_file_names, snapshots)
+
+    def collect(self) -> tuple[dict, dict]:
+        """Sum the values of all processes and of the archive.
+
+        :returns
+            tuple: counters and histograms keyed by name and labels
+        """
+        try:
+            self.archive_dead_processes()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Error archiving dead processes: {e}")
+        snapshots = [self.snapshot()]
+        own_file = os.path.basename(self.path)
+        with self.archive_lock(fcntl.LOCK_SH):
+            for file_name in os.listdir(self.directory):
+                if not file_name.endswith(".json") or file_name == own_file:
+                    continue
+                try:
+                    snapshots.append(read_snapshot(self.directory, file_name))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping metrics file {file_name}: {e}")
+        return sum_snapshots(snapshots)
+
+    def render(self, gauges=None) -> str:
+        """Render the metrics of all processes in the Prometheus text format.
+
+        ``gauges`` are ``{name: (help, {labels: value})}`` measured at scrape.
+        """
+        counters, histograms = self.collect()
+        lines = []
+        for name, (metric_type, help_text, buckets) in METRICS.items():
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} {metric_type}")
+            if metric_type == "counter":
+                for (key_name, labels), value in sorted(counters.items()):
+                    if key_name == name:
+                        lines.append(format_sample(name, labels, value))
+                continue
+            for (key_name, labels), (counts, total) in sorted(histograms.items()):
+                if key_name != name:
+                    continue
+                cumulative = 0
+                for bucket, count in zip([*buckets, math.inf], counts):
+                    cumulative += count
+                    bucket_labels = (*labels, ("le", format_value(bucket)))
+                    lines.append(
+                        format_sample(f"{name}_bucket", bucket_labels, cumulative)
+                    )
+                lines.append(format_sample(f"{name}_sum", labels, total))
+                lines.append(format_sample(f"{name}_count", labels, cumulative))
+
+        gauges = dict(gauges or {})
+        gauges["cache_hit_ratio"] = (
+            "Hits of all lookups of each cache.",
+            get_hit_ratios(counters),
+        )
+        for name, (help_text, samples) in gauges.items():
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            for labels, value in sorted(samples.items()):
+                lines.append(format_sample(name, labels, value))
+        return "\n".join(lines) + "\n"
+
+
+def is_process_alive(pid: int) -> bool:
+    """Check if a process of this host is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_snapshot(directory: str, file_name: str) -> dict:
+    """Read the values of a process or of the archive."""
+    with open(os.path.join(directory, file_name)) as file:
+        return json.load(file)
+
+
+def write_snapshot(directory: str, path: str, snapshot: dict):
+    """Write the values of a process or of the archive, replacing them atomically."""
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=directory, suffix=".tmp", delete=False
+    ) as file:
+        json.dump(snapshot, file)
+    os.replace(file.name, path)
+
+
+def sum_snapshots(snapshots: list) -> tuple[dict, dict]:
+    """Sum the counters and histograms of snapshots.
+
+    :returns
+        tuple: counters and histograms keyed by name and labels
+    """
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(sorted(labels.items())))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts, total in snapshot["histograms"]:
+            key = (name, tuple(sorted(labels.items())))
+            if key not in histograms:
+                histograms[key] = [[0] * len(counts), 0.0]
+            histograms[key][0] = [a + b for a, b in zip(histograms[key][0], counts)]
+            histograms[key][1] += total
+    return counters, histograms
+
+
+def to_snapshot(counters: dict, histograms: dict) -> dict:
+    """Get summed counters and histograms in the format of a file."""
+    return {
+        "counters": [
+            [name, dict(labels), value] for (name, labels), value in counters.items()
+        ],
+        "histograms": [
+            [name, dict(labels), counts, total]
+            for (name, labels), (counts, total) in histograms.items()
+        ],
+    }
+
+
+def get_hit_ratios(counters: dict) -> dict:
+    """Get the hit ratio of every cache with lookups."""
+    ratios = {}
+    for (name, labels), hits in counters.items():
+        if name != "cache_hits_total":
+            continue
+        lookups = hits + counters.get(("cache_misses_total", labels), 0)
+        if lookups:
+            ratios[labels] = hits / lookups
+    return ratios
+
+
+def format_value(value) -> str:
+    """Format a sample value or bucket bound."""
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def format_sample(name: str, labels, value) -> str:
+    """Format one sample line with its escaped labels."""
+    text = PREFIX + name
+    if labels:
+        pairs = ",".join(
+            f'{label}="{escape_label(str(label_value))}"'
+            for label, label_value in labels
+        )
+        text += "{" + pairs + "}"
+    return f"{text} {format_value(value)}"
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value of the text format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+metrics = MetricsRegistry(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+# a forked process counts from zero in a file of its own
+os.register_at_fork(after_in_child=metrics.start_process)
+atexit.register(metrics.mark_process_dead)
@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+import binascii
+import re
+import zlib
+from collections import namedtuple
+
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
+
+Reference = namedtuple("Reference", ("number", "generation"))
+
+DELIMITERS = rb"()<>\[\]{}/%"
+WHITESPACE = rb"\x00\t\n\x0c\r "
+SKIP_RE = re.compile(rb"(?:[" + WHITESPACE + rb"]+|%[^\r\n]*)*")
+NAME_RE = re.compile(rb"/[^" + WHITESPACE + DELIMITERS + rb"]*")
+NAME_ESCAPE_RE = re.compile(rb"#([0-9A-Fa-f]{2})")
+REFERENCE_RE = re.compile(
+    rb"(\d+)[" + WHITESPACE + rb"]+(\d+)[" + WHITESPACE + rb"]+R"
+    rb"(?![^" + WHITESPACE + DELIMITERS + rb"])"
+)
+NUMBER_RE = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+KEYWORD_RE = re.compile(rb"[A-Za-z]+")
+OBJECT_HEADER_RE = re.compile(
+    rb"(\d+)[" + WHITESPACE + rb"]+(\d+)[" + WHITESPACE + rb"]+obj"
+)
+XREF_SUBSECTION_RE = re.compile(rb"(\d+)[ \t]+(\d+)[ \t]*\r?\n?")
+XREF_ENTRY_RE = re.compile(rb"(\d{10})[ \t](\d{5})[ \t]([nf])")
+KEYWORDS = {b"true": True, b"false": False, b"null": None}
+STRING_ESCAPES = {
+    ord("n"): b"\n",
+    ord("r"): b"\r",
+    ord("t"): b"\t",
+    ord("b"): b"\b",
+    ord("f"): b"\f",
+    ord("("): b"(",
+    ord(")"): b")",
+    ord("\\"): b"\\",
+}
+# the cross-reference section is looked up from the end of the file
+STARTXREF_WINDOW = 2048
+
+
+class PdfScanError(Exception):
+    """Raised when the PDF cannot be scanned, pypdf should be used instead."""
+
+
+class PdfObjectParser:
+    """Parse PDF objects from a buffer, the mapped file or a decoded stream."""
+
+    def __init__(self, buffer):
+        """Initialize the parser with the buffer to parse from."""
+        self.buffer = buffer
+
+    def skip(self, pos) -> int:
+        """Skip whitespace and comments."""
+        return SKIP_RE.match(self.buffer, pos).end()
+
+    def parse(self, pos) -> tuple:
+        """Parse the object at the position.
+
+        :returns
+            tuple: parsed object and the position after it
+        """
+        buffer = self.buffer
+        pos = self.skip(pos)
+        char = buffer[pos : pos + 1]  # noqa
+        if char == b"<":
+            if buffer[pos + 1 : pos + 2] == b"<":  # noqa
+                return self.parse_dictionary(pos + 2)
+            return self.parse_hex_string(pos)
+        if char == b"[":
+            return self.parse_array(pos + 1)
+        if char == b"(":
+            return self.parse_literal_string(pos + 1)
+        if char == b"/":
+            match = NAME_RE.match(buffer, pos)
+            return self.decode_name(match.group()), match.end()
+        match = REFERENCE_RE.match(buffer, pos)
+        if match:
+            return Reference(int(match.group(1)), int(match.group(2))), match.end()
+        match = NUMBER_RE.match(buffer, pos)
+        if match:
+            number = match.group()
+            if b"." in number:
+                return float(number), match.end()
+            return int(number), match.end()
+        match = KEYWORD_RE.match(buffer, pos)
+        if match and match.group() in KEYWORDS:
+            return KEYWORDS[match.group()], match.end()
+        raise PdfScanError(f"Unexpected token at {pos}")
+
+    def parse_dictionary(self, pos) -> tuple:
+        """Parse a dictionary, the position is after the opening ``<<``."""
+        dictionary = {}
+        while True:
+            pos = self.skip(pos)
+            if self.buffer[pos : pos + 2] == b">>":  # noqa
+                return dictionary, pos + 2
+            match = NAME_RE.match(self.buffer, pos)
+            if not match:
+                raise PdfScanError(f"Expected a dictionary key at {pos}")
+            value, pos = self.parse(match.end())
+            dictionary[self.decode_name(match.group())] = value
+
+    def parse_array(self, pos) -> tuple:
+        """Parse an array, the position is after the opening ``[``."""
+        array = []
+        while True:
+            pos = self.skip(pos)
+            if self.buffer[pos : pos + 1] == b"]":  # noqa
+                return array, pos + 1
+            value, pos = self.parse(pos)
+            array.append(value)
+
+    def parse_hex_string(self, pos) -> tuple:
+        """Decode a hex string sliced straight from the buffer."""
+        end = self.buffer.find(b">", pos)
+        if end == -1:
+            raise PdfScanError(f"Unterminated hex string at {pos}")
+        hex_digits = bytes(self.buffer[pos + 1 : end])  # noqa
+        if len(hex_digits) % 2 or not hex_digits.isalnum():
+            hex_digits = re.sub(rb"[" + WHITESPACE + rb"]", b"", hex_digits)
+            if len(hex_digits) % 2:
+                hex_digits += b"0"
+        try:
+            return binascii.unhexlify(hex_digits), end + 1
+        except binascii.Error as error:
+            raise PdfScanError(f"Invalid hex string at {pos}") from error
+
+    def parse_literal_string(self, pos) -> tuple:
+        """Parse a literal string, the position is after the opening ``(``."""
+        buffer = self.buffer
+        result = bytearray()
+        depth = 1
+        while pos < len(buffer):
+            char = buffer[pos]
+            pos += 1
+            if char == 0x5C:  # backslash
+                escaped = buffer[pos]
+                pos += 1
+                if escaped in STRING_ESCAPES:
+                    result += STRING_ESCAPES[escaped]
+                elif 0x30 <= escaped <= 0x37:
+                    digits = bytes([escaped])
+                    while len(digits) < 3 and 0x30 <= buffer[pos] <= 0x37:
+                        digits += bytes([buffer[pos]])
+                        pos += 1
+                    result.append(int(digits, 8) & 0xFF)
+                elif escaped == 0x0D:
+                    # escaped end of line continues the string
+                    if buffer[pos] == 0x0A:
+                        pos += 1
+                elif escaped != 0x0A:
+                    result.append(escaped)
+                continue
+            if char == 0x28:
+                depth += 1
+            elif char == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return bytes(result), pos
+            result.append(char)
+        raise PdfScanError("Unterminated literal string")
+
+    @staticmethod
+    def decode_name(name: bytes) -> str:
+        """Decode a name keeping the leading slash like pypdf does."""
+        if b"#" in name:
+            name = NAME_ESCAPE_RE.sub(lambda match: bytes([int(match[1], 16)]), name)
+        return name.decode("utf-8", errors="replace")
+
+    @staticmethod
+    def decode_text(value) -> str:
+        """Decode a text string, UTF-16 with a byte order mark or PDFDocEncoding."""
+        if isinstance(value, str):
+            return value
+        if value.startswith(b"\xfe\xff"):
+            return value[2:].decode("utf-16-be", errors="replace")
+        return value.decode("latin-1")
+
+
+class PdfSignatureScanner:
+    """Find the signature fields of a PDF without parsing the whole document.
+
+    Only the objects on the path trailer -> Root -> AcroForm -> signature
+    fields are resolved. The ``/Contents`` hex strings are sliced straight from
+    the buffer, which may be a memory map of the file. Anything unsupported
+    raises ``PdfScanError`` so that the caller can fall back to pypdf.
+    """
+
+    def __init__(self, pdf_bytes):
+        """Initialize the scanner with the bytes (or memory map) of the PDF."""
+        self.parser = PdfObjectParser(pdf_bytes)
+        self.xref = {}
+        self.trailer = {}
+        self.object_streams = {}
+
+    def get_fields(self):
+        """Get the signature fields in the same shape as ``PdfReader.get_fields``.
+
+        :returns
+            dict: ``{field_name: {"/V": signature_dictionary}}`` or ``None``
+                when the document has no form fields
+        """
+        try:
+            self.read_xref()
+            root = self.resolve(self.trailer.get("/Root"))
+            acroform = self.resolve(root.get("/AcroForm")) if root else None
+            if not acroform or "/Fields" not in acroform:
+                return None
+            fields = {}
+            for field in self.resolve(acroform["/Fields"]) or []:
+                self.collect_signature_fields(field, None, {}, fields, set())
+            return fields
+        except PdfScanError:
+            raise
+        except (
+            ValueError,
+            KeyError,
+            IndexError,
+            TypeError,
+            AttributeError,
+            RecursionError,
+            zlib.error,
+        ) as error:
+            raise PdfScanError(f"Cannot scan the PDF: {error!r}") from error
+
+    def collect_signature_fields(self, field_ref, parent_name, inherited, fields, seen):
+        """Collect signature fields of the field and its kids, depth first."""
+        if isinstance(field_ref, Reference):
+            if field_ref in seen:
+                return
+            seen.add(field_ref)
+        field = self.resolve(field_ref)
+        if not isinstance(field, dict):
+            return
+        name = parent_name
+        if "/T" in field:
+            partial_name = PdfObjectParser.decode_text(self.resolve(field["/T"]))
+            name = f"{parent_name}.{partial_name}" if parent_name else partial_name
+        inherited = {key: field.get(key, inherited.get(key)) for key in ("/FT", "/V")}
+        kids = self.resolve(field.get("/Kids")) or []
+        child_fields = [kid for kid in kids if "/T" in (self.resolve(kid) or {})]
+        if child_fields:
+            for kid in child_fields:
+                self.collect_signature_fields(kid, name, inherited, fields, seen)
+            return
+        value = self.resolve(inherited["/V"])
+        if inherited["/FT"] != "/Sig" or not isinstance(value, dict):
+            return
+        signature = {}
+        if "/M" in value:
+            signature["/M"] = PdfObjectParser.decode_text(self.resolve(value["/M"]))
+        if "/ByteRange" in value:
+            signature["/ByteRange"] = [
+                self.resolve(offset) for offset in self.resolve(value["/ByteRange"])
+            ]
+        if "/Contents" in value:
+            signature["/Contents"] = self.resolve(value["/Contents"])
+        fields[name] = {"/V": signature}
+
+    def read_xref(self):
+        """Read the cross-reference sections from the newest to the oldest."""
+        buffer = self.parser.buffer
+        start = buffer.rfind(b"startxref", max(0, len(buffer) - STARTXREF_WINDOW))
+        if start == -1:
+            raise PdfScanError("startxref not found")
+        offset, _ = self.parser.parse(start + len(b"startxref"))
+        visited = set()
+        while isinstance(offset, int) and offset not in visited:
+            visited.add(offset)
+            pos = self.parser.skip(offset)
+            if buffer[pos : pos + 4] == b"xref":  # noqa
+                trailer = self.read_xref_table(pos + 4)
+                if isinstance(trailer.get("/XRefStm"), int):
+                    self.read_xref_stream(trailer["/XRefStm"])
+            else:
+                trailer = self.read_xref_stream(pos)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            offset = trailer.get("/Prev")
+
+    def read_xref_table(self, pos) -> dict:
+        """Read a classic cross-reference table and return its trailer."""
+        buffer = self.parser.buffer
+        while True:
+            pos = self.parser.skip(pos)
+            if buffer[pos : pos + 7] == b"trailer":  # noqa
+                trailer, _ = self.parser.parse(pos + 7)
+                return trailer
+            match = XREF_SUBSECTION_RE.match(buffer, pos)
+            if not match:
+                raise PdfScanError(f"Broken xref table at {pos}")
+            first, count = int(match.group(1)), int(match.group(2))
+            pos = match.end()
+            for number in range(first, first + count):
+                pos = self.parser.skip(pos)
+                entry = XREF_ENTRY_RE.match(buffer, pos)
+                if not entry:
+                    raise PdfScanError(f"Broken xref entry at {pos}")
+                pos = entry.end()
+                if entry.group(3) == b"n":
+                    self.xref.setdefault(number, (1, int(entry.group(1)), 0))
+                else:
+                    self.xref.setdefault(number, (0, 0, 0))
+
+    def read_xref_stream(self, pos) -> dict:
+        """Read a cross-reference stream and return its dictionary."""
+        dictionary, data = self.read_indirect_stream(pos)
+        if dictionary.get("/Type") != "/XRef":
+            raise PdfScanError(f"No xref stream at {pos}")
+        widths = dictionary["/W"]
+        index = dictionary.get("/Index", [0, dictionary["/Size"]])
+        entry_size = sum(widths)
+        entry = 0
+        for first, count in zip(index[0::2], index[1::2]):
+            for number in range(first, first + count):
+                fields = []
+                offset = entry * entry_size
+                for width in widths:
+                    field = data[offset : offset + width]  # noqa
+                    fields.append(int.from_bytes(field, "big"))
+                    offset += width
+                entry += 1
+                if widths[0] == 0:
+                    fields[0] = 1
+                self.xref.setdefault(number, tuple(fields))
+        return dictionary
+
+    def read_indirect_stream(self, pos) -> tuple:
+        """Read the stream object at the position, return its dictionary and data."""
+        match = OBJECT_HEADER_RE.match(self.parser.buffer, self.parser.skip(pos))
+        if not match:
+            raise PdfScanError(f"No object at {pos}")
+        return self.read_stream(self.parser, match.end())
+
+    def read_stream(self, parser, pos) -> tuple:
+        """Read and decode a stream whose dictionary starts at the position."""
+        dictionary, pos = parser.parse(pos)
+        pos = SKIP_RE.match(parser.buffer, pos).end()
+        if parser.buffer[pos : pos + 6] != b"stream":  # noqa
+            raise PdfScanError(f"Expected a stream at {pos}")
+        pos += 6
+        if parser.buffer[pos : pos + 2] == b"\r\n":  # noqa
+            pos += 2
+        elif parser.buffer[pos : pos + 1] in (b"\n", b"\r"):  # noqa
+            pos += 1
+        length = self.resolve(dictionary["/Length"])
+        data = bytes(parser.buffer[pos : pos + length])  # noqa
+        return dictionary, self.decode_stream(dictionary, data)
+
+    def decode_stream(self, dictionary, data) -> bytes:
+        """Decode a FlateDecode stream with an optional PNG predictor."""
+        filters = self.resolve(dictionary.get("/Filter"))
+        parameters = self.resolve(dictionary.get("/DecodeParms"))
+        if isinstance(filters, list):
+            if len(filters) > 1:
+                raise PdfScanError(f"Unsupported filters {filters}")
+            filters = filters[0] if filters else None
+            parameters = parameters[0] if isinstance(parameters, list) else parameters
+        if filters is None:
+            return data
+        if filters != "/FlateDecode":
+            raise PdfScanError(f"Unsupported filter {filters}")
+        data = zlib.decompress(data)
+        predictor = (parameters or {}).get("/Predictor", 1)
+        if predictor == 1:
+            return data
+        if predictor < 10 or (parameters or {}).get("/Colors", 1) != 1:
+            raise PdfScanError(f"Unsupported predictor {parameters}")
+        if parameters.get("/BitsPerComponent", 8) != 8:
+            raise PdfScanError(f"Unsupported predictor {parameters}")
+        return self.decode_png_predictor(data, parameters.get("/Columns", 1))
+
+    @staticmethod
+    def decode_png_predictor(data, columns) -> bytes:
+        """Undo the PNG row filters of a stream with one byte per pixel."""
+        result = bytearray()
+        previous = bytearray(columns)
+        for start in range(0, len(data), columns + 1):
+            row_filter = data[start]
+            row = bytearray(data[start + 1 : start + 1 + columns])  # noqa
+            for i in range(len(row)):
+                left = row[i - 1] if i else 0
+                up = previous[i]
+                if row_filter == 1:
+                    row[i] = (row[i] + left) & 0xFF
+                elif row_filter == 2:
+                    row[i] = (row[i] + up) & 0xFF
+                elif row_filter == 3:
+                    row[i] = (row[i] + (left + up) // 2) & 0xFF
+                elif row_filter == 4:
+                    up_left = previous[i - 1] if i else 0
+                    estimate = left + up - up_left
+                    distances = (
+                        abs(estimate - left),
+                        abs(estimate - up),
+                        abs(estimate - up_left),
+                    )
+                    paeth = (left, up, up_left)[distances.index(min(distances))]
+                    row[i] = (row[i] + paeth) & 0xFF
+                elif row_filter != 0:
+                    raise PdfScanError(f"Unsupported PNG filter {row_filter}")
+            result += row
+            previous = row
+        return bytes(result)
+
+    def resolve(self, value):
+        """Resolve an indirect reference, other values are returned as they are."""
+        if not isinstance(value, Reference):
+            return value
+        entry = self.xref.get(value.number)
+        if entry is None or entry[0] == 0:
+            return None
+        if entry[0] == 2:
+            return self.get_object_stream(entry[1])[entry[2]]
+        pos = self.parser.skip(entry[1])
+        match = OBJECT_HEADER_RE.match(self.parser.buffer, pos)
+        if not match or int(match.group(1)) != value.number:
+            raise PdfScanError(f"Broken xref entry for object {value.number}")
+        obj, _ = self.parser.parse(match.end())
+        return obj
+
+    def get_object_stream(self, number) -> "ObjectStream":
+        """Get the object stream, its objects are parsed when they are resolved."""
+        if number not in self.object_streams:
+            entry = self.xref.get(number)
+            if entry is None or entry[0] != 1:
+                raise PdfScanError(f"Object stream {number} not found")
+            dictionary, data = self.read_indirect_stream(entry[1])
+            self.object_streams[number] = ObjectStream(dictionary, data)
+        return self.object_streams[number]
+
+
+class ObjectStream:
+    """Objects of a compressed object stream, parsed on first access."""
+
+    def __init__(self, dictionary, data):
+        """Read the offsets of the objects from the header of the stream."""
+        self.parser = PdfObjectParser(data)
+        self.first = dictionary["/First"]
+        self.offsets = []
+        pos = 0
+        for _ in range(dictionary["/N"]):
+            _, pos = self.parser.parse(pos)
+            offset, pos = self.parser.parse(pos)
+            self.offsets.append(offset)
+        self.objects = {}
+
+    def __getitem__(self, index):
+        """Parse the object stored at the index of the stream."""
+        if index not in self.objects:
+            self.objects[index] = self.parser.parse(self.first + self.offsets[index])[0]
+        return self.objects[index]
@@ -1,33 +1,82 @@
 # -*- coding: utf-8 -*-
 import hashlib
+import io
+import mmap
+from concurrent.futures import ThreadPoolExecutor
 
 from asn1crypto import cms
 from cryptography.exceptions import InvalidSignature
-from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.asymmetric import rsa
 from dateutil.parser import parse
+from django.conf import settings
 from pypdf import PdfReader
 
+from signature_validator.services.byte_range_hasher import ByteRangeHasher
+from signature_validator.services.certificate_cache import certificate_cache
+from signature_validator.services.lru_cache import LRUCache
+from signature_validator.services.metrics import metrics
+from signature_validator.services.pdf_signature_scanner import (
+    PdfScanError,
+    PdfSignatureScanner,
+)
+from signature_validator.services.stage_timer import StageTimer
 from validator.logger import module_logger
 
 
 logger = module_logger(__name__)
 
+# verification results of single signatures keyed by the SHA-256 of the CMS
+# blob and the digests of the content it covers, see verify_signature()
+signature_result_cache = LRUCache(settings.SIGNATURE_RESULT_CACHE_SIZE)
+metrics.register_cache("signature_result", signature_result_cache)
+
 
 class PdfSignatureValidator:
     """Read from the file and validate the signature of the PDF file."""
 
-    def __init__(self, file_path):
-        """Initialize the class with the file path."""
+    def __init__(
+        self,
+        file_path,
+        use_mmap=False,
+        fast_scan=False,
+        max_workers=None,
+        pdf_data=None,
+    ):
+        """Initialize the class with the file path.
+
+        When ``use_mmap`` is set the file is memory-mapped instead of read into
+        memory and the byte ranges are hashed from ``memoryview`` windows, so
+        hashing does not copy the document. Only with ``fast_scan`` as well
+        does memory usage stay flat regardless of the file size, pypdf reads
+        the whole file into memory to find the signature fields otherwise.
+
+        When ``fast_scan`` is set the signature fields are found by following
+        only trailer -> Root -> AcroForm -> signature fields in the bytes that
+        are already read, pypdf is used when the scan fails.
+
+        When ``max_workers`` is more than one the signatures of the document
+        are verified on a thread pool of that size, the results are still in
+        the order of the fields. Hashing and RSA verification release the GIL.
+
+        When ``pdf_data`` is given the PDF is validated from those bytes and
+        the file path, which may be None, is not read.
+
+        The time spent in each stage of the validation is recorded in
+        ``timings``.
+        """
         self.file_path = file_path
+        self.pdf_data = pdf_data
+        self.use_mmap = use_mmap
+        self.fast_scan = fast_scan
+        self.max_workers = max_workers
         self.pdf_bytes = None
         self.is_signed = False
         self.is_hashes_valid = False
         self.is_signatures_valid = False
         self.validated_data_list = None
+        self.timings = StageTimer()
 
     def __dict__(self):
         """Return the dictionary of the class."""
@@ -39,41 +88,163 @@ class PdfSignatureValidator:
             "validated_data_list": self.validated_data_list,
         }
 
+    def load_result(self, result: dict):
+        """Load a result of a previous validation of the same document."""
+        self.is_signed = result["is_signed"]
+        self.is_hashes_valid = result["is_hashes_valid"]
+        self.is_signatures_valid = result["is_signatures_valid"]
+        self.validated_data_list = result["validated_data_list"]
+
+    @classmethod
+    def validate_many(cls, sources, **kwargs):
+        """Validate many PDF files or in-memory PDFs on a persistent process pool.
+
+        Results are yielded as they finish, see ``BatchValidationService``.
+        """
+        # imported here, the batch service builds validators in its workers
+        from signature_validator.services.batch_validation_service import (
+            BatchValidationService,
+        )
+
+        return BatchValidationService(**kwargs).validate_many(sources)
+
     def get_pdf_bytes(self):
         """Read the PDF file in binary and save bytes in a variable."""
-        with open(self.file_path, "rb") as file:
-            self.pdf_bytes = file.read()
+        if self.pdf_data is not None:
+            self.pdf_bytes = self.pdf_data
+            return
+        with self.timings.stage("read"), open(self.file_path, "rb") as file:
+            if self.use_mmap:
+                self.pdf_bytes = self.map_file(file)
+            else:
+                self.pdf_bytes = file.read()
 
     @staticmethod
-    def get_public_key_from_certification(
-        certification,
-    ) -> tuple[rsa.RSAPublicKey, str]:
-        """Get the public key from the certification using n and e."""
-        n = certification["tbs_certificate"]["subject_public_key_info"]["public_key"][
-            "modulus"
-        ]
-        e = certification["tbs_certificate"]["subject_public_key_info"]["public_key"][
-            "public_exponent"
-        ]
-        public_key = rsa.RSAPublicNumbers(e, n).public_key(default_backend())
-
-        pem_encoded_public_key = public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo,
-        )
-        return public_key, pem_encoded_public_key.decode("utf-8")
+    def map_file(file):
+        """Memory-map the file read only, falling back to reading empty files."""
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            return file.read()
+
+    def close_pdf_bytes(self):
+        """Release the memory map of the PDF file if the file was mapped."""
+        if isinstance(self.pdf_bytes, mmap.mmap):
+            self.pdf_bytes.close()
+            self.pdf_bytes = None
 
     def validate(self):
         """Parse the PDF file and validate the signature of the PDF file."""
         self.get_pdf_bytes()
-        reader = PdfReader(self.file_path)
-        fields = reader.get_fields()
+        try:
+            self.validate_signatures()
+        finally:
+            self.close_pdf_bytes()
+
+    def iter_validate(self):
+        """Validate the PDF file, yielding the result of each signature once verified.
+
+        The results of the whole document are set when the generator is
+        exhausted.
+        """
+        self.get_pdf_bytes()
+        try:
+            yield from self.iter_signatures()
+        finally:
+            self.close_pdf_bytes()
+
+    def validate_signatures(self):
+        """Validate every signature field found in the PDF file."""
+        for _ in self.iter_signatures():
+            pass
+
+    def iter_signatures(self):
+        """Verify every signature field found in the PDF file one by one."""
+        with self.timings.stage("parse"):
+            fields = self.get_fields()
         if fields is None:
             logger.warning("Signatures not Found")
             return
         else:
             self.is_signed = True
+        signatures = self.get_signatures(fields)
+        with self.timings.stage("hash"):
+            digests = self.hash_byte_ranges(signatures)
         validated_data_list = []
+        if self.max_workers and self.max_workers > 1 and len(signatures) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(signatures))
+            ) as executor:
+                for verified_data in executor.map(
+                    self.verify_signature, signatures, digests
+                ):
+                    validated_data_list.append(verified_data)
+                    yield verified_data
+        else:
+            for verified_data in map(self.verify_signature, signatures, digests):
+                validated_data_list.append(verified_data)
+                yield verified_data
+        self.validated_data_list = validated_data_list
+        self.check_validity_whole_document()
+
+    def verify_signature(self, signature: dict, digests: dict) -> dict:
+        """Verify one signature, an invalid signature is logged and not raised.
+
+        A countersigned document carries the unchanged CMS blobs of the earlier
+        signatures over the same content, so the results are cached by the
+        hash of the blob and the digests of the byte range. Only the new
+        signatures of a re-uploaded document are verified.
+        """
+        verified_data = {
+            "signature_name": signature["signature_name"],
+            "signing_time": signature["signing_time"],
+        }
+        cache_key = (signature["contents_hash"], tuple(sorted(digests.items())))
+        cached_data = None
+        if signature["contents_hash"] is not None:
+            cached_data = signature_result_cache.get(cache_key)
+        if cached_data is not None:
+            verified_data.update(cached_data)
+            return verified_data
+        try:
+            self.verify_parsed_signature(
+                signature["parsed_signature"], digests, verified_data
+            )
+        except Exception as error:
+            logger.info(error)
+            logger.info("Invalid Signature")
+            return verified_data
+        signature_result_cache.set(
+            cache_key,
+            {
+                key: value
+                for key, value in verified_data.items()
+                if key not in ("signature_name", "signing_time")
+            },
+        )
+        return verified_data
+
+    def get_fields(self):
+        """Get the form fields of the PDF file holding the signatures."""
+        if self.fast_scan:
+            try:
+                return PdfSignatureScanner(self.pdf_bytes).get_fields()
+            except PdfScanError as error:
+                logger.warning(f"Fast scan failed, falling back to pypdf: {error}")
+        if self.pdf_data is not None:
+            reader = PdfReader(io.BytesIO(self.pdf_data))
+        else:
+            reader = PdfReader(self.file_path)
+        return reader.get_fields()
+
+    def get_signatures(self, fields) -> list[dict]:
+        """Get the signature values and their parsed PKCS7 data from the fields.
+
+        A signature whose CMS data or digest algorithms cannot be decoded is
+        kept without its parsed data, it is reported as not verified.
+        """
+        signatures = []
         for k, v in fields.items():
             logger.info(f"\nProcessing Signature {k}")
             if "/V" not in v:
@@ -82,25 +253,44 @@ class PdfSignatureValidator:
             value = v["/V"]
             signing_time = parse(value["/M"][2:].strip("'").replace("'", ":"))
             logger.info(f"Signing time: {signing_time}")
-            br = value["/ByteRange"]
-            logger.info(len(self.pdf_bytes))
-            signature_data_in_bytes = value["/Contents"]
-            orginal_data_before_signatures = self.extract_orginal_data_from_byte_range(
-                br
-            )
-            verified_data = {"signature_name": k, "signing_time": signing_time}
             try:
-                self.verify_hash_and_integrity(
-                    signature_data_in_bytes,
-                    orginal_data_before_signatures,
-                    verified_data,
-                )
+                with self.timings.stage("cms_decode"):
+                    parsed_signature = self.parse_pkcs7_signatures(value["/Contents"])
+                    digest_algorithms = []
+                    if parsed_signature is not None:
+                        digest_algorithms = [
+                            self.get_digest_algorithm(signer_info)
+                            for signer_info in parsed_signature[0]
+                        ]
+                contents_hash = hashlib.sha256(value["/Contents"]).digest()
             except Exception as error:
                 logger.info(error)
-                logger.info("Invalid Signature")
-            validated_data_list.append(verified_data)
-        self.validated_data_list = validated_data_list
-        self.check_validity_whole_document()
+                parsed_signature = contents_hash = None
+                digest_algorithms = []
+            signatures.append(
+                {
+                    "signature_name": k,
+                    "signing_time": signing_time,
+                    "byte_range": value["/ByteRange"],
+                    "contents_hash": contents_hash,
+                    "parsed_signature": parsed_signature,
+                    "digest_algorithms": digest_algorithms,
+                }
+            )
+        return signatures
+
+    def hash_byte_ranges(self, signatures) -> list[dict]:
+        """Hash the byte ranges of all signatures in one pass over the file.
+
+        :returns
+            list: digests of each signature keyed by the digest algorithm
+        """
+        hasher = ByteRangeHasher(self.pdf_bytes)
+        for index, signature in enumerate(signatures):
+            hasher.add(index, signature["byte_range"], signature["digest_algorithms"])
+        digests = hasher.digests()
+        metrics.inc("bytes_hashed_total", hasher.bytes_hashed)
+        return [digests[index] for index in range(len(signatures))]
 
     def check_validity_whole_document(self):
         """Check the validity of the signature."""
@@ -125,122 +315,132 @@ class PdfSignatureValidator:
                 break
         self.is_signatures_valid = is_valid_signature
 
-    def extract_orginal_data_from_byte_range(self, br):
-        """Extract the original data from the byte range."""
-        first_section = self.pdf_bytes[br[0] : br[0] + br[1]]  # noqa
-        second_section = self.pdf_bytes[br[2] : br[2] + br[3]]  # noqa
-        orginal_data_before_signatures = first_section + second_section
-        # signature_data = self.pdf_bytes[br[1] + 1: br[2] - 1]
-        # from above algorithm, signature_data is in hex format
-        return orginal_data_before_signatures
-
     @staticmethod
     def parse_pkcs7_signatures(signature_data: bytes):
-        """Parse the PKCS7 signatures to get signature data."""
-        native_data = cms.ContentInfo.load(signature_data)
-        content_info = native_data.native
-        if content_info["content_type"] != "signed_data":
+        """Parse the PKCS7 signatures to get signature data.
+
+        The SignedData is decoded lazily, only the parts that are accessed are
+        parsed, so embedded chains, CRLs and OCSP responses are left untouched.
+        """
+        content_info = cms.ContentInfo.load(signature_data)
+        if content_info["content_type"].native != "signed_data":
             return None
 
-        content = content_info["content"]
+        signed_data = content_info["content"]
         # each PKCS7 / CMS / CADES could have several signatures
-        certificates = content["certificates"]
-        signer_infos = content["signer_infos"]
-        return signer_infos, native_data, certificates
+        certificates = signed_data["certificates"]
+        signer_infos = signed_data["signer_infos"]
+        return signer_infos, signed_data, certificates
 
-    def verify_hash_and_integrity(
-        self,
-        signature_data_in_bytes: bytes,
-        orginal_data_before_signatures,
-        verified_data: dict,
+    def verify_parsed_signature(
+        self, parsed_signature, digests: dict, verified_data: dict
     ) -> dict:
-        """Verify the hash and integrity of the signature."""
-        signer_infos, native_data, certificates = self.parse_pkcs7_signatures(
-            signature_data_in_bytes
-        )
+        """Verify the hash and integrity of an already parsed signature.
+
+        The ``digests`` of the byte range, keyed by the digest algorithm, are
+        compared with the message digest of each signer.
+        """
+        signer_infos, signed_data, certificates = parsed_signature
         for signer_info in signer_infos:
-            sid = signer_info["sid"]
-            digest_algorithm = signer_info["digest_algorithm"]["algorithm"]
-            message_digest = signer_info["signed_attrs"][2]["values"][0]
-            hash_valid = self.check_hash_valid(
-                orginal_data_before_signatures, digest_algorithm, message_digest
-            )
+            sid = signer_info["sid"].chosen
+            serial_number = sid["serial_number"].native
+            issuer = sid["issuer"].native
+            digest_algorithm = self.get_digest_algorithm(signer_info)
+            message_digest = self.get_message_digest(signer_info)
+            hash_valid = digests[digest_algorithm] == message_digest
 
-            (
-                sig_attributes,
-                signature_algorithm,
-                signature_bytes,
-            ) = self.get_signed_attributes(native_data, signer_info)
-            cert = self.get_cert_for_signature(certificates, signer_info)
-            public_key_obj, public_key_str = self.get_public_key_from_certification(
-                cert
-            )
+            # the signed data is decoded lazily, as its parts are accessed
+            with self.timings.stage("cms_decode"):
+                (
+                    sig_attributes,
+                    signature_algorithm,
+                    signature_bytes,
+                ) = self.get_signed_attributes(signed_data, signer_info)
+                cert = self.get_cert_for_signature(certificates, signer_info)
+            with self.timings.stage("key_load"):
+                public_key_obj, public_key_str = self.get_public_key_from_certificate(
+                    cert
+                )
             try:
                 # we are checking the signature with the signed attributes,
                 # to check if the doc is signed witha correstponding private key
                 # signed attributes consists of message digest and other attributes
-                public_key_obj.verify(
-                    signature_bytes, sig_attributes, padding.PKCS1v15(), hashes.SHA256()
-                )
+                with self.timings.stage("rsa_verify"):
+                    public_key_obj.verify(
+                        signature_bytes,
+                        sig_attributes,
+                        padding.PKCS1v15(),
+                        hashes.SHA256(),
+                    )
                 is_valid_signature = True
             except InvalidSignature:
                 is_valid_signature = False
-            logger.info(
-                f"Signature for "
-                f"{sid['serial_number']} is valid: {is_valid_signature}"
-            )
+            logger.info(f"Signature for {serial_number} is valid: {is_valid_signature}")
 
             verified_data.update(
                 {
-                    "serial_number": sid["serial_number"],
+                    "serial_number": serial_number,
                     "hash_valid": hash_valid,
                     "signature_valid": is_valid_signature,
-                    "signed_by": sid["issuer"]["common_name"],
-                    "email_of_signer": sid["issuer"]["email_address"],
+                    "signed_by": issuer["common_name"],
+                    "email_of_signer": issuer["email_address"],
                     "signature_algorithm": signature_algorithm,
                     "digest_algorithm": digest_algorithm,
                     "message_digest": message_digest,
                     "public_key": public_key_str,
+                    "certificate": cert.dump(),
                 }
             )
         return verified_data
 
     @staticmethod
-    def get_signed_attributes(native_data, signer_info):
-        """Get the signed attributes from the native data.
+    def get_digest_algorithm(signer_info) -> str:
+        """Get the name of the digest algorithm of the signer info."""
+        return signer_info["digest_algorithm"]["algorithm"].native
 
-        from native data .
+    @staticmethod
+    def get_message_digest(signer_info) -> bytes:
+        """Get the message digest from the signed attributes of the signer info."""
+        for attribute in signer_info["signed_attrs"]:
+            if attribute["type"].native == "message_digest":
+                return attribute["values"][0].native
+        raise ValueError("Message digest not found in the signed attributes")
+
+    @staticmethod
+    def get_signed_attributes(signed_data, signer_info):
+        """Get the signed attributes of the signer info.
+
+        The signature is calculated over the DER encoded signed attributes with
+        the SET OF tag instead of the implicit [0] tag they are stored with.
         """
-        signature_algorithm = signer_info["signature_algorithm"]["algorithm"]
-        signature_bytes = signer_info["signature"]
+        signature_algorithm = signer_info["signature_algorithm"]["algorithm"].native
+        signature_bytes = signer_info["signature"].native
         # bytes for signed attrs
-        attr = native_data["content"]["signer_infos"][0]["signed_attrs"].dump()
+        attr = signer_info["signed_attrs"].dump()
         sig_attributes = b"\x31" + attr[1:]
         return sig_attributes, signature_algorithm, signature_bytes
 
     @staticmethod
     def get_cert_for_signature(certificates, signer_info):
-        """Get the certification for the signature."""
+        """Get the certification for the signature.
+
+        Only the serial numbers of the embedded certificates are decoded until
+        the certificate of the signer is found.
+        """
+        serial_number = signer_info["sid"].chosen["serial_number"].native
         cert = None
         for certification in certificates:
-            if (
-                signer_info["sid"]["serial_number"]
-                == certification["tbs_certificate"]["serial_number"]
-            ):
-                cert = certification
+            if certification.name != "certificate":
+                continue
+            if serial_number == certification.chosen.serial_number:
+                cert = certification.chosen
                 break
         return cert
 
     @staticmethod
-    def check_hash_valid(
-        orginal_data_before_signatures, digest_algorithm, message_digest
-    ) -> bool:
-        """Check if the hash is valid."""
-        hash_signature = getattr(hashlib, digest_algorithm)(
-            orginal_data_before_signatures
-        ).digest()
-        logger.info(
-            f"Calculated Hash and Message Digest are matching -> "
-            f"{hash_signature == message_digest}"
-        )
-        return hash_signature == message_digest
+    def get_public_key_from_certificate(
+        certificate,
+    ) -> tuple[rsa.RSAPublicKey, str]:
+        """Get the public key of the certificate from the certificate cache."""
+        cached_certificate = certificate_cache.get_certificate(certificate.dump())
+        return cached_certificate.public_key, cached_certificate.public_key_pem
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Thread-safe accumulator of the monotonic time spent in each stage.
+
+    A stage entered several times, e.g. once per signature, accumulates the
+    time of every entry. Stages are reported in the order they were first
+    entered.
+    """
+
+    def __init__(self):
+        """Initialize the timer without any stage."""
+        self.seconds = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the block as part of the stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        """Add the seconds to the stage."""
+        with self.lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def load(self, timings: dict):
+        """Add the milliseconds of ``as_dict()`` of another timer."""
+        for name, milliseconds in (timings or {}).items():
+            self.add(name, milliseconds / 1000)
+
+    def as_dict(self) -> dict:
+        """Get the milliseconds of each stage, rounded to microseconds."""
+        with self.lock:
+            return {
+                name: round(seconds * 1000, 3) for name, seconds in self.seconds.items()
+            }
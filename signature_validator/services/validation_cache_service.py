@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import copy
+import hashlib
+
+from django.conf import settings
+
+from signature_validator.services.lru_cache import LRUCache
+from signature_validator.services.metrics import metrics
+from signature_validator.services.pdf_validation_service import PdfSignatureValidator
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
+
+# bump when a change of the validation engine changes its results
+VALIDATOR_VERSION = "2"
+
+
+def get_document_hash(file_path) -> str:
+    """Get the SHA-256 of the file, read in chunks."""
+    with open(file_path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+class ValidationResultCache:
+    """Cache of validation results keyed by the SHA-256 of the document.
+
+    The same document is uploaded many times, its signature results only
+    depend on its bytes, the validator and the trust policy. Results are kept
+    in an in-process LRU tier in front of the ``ValidationResult`` table.
+    Entries are keyed by the policy version as well, so changing the
+    validator or ``VALIDATION_POLICY_VERSION`` invalidates them. Signer
+    verification is not cached, it depends on the current state of signers.
+    """
+
+    def __init__(self, maxsize: int):
+        """Initialize the in-process tier with the maximum number of entries."""
+        self.memory = LRUCache(maxsize)
+        metrics.register_cache("validation_result", self.memory)
+
+    @property
+    def policy_version(self) -> str:
+        """Get the version of the validator and trust policy of the results."""
+        return f"{VALIDATOR_VERSION}.{settings.VALIDATION_POLICY_VERSION}"
+
+    def get(self, document_hash: str):
+        """Get the validation result of the document or None on a miss."""
+        from signature_validator.models import ValidationResult
+
+        key = (self.policy_version, document_hash)
+        result = self.memory.get(key)
+        if result is None:
+            result = (
+                ValidationResult.objects.filter(
+                    document_hash=document_hash, policy_version=self.policy_version
+                )
+                .values(
+                    "is_signed",
+                    "is_hashes_valid",
+                    "is_signatures_valid",
+                    "validated_data_list",
+                )
+                .first()
+            )
+            if result is None:
+                metrics.inc("cache_misses_total", cache="validation_result_db")
+                return None
+            metrics.inc("cache_hits_total", cache="validation_result_db")
+            self.memory.set(key, result)
+        # callers add their own keys to the signature results
+        return copy.deepcopy(result)
+
+    def contains(self, document_hash: str) -> bool:
+        """Check the validation result of the document is cached, without reading it.
+
+        Unknown hashes, like the None of a file that was not hashed, are not.
+        """
+        from signature_validator.models import ValidationResult
+
+        if not document_hash:
+            return False
+        if self.memory.get((self.policy_version, document_hash)) is not None:
+            return True
+        return ValidationResult.objects.filter(
+            document_hash=document_hash, policy_version=self.policy_version
+        ).exists()
+
+    def set(self, document_hash: str, result: dict):
+        """Store the validation result of the document in both tiers."""
+        from signature_validator.models import ValidationResult
+
+        result = copy.deepcopy(
+            {
+                "is_signed": result["is_signed"],
+                "is_hashes_valid": result["is_hashes_valid"],
+                "is_signatures_valid": result["is_signatures_valid"],
+                "validated_data_list": result["validated_data_list"],
+            }
+        )
+        self.memory.set((self.policy_version, document_hash), result)
+        ValidationResult.objects.bulk_create(
+            [
+                ValidationResult(
+                    document_hash=document_hash,
+                    policy_version=self.policy_version,
+                    **result,
+                )
+            ],
+            ignore_conflicts=True,
+        )
+
+    def delete_stale(self) -> int:
+        """Delete the stored results of other policy versions.
+
+        :returns
+            int: number of deleted results
+        """
+        from signature_validator.models import ValidationResult
+
+        deleted, _ = ValidationResult.objects.exclude(
+            policy_version=self.policy_version
+        ).delete()
+        return deleted
+
+    def validate(self, file_path, document_hash=None) -> PdfSignatureValidator:
+        """Validate the PDF file, reusing the result of an identical document.
+
+        :returns
+            PdfSignatureValidator: validator holding the signature results
+        """
+        validator = PdfSignatureValidator(file_path, **settings.PDF_VALIDATOR_OPTIONS)
+        for _ in self.iter_validate(validator, document_hash):
+            pass
+        return validator
+
+    def iter_validate(self, validator: PdfSignatureValidator, document_hash=None):
+        """Validate like ``validate()``, yielding each signature result.
+
+        The results of a cached document are yielded at once, the results of
+        other documents as soon as each signature is verified.
+        """
+        with validator.timings.stage("cache_lookup"):
+            document_hash = document_hash or get_document_hash(validator.file_path)
+            result = self.get(document_hash)
+        if result is not None:
+            logger.info(f"Using the cached validation result of {document_hash}")
+            validator.load_result(result)
+            yield from validator.validated_data_list or []
+            return
+        yield from validator.iter_validate()
+        self.set(document_hash, validator.__dict__())
+
+
+validation_result_cache = ValidationResultCache(settings.VALIDATION_RESULT_CACHE_SIZE)
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from signature_validator.cache import get_result_namespace
+from signature_validator.models import (
+    PdfDocumentValidator,
+    SignatureValidator,
+    ValidationJob,
+)
+from signature_validator.services.document_validation_service import (
+    DocumentValidationService,
+)
+from validator.cache import invalidate
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
+
+
+def enqueue_validation(
+    pdf_validator: PdfDocumentValidator,
+    document_hash: str = None,
+    signup_url: str = None,
+    verify_signers: bool = True,
+) -> ValidationJob:
+    """Queue the validation of a stored document for the workers."""
+    return ValidationJob.objects.create(
+        pdf_document_validator=pdf_validator,
+        document_hash=document_hash,
+        signup_url=signup_url,
+        verify_signers=verify_signers,
+    )
+
+
+def get_claimed_job(job: ValidationJob):
+    """Get the job as long as it is running under the claim of the instance."""
+    return ValidationJob.objects.filter(
+        pk=job.pk, status=ValidationJob.RUNNING, claim_token=job.claim_token
+    )
+
+
+class JobHeartbeat:
+    """Refresh the claim of a running job, so it is not taken for a dead worker.
+
+    A thread moves ``claimed_at`` forward every third of
+    ``VALIDATION_JOB_TIMEOUT`` while the job runs, with a connection of its
+    own, until the job is done or its claim is lost.
+    """
+
+    def __init__(self, job: ValidationJob):
+        """Initialize the heartbeat of the claimed job."""
+        self.job = job
+        self.interval = settings.VALIDATION_JOB_TIMEOUT / 3
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name=f"validation-job-{job.pk}-heartbeat", daemon=True
+        )
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def beat(self) -> bool:
+        """Refresh the claim time of the job.
+
+        :returns
+            bool: False when the job is not running under its claim anymore
+        """
+        return bool(get_claimed_job(self.job).update(claimed_at=timezone.now()))
+
+    def run(self):
+        """Beat until stopped or until the claim is lost."""
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    if not self.beat():
+                        logger.warning(f"Validation job {self.job.pk} lost its claim")
+                        return
+                except DatabaseError as e:
+                    logger.warning(f"Heartbeat of validation job {self.job.pk}: {e}")
+        finally:
+            connection.close()
+
+
+class ValidationWorker:
+    """Claim queued validation jobs from the database and run them.
+
+    Jobs are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so that any
+    number of worker processes, on any number of hosts, share the queue
+    without a broker. Databases without ``SKIP LOCKED``, like SQLite, claim
+    with a conditional update instead. Running jobs keep their claim fresh
+    with a ``JobHeartbeat``, a job without one for ``VALIDATION_JOB_TIMEOUT``
+    seconds belongs to a dead worker and is queued again. Every claim has its
+    own token, a worker only finishes a job it still holds the claim of.
+    """
+
+    def __init__(self, worker_id: str = None):
+        """Initialize the worker with the name it claims jobs with."""
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    def claim_job(self) -> ValidationJob:
+        """Claim the oldest pending job or return None when there is none."""
+        pending = ValidationJob.objects.filter(status=ValidationJob.PENDING)
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                job = pending.select_for_update(skip_locked=True).order_by("id").first()
+                if job is None:
+                    return None
+                pending.filter(pk=job.pk).update(**self.get_claim())
+            return ValidationJob.objects.get(pk=job.pk)
+        for job_id in pending.order_by("id").values_list("id", flat=True)[:10]:
+            # only one worker sees the pending status of the job change
+            if pending.filter(pk=job_id).update(**self.get_claim()):
+                return ValidationJob.objects.get(pk=job_id)
+        return None
+
+    def get_claim(self) -> dict:
+        """Get the fields a job is claimed with, under a new claim token."""
+        return {
+            "status": ValidationJob.RUNNING,
+            "claimed_by": self.worker_id,
+            "claim_token": uuid.uuid4(),
+            "claimed_at": timezone.now(),
+            "attempts": F("attempts") + 1,
+        }
+
+    @staticmethod
+    def requeue_stale_jobs() -> int:
+        """Queue the jobs without a heartbeat again, or fail them after the attempts.
+
+        :returns
+            int: number of jobs queued again
+        """
+        stale = ValidationJob.objects.filter(
+            status=ValidationJob.RUNNING,
+            claimed_at__lt=timezone.now()
+            - timedelta(seconds=settings.VALIDATION_JOB_TIMEOUT),
+        )
+        failed = stale.filter(attempts__gte=settings.VALIDATION_JOB_MAX_ATTEMPTS)
+        failed_documents = list(
+            failed.values_list("pdf_document_validator_id", flat=True)
+        )
+        failed.update(
+            status=ValidationJob.FAILED,
+            error="Worker did not finish the job",
+            finished_at=timezone.now(),
+        )
+        # updates send no signal, the result pages show the failure once invalidated
+        invalidate(*map(get_result_namespace, failed_documents))
+        return stale.update(status=ValidationJob.PENDING)
+
+    def run_job(self, job: ValidationJob) -> ValidationJob:
+        """Validate the document of the job and save the results.
+
+        The results are only saved by the worker still holding the claim of
+        the job, in the transaction that finishes it, replacing the results
+        of an earlier attempt.
+        """
+        logger.info(f"Worker {self.worker_id} running validation job {job.pk}")
+        try:
+            service = DocumentValidationService(
+                job.pdf_document_validator, job.document_hash, job.signup_url
+            )
+            with JobHeartbeat(job):
+                validator = service.validate()
+            with transaction.atomic():
+                if not self.finish_job(job, ValidationJob.DONE):
+                    return job
+                SignatureValidator.objects.filter(
+                    pdf_document_validator=job.pdf_document_validator
+                ).delete()
+                if job.verify_signers:
+                    service.save_verified_signatures(validator)
+                else:
+                    service.save_signatures(validator)
+        except Exception as e:
+            logger.error(f"Error running validation job {job.pk}: {e}")
+            if job.attempts < settings.VALIDATION_JOB_MAX_ATTEMPTS:
+                status = ValidationJob.PENDING
+            else:
+                status = ValidationJob.FAILED
+            self.finish_job(job, status, f"{type(e).__name__}: {e}")
+        return job
+
+    def finish_job(self, job: ValidationJob, status: str, error: str = None) -> bool:
+        """End the claim of the job with its new status.
+
+        The status is changed by a conditional update, a job queued again and
+        claimed by another worker meanwhile is left to that worker.
+
+        :returns
+            bool: True when the worker still held the claim of the job
+        """
+        now = timezone.now()
+        finished_at = (
+            now if status in (ValidationJob.DONE, ValidationJob.FAILED) else None
+        )
+        if not get_claimed_job(job).update(
+            status=status, error=error, finished_at=finished_at, updated=now
+        ):
+            logger.warning(
+                f"Worker {self.worker_id} lost the claim of validation job {job.pk}"
+            )
+            job.refresh_from_db()
+            return False
+        job.status, job.error, job.finished_at = status, error, finished_at
+        # updates send no signal, the result pages show the status once invalidated
+        invalidate(get_result_namespace(job.pdf_document_validator_id))
+        return True
+
+    def run(self, burst: bool = False, poll_interval: float = 1.0) -> int:
+        """Run jobs until stopped, or until the queue is empty for a burst.
+
+        :returns
+            int: number of jobs run
+        """
+        jobs_run = 0
+        while True:
+            close_old_connections()
+            job = self.claim_job()
+            if job is not None:
+                self.run_job(job)
+                jobs_run += 1
+                continue
+            if self.requeue_stale_jobs():
+                continue
+            if burst:
+                return jobs_run
+            time.sleep(poll_interval)
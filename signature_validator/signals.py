@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from accounts.models import CustomUser
+from validator.cache import invalidate
+from .cache import get_result_namespace
+from .models import PdfDocumentValidator, SignatureValidator, ValidationJob
+from .services.daily_stat_service import (
+    DOCUMENT_FIELDS,
+    USER_FIELDS,
+    DailyStatService,
+    get_document_counts,
+    get_user_counts,
+)
+
+
+# counts of the rollup of an instance, as loaded or last saved
+COUNTS_ATTRIBUTE = "_daily_stat_counts"
+# the counts are unknown when a field they depend on was deferred
+DEFERRED = object()
+
+TRACKED_MODELS = {
+    PdfDocumentValidator: (DOCUMENT_FIELDS, get_document_counts),
+    CustomUser: (USER_FIELDS, get_user_counts),
+}
+
+
+@receiver(post_init, sender=PdfDocumentValidator)
+@receiver(post_init, sender=CustomUser)
+def remember_daily_stat_counts(sender, instance, **kwargs):
+    """Signal to remember the counts of the rollup of a loaded instance."""
+    fields, get_counts = TRACKED_MODELS[sender]
+    if any(field not in instance.__dict__ for field in fields):
+        setattr(instance, COUNTS_ATTRIBUTE, DEFERRED)
+    else:
+        setattr(instance, COUNTS_ATTRIBUTE, get_counts(instance))
+
+
+@receiver(post_save, sender=PdfDocumentValidator)
+@receiver(post_save, sender=CustomUser)
+def update_daily_stat(sender, instance, created, raw, update_fields, **kwargs):
+    """Signal to move the counts of a saved instance in the rollup.
+
+    Fixtures, and saves of deferred instances, are not counted, rebuild the
+    rollup after loading them.
+    """
+    fields, get_counts = TRACKED_MODELS[sender]
+    if raw or (update_fields is not None and not fields & set(update_fields)):
+        return
+    old = None if created else getattr(instance, COUNTS_ATTRIBUTE, DEFERRED)
+    if old is DEFERRED:
+        return
+    new = get_counts(instance)
+    DailyStatService.apply_change(old, new)
+    setattr(instance, COUNTS_ATTRIBUTE, new)
+
+
+@receiver(post_delete, sender=PdfDocumentValidator)
+@receiver(post_delete, sender=CustomUser)
+def remove_daily_stat(sender, instance, **kwargs):
+    """Signal to remove the counts of a deleted instance from the rollup."""
+    old = getattr(instance, COUNTS_ATTRIBUTE, DEFERRED)
+    if old is not DEFERRED:
+        DailyStatService.apply_change(old, None)
+
+
+@receiver(post_save, sender=PdfDocumentValidator)
+@receiver(post_delete, sender=PdfDocumentValidator)
+def invalidate_document_result(sender, instance, **kwargs):
+    """Signal to invalidate the cached result pages of a saved document."""
+    invalidate(get_result_namespace(instance.pk))
+
+
+@receiver(post_save, sender=SignatureValidator)
+@receiver(post_delete, sender=SignatureValidator)
+def invalidate_signature_result(sender, instance, **kwargs):
+    """Signal to invalidate the result pages of the document of a signature.
+
+    Signatures created in bulk send no signal, the document is saved after
+    them.
+    """
+    invalidate(get_result_namespace(instance.pdf_document_validator_id))
+
+
+@receiver(post_save, sender=ValidationJob)
+@receiver(post_delete, sender=ValidationJob)
+def invalidate_job_result(sender, instance, **kwargs):
+    """Signal to invalidate the result pages of the document of a job."""
+    invalidate(get_result_namespace(instance.pdf_document_validator_id))
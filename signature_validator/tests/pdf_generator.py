@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+
+from asn1crypto import algos, cms, core, x509
+from cryptography import x509 as crypto_x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+
+
+# bytes written to and hashed from the file at a time
+CHUNK_SIZE = 1024 * 1024
+# width of each number of the /ByteRange placeholder, enough for 1 TB files
+BYTE_RANGE_WIDTH = 13
+SIGNING_TIME = datetime(2024, 3, 20, 8, 14, 10, tzinfo=timezone.utc)
+
+
+def create_certificate(
+    private_key, common_name: str, email: str, serial_number: int
+) -> bytes:
+    """Create a self-signed DER certificate with a name the validator can report."""
+    name = crypto_x509.Name(
+        [
+            crypto_x509.NameAttribute(NameOID.COMMON_NAME, common_name),
+            crypto_x509.NameAttribute(NameOID.EMAIL_ADDRESS, email),
+        ]
+    )
+    certificate = (
+        crypto_x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(private_key.public_key())
+        .serial_number(serial_number)
+        .not_valid_before(SIGNING_TIME - timedelta(days=1))
+        .not_valid_after(SIGNING_TIME + timedelta(days=3650))
+        .sign(private_key, hashes.SHA256())
+    )
+    return certificate.public_bytes(serialization.Encoding.DER)
+
+
+class SignedPdfGenerator:
+    """Write synthetic signed PDFs for testing and benchmarking the validation engine.
+
+    Each signature is added as an incremental update, like a document that is
+    countersigned, with a detached CMS signature over its byte range. The
+    signed attributes are signed with SHA-256 and RSA as the validator
+    expects, ``digest_algorithm`` is the algorithm of the message digest. The
+    certificate of the signer is embedded after ``embedded_certificates - 1``
+    unrelated CA certificates. The keys are created once per generator.
+    """
+
+    def __init__(
+        self, digest_algorithm: str = "sha256", embedded_certificates: int = 1
+    ):
+        """Initialize the generator with the keys and certificates it signs with."""
+        self.digest_algorithm = digest_algorithm
+        self.signer_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        signer_certificate = create_certificate(
+            self.signer_key, "Benchmark Signer", "signer@example.com", 1000
+        )
+        ca_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.certificates = [
+            create_certificate(
+                ca_key, f"Benchmark CA {index}", "ca@example.com", 2000 + index
+            )
+            for index in range(embedded_certificates - 1)
+        ]
+        self.certificates.append(signer_certificate)
+        self.signer_certificate = x509.Certificate.load(signer_certificate)
+        # hex encoded signature with room for the certificates and attributes
+        certificates_size = sum(len(certificate) for certificate in self.certificates)
+        self.contents_size = 2 * (certificates_size + 4096)
+
+    def write(self, path, content_size: int, signatures: int = 1):
+        """Write a PDF with ``content_size`` bytes of page content and signatures.
+
+        :returns
+            int: size of the written file
+        """
+        with open(path, "w+b") as file:
+            writer = PdfWriter(file)
+            writer.write_document(content_size)
+            for index in range(1, signatures + 1):
+                self.sign_revision(writer, f"Signature{index}")
+            return file.tell()
+
+    def sign_revision(self, writer, signature_name: str):
+        """Append a revision with a new signature field and sign it."""
+        contents_offset, byte_range_offset = writer.write_signature_revision(
+            signature_name, self.contents_size
+        )
+        file = writer.file
+        end = file.tell()
+        contents_end = contents_offset + self.contents_size + 2
+        byte_range = [0, contents_offset, contents_end, end - contents_end]
+        file.seek(byte_range_offset)
+        file.write(
+            " ".join(str(n).rjust(BYTE_RANGE_WIDTH) for n in byte_range).encode()
+        )
+        digest = hashlib.new(self.digest_algorithm)
+        for start, length in ((byte_range[0], byte_range[1]), byte_range[2:]):
+            file.seek(start)
+            while length > 0:
+                chunk = file.read(min(CHUNK_SIZE, length))
+                digest.update(chunk)
+                length -= len(chunk)
+        signature = self.create_signature(digest.digest()).hex().encode()
+        if len(signature) > self.contents_size:
+            raise ValueError("Signature does not fit the /Contents placeholder")
+        file.seek(contents_offset + 1)
+        file.write(signature)
+        file.seek(end)
+
+    def create_signature(self, message_digest: bytes) -> bytes:
+        """Create a detached CMS signature of the message digest."""
+        signed_attrs = cms.CMSAttributes(
+            [
+                cms.CMSAttribute(
+                    {"type": "content_type", "values": [cms.ContentType("data")]}
+                ),
+                cms.CMSAttribute(
+                    {
+                        "type": "signing_time",
+                        "values": [cms.Time({"utc_time": SIGNING_TIME})],
+                    }
+                ),
+                cms.CMSAttribute(
+                    {
+                        "type": "message_digest",
+                        "values": [core.OctetString(message_digest)],
+                    }
+                ),
+            ]
+        )
+        signature = self.signer_key.sign(
+            signed_attrs.dump(), padding.PKCS1v15(), hashes.SHA256()
+        )
+        signer_info = cms.SignerInfo(
+            {
+                "version": "v1",
+                "sid": cms.SignerIdentifier(
+                    {
+                        "issuer_and_serial_number": cms.IssuerAndSerialNumber(
+                            {
+                                "issuer": self.signer_certificate.issuer,
+                                "serial_number": self.signer_certificate.serial_number,
+                            }
+                        )
+                    }
+                ),
+                "digest_algorithm": algos.DigestAlgorithm(
+                    {"algorithm": self.digest_algorithm}
+                ),
+                "signed_attrs": signed_attrs,
+                "signature_algorithm": algos.SignedDigestAlgorithm(
+                    {"algorithm": "sha256_rsa"}
+                ),
+                "signature": signature,
+            }
+        )
+        signed_data = cms.SignedData(
+            {
+                "version": "v1",
+                "digest_algorithms": [
+                    algos.DigestAlgorithm({"algorithm": self.digest_algorithm})
+                ],
+                "encap_content_info": {"content_type": "data"},
+                "certificates": [
+                    x509.Certificate.load(certificate)
+                    for certificate in self.certificates
+                ],
+                "signer_infos": [signer_info],
+            }
+        )
+        return cms.ContentInfo(
+            {"content_type": "signed_data", "content": signed_data}
+        ).dump()
+
+
+class PdfWriter:
+    """Minimal PDF writer of a one page document and its signature revisions.
+
+    Every revision has a classic cross-reference table, the page content is a
+    stream of filler bytes of the requested size.
+    """
+
+    CATALOG, PAGES, PAGE, CONTENT, ACRO_FORM = range(1, 6)
+
+    def __init__(self, file):
+        """Initialize the writer with the binary file it writes to."""
+        self.file = file
+        self.object_count = self.ACRO_FORM
+        self.offsets = {}
+        self.fields = []
+        self.xref_offset = None
+
+    def write(self, data: bytes):
+        """Write bytes at the end of the file."""
+        self.file.write(data)
+
+    def write_object(self, number: int, body: bytes):
+        """Write an indirect object and remember its offset."""
+        self.offsets[number] = self.file.tell()
+        self.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def write_document(self, content_size: int):
+        """Write the first revision with the page content and an empty form."""
+        self.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        self.write_object(
+            self.CATALOG,
+            b"<< /Type /Catalog /Pages %d 0 R /AcroForm %d 0 R >>"
+            % (self.PAGES, self.ACRO_FORM),
+        )
+        self.write_object(
+            self.PAGES, b"<< /Type /Pages /Kids [%d 0 R] /Count 1 >>" % self.PAGE
+        )
+        self.write_object(
+            self.PAGE,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Contents %d 0 R >>" % (self.PAGES, self.CONTENT),
+        )
+        self.offsets[self.CONTENT] = self.file.tell()
+        self.write(
+            b"%d 0 obj\n<< /Length %d >>\nstream\n" % (self.CONTENT, content_size)
+        )
+        # random bytes do not compress, so no layer can shortcut the hashing
+        remaining = content_size
+        while remaining > 0:
+            chunk = os.urandom(min(CHUNK_SIZE, remaining))
+            self.write(chunk)
+            remaining -= len(chunk)
+        self.write(b"\nendstream\nendobj\n")
+        self.write_object(self.ACRO_FORM, b"<< /Fields [] /SigFlags 3 >>")
+        self.write_xref(list(self.offsets))
+
+    def write_signature_revision(self, signature_name: str, contents_size: int):
+        """Write a revision with a new signature field and placeholders.
+
+        :returns
+            tuple: offsets of the ``/Contents`` hex string and of the numbers
+            of the ``/ByteRange`` placeholder
+        """
+        signature_number = self.object_count + 1
+        field_number = self.object_count + 2
+        self.object_count = field_number
+        self.fields.append(field_number)
+        self.offsets = {}
+
+        placeholder = b" ".join([b"0".rjust(BYTE_RANGE_WIDTH)] * 4)
+        prefix = (
+            b"<< /Type /Sig /Filter /Adobe.PPKLite /SubFilter /adbe.pkcs7.detached "
+        )
+        prefix += b"/M (D:20240320081410+05'30') /ByteRange ["
+        self.offsets[signature_number] = self.file.tell()
+        self.write(b"%d 0 obj\n" % signature_number + prefix)
+        byte_range_offset = self.file.tell()
+        self.write(placeholder + b"] /Contents ")
+        contents_offset = self.file.tell()
+        self.write(b"<" + b"0" * contents_size + b"> >>\nendobj\n")
+
+        self.write_object(
+            field_number,
+            b"<< /FT /Sig /T (%s) /V %d 0 R /Type /Annot /Subtype /Widget "
+            b"/Rect [0 0 0 0] /F 132 /P %d 0 R >>"
+            % (signature_name.encode(), signature_number, self.PAGE),
+        )
+        fields = b" ".join(b"%d 0 R" % number for number in self.fields)
+        self.write_object(
+            self.ACRO_FORM, b"<< /Fields [" + fields + b"] /SigFlags 3 >>"
+        )
+        self.write_xref(sorted(self.offsets))
+        return contents_offset, byte_range_offset
+
+    def write_xref(self, numbers):
+        """Write the cross-reference section of the revision and its trailer."""
+        xref_offset = self.file.tell()
+        self.write(b"xref\n")
+        if self.xref_offset is None:
+            self.write(b"0 1\n0000000000 65535 f \n")
+        for number in numbers:
+            self.write(b"%d 1\n%010d 00000 n \n" % (number, self.offsets[number]))
+        trailer = b"<< /Size %d /Root %d 0 R" % (self.object_count + 1, self.CATALOG)
+        if self.xref_offset is not None:
+            trailer += b" /Prev %d" % self.xref_offset
+        self.write(
+            b"trailer\n" + trailer + b" >>\nstartxref\n%d\n%%%%EOF\n" % xref_offset
+        )
+        self.xref_offset = xref_offset
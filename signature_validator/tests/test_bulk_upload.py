@@ -0,0 +1,268 @@
+import hashlib
+import io
+import json
+import zipfile
+
+import pytest
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from signature_validator.models import PdfDocumentValidator, ValidationJob
+from signature_validator.services import bulk_upload_service
+from signature_validator.services.batch_validation_service import (
+    BatchValidationService,
+)
+from signature_validator.services.bulk_upload_service import BulkUploadService
+from signature_validator.services.document_validation_service import (
+    DocumentValidationService,
+)
+
+
+pytestmark = pytest.mark.django_db
+
+PDF_FILES = {
+    "Test_File_one_person_one_signature": 1,
+    "test_one_person_three_signatures": 3,
+    "test_file_no_signature": 0,
+}
+
+
+def read_pdf(pdf_file) -> bytes:
+    """Read a test PDF file."""
+    with open(f"{settings.TEST_FILES_ROOT}/{pdf_file}.pdf", "rb") as file:
+        return file.read()
+
+
+class TestBulkUpload:
+    """Test the bulk upload API."""
+
+    bulk_url = reverse("signatures-bulk")
+
+    def assert_results(self, results, names):
+        """Assert every PDF is stored with its signatures, in upload order."""
+        assert [result["name"] for result in results] == names
+        for result, (pdf_file, signature_count) in zip(results, PDF_FILES.items()):
+            assert result["error"] is None
+            assert result["document"]["is_signed"] == bool(signature_count)
+            assert len(result["document"]["validated_list"]) == signature_count
+        assert PdfDocumentValidator.objects.count() == len(PDF_FILES)
+
+    def test_upload_many_files(self):
+        """Test many PDF files are validated in one request."""
+        files = [
+            SimpleUploadedFile(f"{pdf_file}.pdf", read_pdf(pdf_file))
+            for pdf_file in PDF_FILES
+        ]
+        response = APIClient().post(self.bulk_url, {"files": files})
+        assert response.status_code == 200
+        assert response.data["count"] == len(PDF_FILES)
+        self.assert_results(
+            response.data["results"], [f"{pdf_file}.pdf" for pdf_file in PDF_FILES]
+        )
+
+    def test_upload_zip_archive(self):
+        """Test the PDFs of a ZIP archive are validated, other members rejected."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for pdf_file in PDF_FILES:
+                zip_file.writestr(f"documents/{pdf_file}.pdf", read_pdf(pdf_file))
+            zip_file.writestr("documents/notes.txt", b"not a PDF")
+        archive = SimpleUploadedFile("documents.zip", buffer.getvalue())
+
+        response = APIClient().post(self.bulk_url, {"archive": archive})
+        assert response.status_code == 200
+        results = response.data["results"]
+        self.assert_results(
+            results[:-1], [f"documents/{pdf_file}.pdf" for pdf_file in PDF_FILES]
+        )
+        assert results[-1]["name"] == "documents/notes.txt"
+        assert results[-1]["error"] == "Invalid file format, only PDF is allowed."
+        assert "document" not in results[-1]
+
+    def test_unreadable_archive_members_are_errors(self):
+        """Test encrypted and unsupported members do not fail the other members."""
+        pdf_file = "Test_File_one_person_one_signature"
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zip_file:
+            zip_file.writestr("encrypted.pdf", read_pdf(pdf_file))
+            zip_file.writestr("unsupported.pdf", read_pdf(pdf_file))
+            zip_file.writestr(f"{pdf_file}.pdf", read_pdf(pdf_file))
+        content = bytearray(buffer.getvalue())
+        # flag the first member as encrypted, and compress the second with AES
+        encrypted = content.index(b"PK\x01\x02")
+        content[encrypted + 8] |= 0x1
+        unsupported = content.index(b"PK\x01\x02", encrypted + 1)
+        content[unsupported + 10] = 99
+        archive = SimpleUploadedFile("documents.zip", bytes(content))
+
+        response = APIClient().post(self.bulk_url, {"archive": archive})
+        assert response.status_code == 200
+        assert response.data["count"] == 3
+        assert response.data["errors"] == 2
+        encrypted_result, unsupported_result, result = response.data["results"]
+        assert "is encrypted" in encrypted_result["error"]
+        assert "compression method is not supported" in unsupported_result["error"]
+        assert result["error"] is None
+        assert len(result["document"]["validated_list"]) == 1
+        assert PdfDocumentValidator.objects.count() == 1
+
+    def test_identical_document_uses_result_cache(self, monkeypatch):
+        """Test a document validated before is not sent to the process pool."""
+        pdf_file = "test_one_person_three_signatures"
+        upload = {"files": [SimpleUploadedFile(f"{pdf_file}.pdf", read_pdf(pdf_file))]}
+        APIClient().post(self.bulk_url, upload)
+
+        def submit(*args):
+            raise AssertionError("The cached document was validated again")
+
+        monkeypatch.setattr(BatchValidationService, "submit", submit)
+        upload = {"files": [SimpleUploadedFile(f"{pdf_file}.pdf", read_pdf(pdf_file))]}
+        response = APIClient().post(self.bulk_url, upload)
+        assert response.status_code == 200
+        result = response.data["results"][0]
+        assert result["error"] is None
+        assert len(result["document"]["validated_list"]) == 3
+
+    def test_upload_requires_files_or_archive(self):
+        """Test files and an archive can not be uploaded together."""
+        pdf_file = "Test_File_one_person_one_signature"
+        response = APIClient().post(
+            self.bulk_url,
+            {
+                "files": [SimpleUploadedFile(f"{pdf_file}.pdf", read_pdf(pdf_file))],
+                "archive": SimpleUploadedFile("documents.zip", b"not a ZIP"),
+            },
+        )
+        assert response.status_code == 400
+        assert "archive" in response.data
+
+    def test_upload_is_queued(self, settings):
+        """Test the files are queued as validation jobs when jobs are enabled."""
+        settings.VALIDATION_JOBS_ASYNC = True
+        files = [
+            SimpleUploadedFile(f"{pdf_file}.pdf", read_pdf(pdf_file))
+            for pdf_file in PDF_FILES
+        ]
+        response = APIClient().post(self.bulk_url, {"files": files})
+        assert response.status_code == 202
+        for result in response.data["results"]:
+            assert result["job"]["status"] == ValidationJob.PENDING
+        assert ValidationJob.objects.count() == len(PDF_FILES)
+
+    @pytest.mark.parametrize("as_archive", [False, True])
+    def test_stored_documents_are_not_hashed_again(
+        self, settings, monkeypatch, as_archive
+    ):
+        """Test the hash of an upload or archive member is queued with its job."""
+        settings.VALIDATION_JOBS_ASYNC = True
+
+        def get_document_hash(file_path):
+            raise AssertionError("The stored document was hashed again")
+
+        monkeypatch.setattr(bulk_upload_service, "get_document_hash", get_document_hash)
+        if as_archive:
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+                for pdf_file in PDF_FILES:
+                    zip_file.writestr(f"{pdf_file}.pdf", read_pdf(pdf_file))
+            upload = {"archive": SimpleUploadedFile("documents.zip", buffer.getvalue())}
+        else:
+            upload = {
+                "files": [
+                    SimpleUploadedFile(f"{pdf_file}.pdf", read_pdf(pdf_file))
+                    for pdf_file in PDF_FILES
+                ]
+            }
+        response = APIClient().post(self.bulk_url, upload)
+        assert response.status_code == 202
+        assert list(
+            ValidationJob.objects.order_by("id").values_list("document_hash", flat=True)
+        ) == [hashlib.sha256(read_pdf(pdf_file)).hexdigest() for pdf_file in PDF_FILES]
+
+
+class TestNDJSONStreaming:
+    """Test the results streamed as newline delimited JSON."""
+
+    @staticmethod
+    def read_lines(response) -> list:
+        """Read the lines of a streamed NDJSON response."""
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        content = b"".join(response.streaming_content)
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_signatures_are_streamed(self):
+        """Test a line per signature is streamed before the stored document."""
+        pdf_file = "test_one_person_three_signatures"
+        response = APIClient().post(
+            reverse("signatures-list"),
+            {"pdf_file": SimpleUploadedFile(f"{pdf_file}.pdf", read_pdf(pdf_file))},
+            HTTP_ACCEPT="application/x-ndjson",
+        )
+        assert response.status_code == 201
+        lines = self.read_lines(response)
+        assert [line["type"] for line in lines] == ["signature"] * 3 + ["document"]
+        assert [line["index"] for line in lines[:3]] == [0, 1, 2]
+        assert all(line["hash_valid"] for line in lines[:3])
+        document = lines[-1]
+        assert document["is_signatures_valid"]
+        assert len(document["validated_list"]) == 3
+        assert PdfDocumentValidator.objects.get().pk == document["id"]
+
+    def test_bulk_results_are_streamed(self):
+        """Test a line per document of a bulk upload is streamed."""
+        files = [
+            SimpleUploadedFile(f"{pdf_file}.pdf", read_pdf(pdf_file))
+            for pdf_file in PDF_FILES
+        ]
+        response = APIClient().post(
+            reverse("signatures-bulk"),
+            {"files": files},
+            HTTP_ACCEPT="application/x-ndjson",
+        )
+        assert response.status_code == 200
+        lines = sorted(self.read_lines(response), key=lambda line: line["index"])
+        assert [line["name"] for line in lines] == [
+            f"{pdf_file}.pdf" for pdf_file in PDF_FILES
+        ]
+        for line, signature_count in zip(lines, PDF_FILES.values()):
+            assert line["error"] is None
+            assert len(line["document"]["validated_list"]) == signature_count
+
+    def test_failed_stream_leaves_no_document(self, monkeypatch):
+        """Test a stream ending in an error removes the document it stored."""
+
+        def fail(service, validator):
+            raise ConnectionError("Database connection lost")
+
+        monkeypatch.setattr(DocumentValidationService, "save_signatures", fail)
+        pdf_file = "Test_File_one_person_one_signature"
+        response = APIClient().post(
+            reverse("signatures-list"),
+            {"pdf_file": SimpleUploadedFile(f"{pdf_file}.pdf", read_pdf(pdf_file))},
+            HTTP_ACCEPT="application/x-ndjson",
+        )
+        lines = self.read_lines(response)
+        assert [line["type"] for line in lines] == ["signature", "error"]
+        assert lines[-1]["error"] == "Database connection lost"
+        assert not PdfDocumentValidator.objects.exists()
+
+    def test_failed_bulk_stream_ends_with_error(self, monkeypatch):
+        """Test an error while streaming a bulk upload is sent as the last line."""
+
+        def fail(service, entries):
+            raise ConnectionError("Database connection lost")
+            yield
+
+        monkeypatch.setattr(BulkUploadService, "validate", fail)
+        pdf_file = "Test_File_one_person_one_signature"
+        response = APIClient().post(
+            reverse("signatures-bulk"),
+            {"files": [SimpleUploadedFile(f"{pdf_file}.pdf", read_pdf(pdf_file))]},
+            HTTP_ACCEPT="application/x-ndjson",
+        )
+        assert self.read_lines(response) == [
+            {"type": "error", "error": "Database connection lost"}
+        ]
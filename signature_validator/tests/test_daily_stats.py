@@ -0,0 +1,166 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from accounts.tests.factories import UserFactory
+from signature_validator.models import DailyStat, PdfDocumentValidator
+from signature_validator.services.daily_stat_service import (
+    DailyStatService,
+    get_periods,
+)
+
+
+pytestmark = pytest.mark.django_db
+
+
+def create_document(**kwargs) -> PdfDocumentValidator:
+    """Create a document without validating it."""
+    return PdfDocumentValidator.objects.create(
+        pdf_file=SimpleUploadedFile("sample.pdf", b"%PDF-1.4"), **kwargs
+    )
+
+
+def get_counts() -> dict:
+    """Get the counters of every day of the rollup."""
+    return {
+        row.pop("date"): row
+        for row in DailyStat.objects.values(
+            "date",
+            "documents",
+            "signed_documents",
+            "verified_documents",
+            "users",
+            "active_users",
+            "signers",
+        )
+    }
+
+
+class TestDailyStat:
+    """Test the daily rollup of the report."""
+
+    def test_updated_when_documents_and_users_are_saved(self):
+        """Test the counts follow the flags of the saved rows."""
+        today = timezone.localdate()
+        user = UserFactory(is_active=False, username="joined", email="j@example.com")
+        document = create_document(user=user)
+        document.is_signed = True
+        document.save()
+        assert get_counts()[today] == {
+            "documents": 1,
+            "signed_documents": 1,
+            "verified_documents": 0,
+            "users": 1,
+            "active_users": 0,
+            "signers": 1,
+        }
+
+        user = CustomUser.objects.get(pk=user.pk)
+        user.is_active = True
+        user.save()
+        PdfDocumentValidator.objects.get(pk=document.pk).delete()
+        assert get_counts()[today] == {
+            "documents": 0,
+            "signed_documents": 0,
+            "verified_documents": 0,
+            "users": 1,
+            "active_users": 1,
+            "signers": 1,
+        }
+
+    def test_rebuild_recounts_from_source_tables(self):
+        """Test the rebuild command recounts the days from the source tables."""
+        UserFactory(username="first", email="first@example.com")
+        create_document(is_signed=True, all_signers_verified=True)
+        # updates of querysets are not counted, only the rebuild sees them
+        create_document()
+        PdfDocumentValidator.objects.filter(is_signed=False).update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        DailyStat.objects.all().delete()
+
+        call_command("rebuild_daily_stats", stdout=StringIO())
+        rebuilt = get_counts()
+        assert rebuilt[timezone.localdate()] == {
+            "documents": 1,
+            "signed_documents": 1,
+            "verified_documents": 1,
+            "users": 1,
+            "active_users": 1,
+            "signers": 1,
+        }
+        assert rebuilt[timezone.localdate() - timedelta(days=2)]["documents"] == 1
+
+    def test_get_periods_by_week_and_month(self):
+        """Test the periods of a range, the latest first."""
+        start = timezone.localdate().replace(year=2024, month=1, day=30)
+        end = start.replace(month=3, day=2)
+        assert [str(period) for period in get_periods(start, end, "month")] == [
+            "2024-03-01",
+            "2024-02-01",
+            "2024-01-01",
+        ]
+        weeks = get_periods(start, end, "week")
+        assert weeks[0] == end - timedelta(days=end.weekday())
+        assert weeks[-1] == start - timedelta(days=start.weekday())
+        assert all(week.weekday() == 0 for week in weeks)
+
+
+class TestReportView:
+    """Test the ReportView."""
+
+    report_url = reverse("signature-validator-view:report")
+
+    def test_default_charts(self, client):
+        """Test the totals and the last 5 and 6 days without a range."""
+        create_document(is_signed=True, all_signers_verified=True)
+        create_document(is_signed=True)
+        UserFactory(username="active", email="active@example.com")
+        DailyStatService.rebuild()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.report_url)
+        assert response.status_code == 200
+        assert len(queries) <= 3
+        context = response.context
+        today = timezone.localdate()
+        assert context["pdf_docs_tested"] == 2
+        assert context["verified_pdf"] == 1
+        assert context["pdf_not_verified"] == 1
+        assert context["users_count"] == 1
+        assert context["signers_count"] == 1
+        assert context["signed_documents_labels"][0] == str(today)
+        assert context["signed_documents_data"] == [2, 0, 0, 0, 0]
+        assert context["users_data"] == [1, 0, 0, 0, 0, 0]
+
+    def test_range_and_granularity(self, client):
+        """Test the charts of a range by month."""
+        document = create_document(is_signed=True)
+        document_date = timezone.localdate(document.created)
+        end = document_date.replace(day=1) + timedelta(days=40)
+        response = client.get(
+            self.report_url,
+            {"start": str(document_date), "end": str(end), "granularity": "month"},
+        )
+        assert response.context["signed_documents_labels"] == [
+            end.strftime("%Y-%m"),
+            document_date.strftime("%Y-%m"),
+        ]
+        assert response.context["signed_documents_data"] == [0, 1]
+
+    def test_invalid_range_shows_default_charts(self, client):
+        """Test a start after the end falls back to the default charts."""
+        response = client.get(
+            self.report_url, {"start": "2024-02-01", "end": "2024-01-01"}
+        )
+        assert response.status_code == 200
+        assert response.context["form"].errors
+        assert len(response.context["signed_documents_data"]) == 5
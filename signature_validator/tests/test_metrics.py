@@ -0,0 +1,117 @@
+import json
+import os
+import subprocess
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.tests.factories import UserFactory
+from signature_validator.services.metrics import MetricsRegistry, metrics
+
+
+pytestmark = pytest.mark.django_db
+
+PDF_FILE_PATH = f"{settings.TEST_FILES_ROOT}/Test_File_one_person_one_signature.pdf"
+
+
+class TestMetrics:
+    """Test the metrics of the app and their endpoint."""
+
+    metrics_url = reverse("metrics")
+
+    def test_processes_are_aggregated(self, tmp_path):
+        """Test the values of other processes are summed with the live values."""
+        registry = MetricsRegistry(str(tmp_path), flush_interval=3600)
+        registry.inc("documents_validated_total", outcome="valid")
+        registry.observe("validation_seconds", 0.2)
+        (tmp_path / "1.json").write_text(
+            json.dumps(
+                {
+                    "counters": [
+                        ["documents_validated_total", {"outcome": "valid"}, 2]
+                    ],
+                    "histograms": [
+                        ["validation_seconds", {}, [0] * 6 + [1] + [0] * 8, 0.25]
+                    ],
+                }
+            )
+        )
+        text = registry.render()
+        assert 'signature_validator_documents_validated_total{outcome="valid"} 3' in (
+            text
+        )
+        assert 'signature_validator_validation_seconds_bucket{le="0.1"} 0' in text
+        assert 'signature_validator_validation_seconds_bucket{le="0.25"} 2' in text
+        assert 'signature_validator_validation_seconds_bucket{le="+Inf"} 2' in text
+        assert "signature_validator_validation_seconds_sum 0.45" in text
+
+    def test_endpoint_requires_staff_or_token(self, client, settings):
+        """Test the metrics are only served to staff users and the scraper."""
+        settings.METRICS_TOKEN = "scraper-token"
+        assert client.get(self.metrics_url).status_code == 403
+        response = client.get(
+            self.metrics_url, HTTP_AUTHORIZATION="Bearer scraper-token"
+        )
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+
+        client.force_login(UserFactory(is_active=True, is_staff=True))
+        response = client.get(self.metrics_url)
+        assert response.status_code == 200
+        assert b'signature_validator_validation_jobs{status="pending"} 0' in (
+            response.content
+        )
+
+    def test_upload_updates_metrics(self, metrics_dir):
+        """Test a validated upload is counted and its stages are observed."""
+        with open(PDF_FILE_PATH, "rb") as file:
+            response = APIClient().post(
+                reverse("signatures-list"), {"pdf_file": file}, format="multipart"
+            )
+        assert response.status_code == 201
+        metrics.flush()
+        assert list(metrics_dir.glob("*.json"))
+        text = metrics.render()
+        assert "signature_validator_documents_validated_total" in text
+        assert 'validation_stage_seconds_count{stage="persist"}' in text
+
+    def test_updates_are_written_in_the_background(self, tmp_path):
+        """Test an update does not write the file of the process itself."""
+        registry = MetricsRegistry(str(tmp_path), flush_interval=3600)
+        registry.inc("documents_validated_total", outcome="valid")
+        assert registry.flusher.is_alive()
+        assert not list(tmp_path.glob("*.json"))
+        registry.flush()
+        assert [path.name for path in tmp_path.glob("*.json")] == [
+            os.path.basename(registry.path)
+        ]
+
+    def test_values_of_dead_processes_are_archived(self, tmp_path):
+        """Test files of exited processes are moved to the archive, not lost."""
+        exited = subprocess.Popen(["true"])
+        exited.wait()
+        registry = MetricsRegistry(str(tmp_path), flush_interval=3600)
+        # a process of the host that died without archiving its values
+        (tmp_path / f"{registry.host}-{exited.pid}-dead.json").write_text(
+            json.dumps(
+                {
+                    "counters": [
+                        ["documents_validated_total", {"outcome": "valid"}, 2]
+                    ],
+                    "histograms": [],
+                }
+            )
+        )
+        exiting = MetricsRegistry(str(tmp_path), flush_interval=3600)
+        exiting.inc("documents_validated_total", outcome="valid")
+        exiting.flush()
+        exiting.mark_process_dead()
+
+        registry.inc("documents_validated_total", outcome="valid")
+        counters, _ = registry.collect()
+        assert counters[("documents_validated_total", (("outcome", "valid"),))] == 4
+        assert sorted(path.name for path in tmp_path.glob("*.json")) == ["archive.json"]
+        counters, _ = registry.collect()
+        assert counters[("documents_validated_total", (("outcome", "valid"),))] == 4
@@ -0,0 +1,102 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.tests.factories import UserFactory
+from signature_validator.models import (
+    PdfDocumentValidator,
+    SignatureValidator,
+    ValidationJob,
+)
+
+
+pytestmark = pytest.mark.django_db
+
+
+def get_app_queries(client, url: str) -> tuple:
+    """Get the page and the queries of the pages.
+
+    The queries of the session and of the user of the request, e.g. its
+    signer profile shown by the navbar, are not cached by the pages.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return response, [
+        query["sql"]
+        for query in queries
+        if (
+            "signature_validator_" in query["sql"]
+            or "accounts_signeruser" in query["sql"]
+        )
+        and '"accounts_signeruser"."user_id" =' not in query["sql"]
+    ]
+
+
+@pytest.fixture
+def document():
+    """Return a validated document with one signature."""
+    document = PdfDocumentValidator.objects.create(
+        pdf_file=SimpleUploadedFile("sample.pdf", b"%PDF-1.4"), is_signed=True
+    )
+    SignatureValidator.objects.create(
+        pdf_document_validator=document,
+        signature_name="Signature 1",
+        signing_time=timezone.now(),
+    )
+    return document
+
+
+class TestPageCache:
+    """Test the cached pages and their invalidation."""
+
+    def test_result_page_is_cached_until_saved(
+        self, authenticated_signer_client, document
+    ):
+        """Test a repeat view of a result page does not query the documents."""
+        url = reverse("signature-validator-view:pdf-result", kwargs={"pk": document.pk})
+        response, queries = get_app_queries(authenticated_signer_client, url)
+        assert response.status_code == 200
+        assert len(queries) == 2
+        response, queries = get_app_queries(authenticated_signer_client, url)
+        assert queries == []
+        assert response.context["pdf_restult"].signaturevalidator_set.count() == 1
+        assert response.context["validation_job"] is None
+
+        ValidationJob.objects.create(pdf_document_validator=document)
+        response, queries = get_app_queries(authenticated_signer_client, url)
+        assert queries
+        assert response.context["validation_job"].status == ValidationJob.PENDING
+        assert b"The PDF is being validated." in response.content
+
+    def test_report_is_cached_until_the_rollup_changes(self, client, document):
+        """Test a repeat view of the report does not query the rollup."""
+        url = reverse("signature-validator-view:report")
+        response, queries = get_app_queries(client, url)
+        assert response.context["pdf_docs_tested"] == 1
+        response, queries = get_app_queries(client, url)
+        assert queries == []
+
+        PdfDocumentValidator.objects.create(
+            pdf_file=SimpleUploadedFile("other.pdf", b"%PDF-1.4")
+        )
+        response, queries = get_app_queries(client, url)
+        assert response.context["pdf_docs_tested"] == 2
+
+    def test_signer_list_is_cached_until_a_signer_changes(self, client):
+        """Test the signer list shows a signer once it is activated."""
+        url = reverse("accounts:signers")
+        signer = UserFactory(username="signer", email="signer@example.com").signer_user
+        response, queries = get_app_queries(client, url)
+        assert list(response.context["signers"]) == []
+        response, queries = get_app_queries(client, url)
+        assert queries == []
+
+        signer.active = True
+        signer.profile_image.name = "profile_images/signer.png"
+        signer.save()
+        response, queries = get_app_queries(client, url)
+        assert list(response.context["signers"]) == [signer]
+        assert response.context["paginator"].count == 1
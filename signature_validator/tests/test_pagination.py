@@ -0,0 +1,197 @@
+import base64
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from signature_validator.models import PdfDocumentValidator, SignatureValidator
+from signature_validator.pagination import InvalidCursor, KeysetPaginator
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def documents(activated_user_signer_type) -> list:
+    """Return 25 documents of the user, latest first, 5 of them created together."""
+    documents = [
+        PdfDocumentValidator.objects.create(
+            pdf_file=SimpleUploadedFile(f"{index}.pdf", b"%PDF-1.4"),
+            user=activated_user_signer_type,
+        )
+        for index in range(25)
+    ]
+    PdfDocumentValidator.objects.filter(
+        pk__in=[document.pk for document in documents[10:15]]
+    ).update(created=timezone.now())
+    return list(
+        PdfDocumentValidator.objects.filter(user=activated_user_signer_type).order_by(
+            "-created", "-id"
+        )
+    )
+
+
+class TestKeysetPaginator:
+    """Test the KeysetPaginator."""
+
+    def test_walk_forward_and_back(self, documents):
+        """Test every document is on exactly one page, in both directions."""
+        paginator = KeysetPaginator(PdfDocumentValidator.objects.all(), 10)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        assert [len(page) for page in pages] == [10, 10, 5]
+        assert [obj for page in pages for obj in page] == documents
+        assert not pages[0].has_previous()
+
+        previous = paginator.get_page(pages[-1].previous_cursor)
+        assert previous.object_list == pages[1].object_list
+        first = paginator.get_page(previous.previous_cursor)
+        assert first.object_list == pages[0].object_list
+        assert not first.has_previous()
+        assert first.next_cursor == pages[0].next_cursor
+
+    def test_invalid_cursor(self):
+        """Test a cursor not made by the paginator is rejected."""
+        paginator = KeysetPaginator(PdfDocumentValidator.objects.all(), 10)
+        for cursor in ("not-a-cursor", "W1sieCJdLGZhbHNlXQ"):
+            with pytest.raises(InvalidCursor):
+                paginator.get_page(cursor)
+
+    @pytest.mark.parametrize(
+        "position",
+        [
+            [[None, None], False],
+            [["2026-10-18T00:00:00+00:00", [1]], False],
+            [["2026-10-18T00:00:00+00:00", {"id": 1}], False],
+            [{"created": "2026-10-18T00:00:00+00:00", "id": 1}, False],
+            [["2026-10-18T00:00:00+00:00", 1], None],
+        ],
+    )
+    def test_cursor_with_invalid_values(self, position):
+        """Test a crafted cursor with null or non-scalar values is rejected."""
+        paginator = KeysetPaginator(PdfDocumentValidator.objects.all(), 10)
+        cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        with pytest.raises(InvalidCursor):
+            paginator.get_page(cursor)
+
+
+class TestValidatedPDFListView:
+    """Test the keyset pagination of the ValidatedPDFListView."""
+
+    list_url = reverse("signature-validator-view:validated-pdf-list")
+
+    def test_pages_without_count(self, authenticated_signer_client, documents):
+        """Test a deep page is read with the same queries and without a count."""
+        response = authenticated_signer_client.get(self.list_url)
+        assert list(response.context["pdf_list"]) == documents[:10]
+        cursor = response.context["page_obj"].next_cursor
+        assert f"cursor={cursor}".encode() in response.content
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_signer_client.get(
+                self.list_url, {"cursor": cursor}
+            )
+        assert list(response.context["pdf_list"]) == documents[10:20]
+        assert not any("COUNT(" in query["sql"] for query in queries)
+        assert not any("OFFSET" in query["sql"] for query in queries)
+
+    def test_optional_count(self, authenticated_signer_client, documents):
+        """Test the total is counted for ?count=1."""
+        response = authenticated_signer_client.get(self.list_url, {"count": 1})
+        assert response.context["count"] == 25
+        assert b"25 in total" in response.content
+
+    def test_invalid_cursor(self, authenticated_signer_client):
+        """Test an invalid cursor is not found."""
+        response = authenticated_signer_client.get(self.list_url, {"cursor": "x"})
+        assert response.status_code == 404
+        null_cursor = base64.urlsafe_b64encode(b"[[null,null],false]").decode()
+        response = authenticated_signer_client.get(
+            self.list_url, {"cursor": null_cursor}
+        )
+        assert response.status_code == 404
+
+
+class TestMineApi:
+    """Test the keyset pagination of the documents of the user in the API."""
+
+    mine_url = reverse("signatures-mine")
+
+    def test_follow_next_links(self, authenticated_signer_client, documents):
+        """Test the next links walk every document once, keeping the count."""
+        response = authenticated_signer_client.get(self.mine_url, {"count": "true"})
+        assert response.data["count"] == 25
+        ids = [result["id"] for result in response.data["results"]]
+        while response.data["next"]:
+            response = authenticated_signer_client.get(response.data["next"])
+            assert response.data["count"] == 25
+            ids.extend(result["id"] for result in response.data["results"])
+        assert ids == [document.pk for document in documents]
+
+    def test_requires_authentication(self, client):
+        """Test anonymous users have no documents to list."""
+        response = client.get(self.mine_url)
+        assert response.status_code in (401, 403)
+
+
+class TestPdfValidateList:
+    """Test the list of the PdfValidateViewSet."""
+
+    list_url = reverse("signatures-list")
+
+    def add_signatures(self, documents: list):
+        """Add two signatures to every document."""
+        SignatureValidator.objects.bulk_create(
+            SignatureValidator(
+                pdf_document_validator=document,
+                signature_name=f"Signature {index}",
+                signing_time=timezone.now(),
+            )
+            for document in documents
+            for index in (1, 2)
+        )
+
+    def test_fixed_number_of_queries(self, client, documents):
+        """Test a page takes the same queries whatever its signatures."""
+        self.add_signatures(documents)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.list_url, {"page_size": 20})
+        assert response.status_code == 200
+        assert len(response.data["results"]) == 20
+        assert len(response.data["results"][0]["validated_list"]) == 2
+        assert len(queries) == 2
+        assert response.data["next"]
+
+    def test_sparse_fields(self, client, documents):
+        """Test only the fields asked for are returned, without the signatures."""
+        self.add_signatures(documents)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.list_url, {"fields": "id,is_signed"})
+        assert response.data["results"][0] == {
+            "id": documents[0].pk,
+            "is_signed": False,
+        }
+        assert len(queries) == 1
+
+        response = client.get(self.list_url, {"fields": "id,public_key"})
+        assert response.status_code == 400
+
+    def test_filters(self, client, documents):
+        """Test the documents are filtered by their indexed fields."""
+        PdfDocumentValidator.objects.filter(pk=documents[3].pk).update(is_signed=True)
+        response = client.get(self.list_url, {"is_signed": "true", "fields": "id"})
+        assert response.data["results"] == [{"id": documents[3].pk}]
+
+        created = documents[10].created
+        response = client.get(
+            self.list_url,
+            {"created_after": created.isoformat(), "page_size": 100, "fields": "id"},
+        )
+        assert [result["id"] for result in response.data["results"]] == [
+            document.pk for document in documents if document.created >= created
+        ]
@@ -0,0 +1,366 @@
+import hashlib
+import pickle
+from concurrent.futures import Future
+
+import pytest
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from signature_validator.models import ValidationResult
+from signature_validator.services.batch_validation_service import (
+    BatchValidationService,
+    get_process_pool,
+    validate_source,
+)
+from signature_validator.services.byte_range_hasher import ByteRangeHasher
+from signature_validator.services.certificate_cache import certificate_cache
+from signature_validator.services.pdf_signature_scanner import (
+    PdfScanError,
+    PdfSignatureScanner,
+)
+from signature_validator.services.pdf_validation_service import (
+    PdfSignatureValidator,
+    signature_result_cache,
+)
+from signature_validator.services.validation_cache_service import (
+    ValidationResultCache,
+)
+from signature_validator.tests.pdf_generator import SignedPdfGenerator
+
+
+SIGNED_PDF_FILES = [
+    "Test_File_one_person_one_signature",
+    "Test_File_one_person_one_signature_changed",
+    "test_one_person_three_signatures",
+    "test_one_person_three_signatures_changed",
+    "test_two_person_two_sig",
+    "test_two_person_many_sig",
+    "test_file_no_signature",
+]
+
+
+def validate(pdf_file, **kwargs) -> PdfSignatureValidator:
+    """Validate a test file with the given validator options."""
+    validator = PdfSignatureValidator(
+        f"{settings.TEST_FILES_ROOT}/{pdf_file}.pdf", **kwargs
+    )
+    validator.validate()
+    return validator
+
+
+class TestPdfSignatureValidator:
+    """Test the PdfSignatureValidator service."""
+
+    @pytest.mark.parametrize("pdf_file", SIGNED_PDF_FILES)
+    def test_mmap_mode_matches_in_memory_mode(self, pdf_file):
+        """Test memory-mapped hashing gives the same result as in-memory hashing."""
+        in_memory = validate(pdf_file)
+        mapped = validate(pdf_file, use_mmap=True)
+        assert mapped.__dict__()["validated_data_list"] == (
+            in_memory.__dict__()["validated_data_list"]
+        )
+        assert mapped.is_signed == in_memory.is_signed
+        assert mapped.is_hashes_valid == in_memory.is_hashes_valid
+        assert mapped.is_signatures_valid == in_memory.is_signatures_valid
+        # the memory map is released once the validation is done
+        assert mapped.pdf_bytes is None
+
+    @pytest.mark.parametrize("pdf_file", SIGNED_PDF_FILES)
+    def test_fast_scan_matches_pypdf(self, pdf_file):
+        """Test the signature-only scanner finds the same signatures as pypdf."""
+        pypdf_validator = validate(pdf_file)
+        scanned = validate(pdf_file, use_mmap=True, fast_scan=True)
+        assert scanned.__dict__()["validated_data_list"] == (
+            pypdf_validator.__dict__()["validated_data_list"]
+        )
+        assert scanned.is_signed == pypdf_validator.is_signed
+        assert scanned.is_hashes_valid == pypdf_validator.is_hashes_valid
+        assert scanned.is_signatures_valid == pypdf_validator.is_signatures_valid
+
+    def test_fast_scan_falls_back_to_pypdf_for_broken_xref(self, tmp_path):
+        """Test a broken startxref offset makes the scanner fall back to pypdf."""
+        pdf_file = "Test_File_one_person_one_signature"
+        with open(f"{settings.TEST_FILES_ROOT}/{pdf_file}.pdf", "rb") as file:
+            pdf_bytes = file.read()
+        start = pdf_bytes.rindex(b"startxref")
+        broken_pdf = tmp_path / "broken.pdf"
+        broken_pdf.write_bytes(pdf_bytes[:start] + b"startxref\n1\n%%EOF\n")
+        with pytest.raises(PdfScanError):
+            PdfSignatureScanner(broken_pdf.read_bytes()).get_fields()
+
+        validator = PdfSignatureValidator(str(broken_pdf), fast_scan=True)
+        validator.validate()
+        assert validator.is_signed
+        assert len(validator.validated_data_list) == 1
+
+    def test_malformed_signer_info_is_not_verified(self, tmp_path):
+        """Test a signer info that cannot be decoded fails its signature only."""
+        pdf_file = "Test_File_one_person_one_signature"
+        with open(f"{settings.TEST_FILES_ROOT}/{pdf_file}.pdf", "rb") as file:
+            pdf_bytes = file.read()
+        # the last SHA-256 algorithm identifier of the hex contents is the
+        # digest algorithm of the signer info, tag it as an octet string
+        sha256_oid = b"0609608648016503040201"
+        start = pdf_bytes.rindex(sha256_oid)
+        broken_pdf = tmp_path / "broken.pdf"
+        broken_pdf.write_bytes(
+            pdf_bytes[:start] + b"04" + pdf_bytes[start:].removeprefix(b"06")
+        )
+
+        validator = PdfSignatureValidator(str(broken_pdf))
+        validator.validate()
+        assert validator.is_signed
+        assert len(validator.validated_data_list) == 1
+        assert "hash_valid" not in validator.validated_data_list[0]
+        assert validator.is_hashes_valid is False
+
+    @pytest.mark.parametrize(
+        "pdf_file", ["test_one_person_three_signatures", "test_two_person_many_sig"]
+    )
+    def test_thread_pool_keeps_field_order(self, pdf_file):
+        """Test signatures verified on a thread pool are returned in field order."""
+        sequential = validate(pdf_file)
+        parallel = validate(pdf_file, max_workers=4)
+        assert parallel.validated_data_list == sequential.validated_data_list
+        assert parallel.is_hashes_valid == sequential.is_hashes_valid
+        assert parallel.is_signatures_valid == sequential.is_signatures_valid
+
+    def test_stage_timings_are_recorded(self):
+        """Test the time spent in every stage of a validation is recorded."""
+        signature_result_cache.clear()
+        validator = validate("test_one_person_three_signatures")
+        timings = validator.timings.as_dict()
+        assert list(timings) == [
+            "read",
+            "parse",
+            "cms_decode",
+            "hash",
+            "key_load",
+            "rsa_verify",
+        ]
+        assert all(milliseconds >= 0 for milliseconds in timings.values())
+
+    def test_validate_many_isolates_errors(self):
+        """Test batch validation of paths and bytes with a failing document."""
+        sources = [
+            f"{settings.TEST_FILES_ROOT}/{name}.pdf" for name in SIGNED_PDF_FILES
+        ]
+        with open(sources[0], "rb") as file:
+            sources.append(file.read())
+        sources.append(f"{settings.TEST_FILES_ROOT}/missing.pdf")
+
+        results = list(
+            PdfSignatureValidator.validate_many(
+                sources, max_processes=2, max_in_flight=3
+            )
+        )
+        results = {result["index"]: result for result in results}
+        assert sorted(results) == list(range(len(sources)))
+        for index, pdf_file in enumerate(SIGNED_PDF_FILES):
+            expected = validate(pdf_file)
+            assert results[index]["error"] is None
+            assert results[index]["is_signed"] == expected.is_signed
+            assert results[index]["is_hashes_valid"] == expected.is_hashes_valid
+            assert results[index]["validated_data_list"] == (
+                expected.validated_data_list
+            )
+        in_memory = results[len(SIGNED_PDF_FILES)]
+        assert in_memory["error"] is None
+        assert in_memory["file_path"] is None
+        assert in_memory["validated_data_list"] == results[0]["validated_data_list"]
+        assert results[len(sources) - 1]["error"].startswith("FileNotFoundError")
+
+    def test_futures_the_pool_did_not_run_are_errors(self):
+        """Test cancelled and failed futures become error results."""
+        cancelled = Future()
+        cancelled.cancel()
+        failed = Future()
+        failed.set_exception(pickle.PicklingError("Can't pickle the source"))
+        for index, future in enumerate((cancelled, failed)):
+            result = BatchValidationService.get_result(future, index, "sample.pdf")
+            assert result["index"] == index
+            assert result["file_path"] == "sample.pdf"
+            assert not result["is_signed"]
+        assert BatchValidationService.get_result(cancelled, 0, b"")["error"] == (
+            "CancelledError: "
+        )
+        assert BatchValidationService.get_result(failed, 1, b"")["error"] == (
+            "PicklingError: Can't pickle the source"
+        )
+
+    def test_resized_pool_finishes_submitted_documents(self):
+        """Test replacing the shared pool does not cancel the futures of others."""
+        source = f"{settings.TEST_FILES_ROOT}/{SIGNED_PDF_FILES[0]}.pdf"
+        future = get_process_pool(1).submit(
+            validate_source, source, settings.PDF_VALIDATOR_OPTIONS
+        )
+        get_process_pool(2)
+        assert future.result()["error"] is None
+        assert not future.cancelled()
+
+    def test_earlier_revision_signatures_are_verified_once(self, tmp_path, monkeypatch):
+        """Test a countersigned document only verifies its new signatures."""
+        pdf_file = f"{settings.TEST_FILES_ROOT}/test_one_person_three_signatures.pdf"
+        with open(pdf_file, "rb") as file:
+            pdf_bytes = file.read()
+        signature_result_cache.clear()
+        full = PdfSignatureValidator(pdf_file)
+        full.validate()
+        # the file as it was before the second signature was added
+        byte_range = full.get_signatures(full.get_fields())[0]["byte_range"]
+        first_revision = tmp_path / "first_revision.pdf"
+        first_revision.write_bytes(pdf_bytes[: byte_range[2] + byte_range[3]])
+        signature_result_cache.clear()
+
+        revision = PdfSignatureValidator(str(first_revision))
+        revision.validate()
+        assert len(revision.validated_data_list) == 1
+        verified = []
+        verify_parsed_signature = PdfSignatureValidator.verify_parsed_signature
+
+        def count_verifications(validator, *args, **kwargs):
+            verified.append(args[2])
+            return verify_parsed_signature(validator, *args, **kwargs)
+
+        monkeypatch.setattr(
+            PdfSignatureValidator, "verify_parsed_signature", count_verifications
+        )
+        countersigned = PdfSignatureValidator(pdf_file)
+        countersigned.validate()
+        assert len(verified) == 2
+        assert countersigned.validated_data_list == full.validated_data_list
+        assert countersigned.validated_data_list[0] == revision.validated_data_list[0]
+        assert countersigned.is_hashes_valid == full.is_hashes_valid
+        assert countersigned.is_signatures_valid == full.is_signatures_valid
+
+    @pytest.mark.parametrize(
+        "digest_algorithm, embedded_certificates, signatures",
+        [("sha1", 1, 1), ("sha256", 3, 5), ("sha512", 2, 12)],
+    )
+    def test_synthetic_benchmark_pdfs_are_valid(
+        self, tmp_path, digest_algorithm, embedded_certificates, signatures
+    ):
+        """Test the PDFs of the benchmark corpus validate in every mode."""
+        pdf_path = tmp_path / "synthetic.pdf"
+        generator = SignedPdfGenerator(digest_algorithm, embedded_certificates)
+        generator.write(pdf_path, 64 * 1024, signatures)
+        for options in ({}, {"use_mmap": True, "fast_scan": True, "max_workers": 4}):
+            validator = PdfSignatureValidator(str(pdf_path), **options)
+            validator.validate()
+            assert validator.is_hashes_valid
+            assert validator.is_signatures_valid
+            assert len(validator.validated_data_list) == signatures
+            assert {
+                data["digest_algorithm"] for data in validator.validated_data_list
+            } == {digest_algorithm}
+
+
+class TestByteRangeHasher:
+    """Test the single pass ByteRangeHasher."""
+
+    @staticmethod
+    def hash_slices(pdf_bytes, br, digest_algorithm):
+        """Hash a byte range the naive way by joining the slices."""
+        first_section = pdf_bytes[br[0] : br[0] + br[1]]  # noqa
+        second_section = pdf_bytes[br[2] : br[2] + br[3]]  # noqa
+        data = first_section + second_section
+        return hashlib.new(digest_algorithm, data).digest()
+
+    def test_digests_match_naive_hashing(self):
+        """Test forked prefix digests match hashing each byte range separately."""
+        pdf_bytes = bytes(range(256)) * 4096
+        byte_ranges = [
+            [0, 1000, 1200, 5000],
+            [0, 300000, 300500, 10],
+            [0, 700000, 700100, 348476],
+            # not starting at 0 and running past the end of the file
+            [50, 100, 200, 2000000],
+            # empty second section
+            [0, 5, 5, 0],
+        ]
+        hasher = ByteRangeHasher(pdf_bytes)
+        for index, br in enumerate(byte_ranges):
+            hasher.add(index, br, ["sha256", "sha1"])
+        digests = hasher.digests()
+        for index, br in enumerate(byte_ranges):
+            for digest_algorithm in ("sha256", "sha1"):
+                assert digests[index][digest_algorithm] == self.hash_slices(
+                    pdf_bytes, br, digest_algorithm
+                )
+        # the shared prefix is hashed once per algorithm, not once per signature
+        assert hasher.bytes_hashed < 2 * len(pdf_bytes)
+
+    def test_unknown_digest_algorithm_is_skipped(self):
+        """Test an unknown digest algorithm gives no digest instead of failing."""
+        hasher = ByteRangeHasher(b"%PDF-1.7")
+        hasher.add("signature", [0, 2, 4, 4], ["sha256", "not_a_digest"])
+        digests = hasher.digests()
+        assert set(digests["signature"]) == {"sha256"}
+
+
+class TestCertificateCache:
+    """Test the fingerprint keyed certificate cache."""
+
+    def test_recurring_certificate_is_loaded_once(self):
+        """Test the certificate of a signer is parsed once for all signatures."""
+        certificate_cache.clear()
+        signature_result_cache.clear()
+        validator = validate("test_one_person_three_signatures")
+        assert len(validator.validated_data_list) == 3
+        stats = certificate_cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+        assert stats["size"] == 1
+
+    @pytest.mark.django_db
+    def test_warm_from_signers(self, signer):
+        """Test warming the cache from the certificates of the active signers."""
+        cert_file_name = "CertExchangechanukachathuranga.cer"
+        with open(f"{settings.TEST_FILES_ROOT}/{cert_file_name}", "rb") as cert_file:
+            signer.certificate = SimpleUploadedFile(cert_file_name, cert_file.read())
+        signer.save()
+        certificate_cache.clear()
+        signature_result_cache.clear()
+
+        assert certificate_cache.warm_from_signers() == 1
+        validator = validate("Test_File_one_person_one_signature")
+        assert validator.validated_data_list[0]["public_key"]
+        stats = certificate_cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+
+
+@pytest.mark.django_db
+class TestValidationResultCache:
+    """Test the content-addressed validation result cache."""
+
+    pdf_path = f"{settings.TEST_FILES_ROOT}/test_two_person_two_sig.pdf"
+
+    def test_identical_document_is_validated_once(self, monkeypatch):
+        """Test a second upload of the same document reuses the stored result."""
+        cache = ValidationResultCache(maxsize=8)
+        first = cache.validate(self.pdf_path)
+        assert ValidationResult.objects.count() == 1
+
+        # a fresh worker only has the database tier
+        cache = ValidationResultCache(maxsize=8)
+        monkeypatch.setattr(
+            PdfSignatureValidator,
+            "validate",
+            lambda validator: pytest.fail("document validated again"),
+        )
+        second = cache.validate(self.pdf_path)
+        assert second.__dict__() == first.__dict__()
+        assert cache.memory.stats()["misses"] == 1
+        assert cache.validate(self.pdf_path).__dict__() == first.__dict__()
+        assert cache.memory.stats()["hits"] == 1
+
+    def test_policy_version_change_invalidates_results(self, settings):
+        """Test results of another policy version are neither used nor kept."""
+        cache = ValidationResultCache(maxsize=8)
+        cache.validate(self.pdf_path)
+        settings.VALIDATION_POLICY_VERSION = "2"
+        cache.validate(self.pdf_path)
+        assert ValidationResult.objects.count() == 2
+        assert cache.delete_stale() == 1
+        assert ValidationResult.objects.get().policy_version == cache.policy_version
@@ -0,0 +1,62 @@
+import re
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+
+from validator import middleware
+
+
+pytestmark = pytest.mark.django_db
+
+PDF_FILE_PATH = f"{settings.TEST_FILES_ROOT}/Test_File_one_person_one_signature.pdf"
+
+
+def get_durations(response) -> dict:
+    """Get the durations of the Server-Timing header of the response."""
+    return {
+        name: float(duration)
+        for name, duration in re.findall(
+            r"(\w+);dur=([\d.]+)", response["Server-Timing"]
+        )
+    }
+
+
+class TestServerTimingMiddleware:
+    """Test the Server-Timing header and the slow request log."""
+
+    def test_page_reports_queries_and_template(self, authenticated_signer_client):
+        """Test a page reports its queries and template rendering."""
+        response = authenticated_signer_client.get(
+            reverse("signature-validator-view:report")
+        )
+        assert response.status_code == 200
+        assert re.search(
+            r'sql;dur=[\d.]+;desc="[1-9]\d* queries"', response["Server-Timing"]
+        )
+        durations = get_durations(response)
+        assert durations["template"] > 0
+        assert durations["validation"] == 0
+        assert durations["total"] >= durations["template"]
+
+    def test_upload_reports_validation(self, authenticated_signer_client):
+        """Test an upload reports the time of the validation engine."""
+        with open(PDF_FILE_PATH, "rb") as file:
+            response = authenticated_signer_client.post(
+                reverse("signature-validator-view:validate-signature"),
+                {"pdf_file": file},
+            )
+        assert response.status_code == 302
+        assert get_durations(response)["validation"] > 0
+
+    def test_slow_request_is_logged_with_queries(
+        self, authenticated_signer_client, settings, monkeypatch
+    ):
+        """Test a request over the threshold is logged with its queries."""
+        settings.SLOW_REQUEST_THRESHOLD = 0
+        messages = []
+        monkeypatch.setattr(middleware.logger, "warning", messages.append)
+        authenticated_signer_client.get(reverse("signature-validator-view:report"))
+        assert len(messages) == 1
+        assert messages[0].startswith("Slow request GET /report took")
+        assert re.search(r"ms x\d+ SELECT", messages[0])
@@ -0,0 +1,198 @@
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from signature_validator.models import (
+    PdfDocumentValidator,
+    SignatureValidator,
+    ValidationJob,
+)
+from signature_validator.services.document_validation_service import (
+    DocumentValidationService,
+)
+from signature_validator.services.validation_job_service import (
+    JobHeartbeat,
+    ValidationWorker,
+)
+
+
+pytestmark = pytest.mark.django_db
+
+PDF_FILE_PATH = f"{settings.TEST_FILES_ROOT}/Test_File_one_person_one_signature.pdf"
+
+
+@pytest.fixture
+def async_validation(settings):
+    """Queue uploads as validation jobs."""
+    settings.VALIDATION_JOBS_ASYNC = True
+
+
+class TestValidationJobs:
+    """Test the queued validation of uploaded documents."""
+
+    validate_url = reverse("signature-validator-view:validate-signature")
+
+    def test_upload_is_validated_by_worker(
+        self,
+        authenticated_signer_client,
+        async_validation,
+        mailoutbox,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test the upload returns at once and the worker validates it."""
+        with open(PDF_FILE_PATH, "rb") as file:
+            response = authenticated_signer_client.post(
+                self.validate_url, {"pdf_file": file}, format="multipart"
+            )
+        pdf_validator = PdfDocumentValidator.objects.get()
+        assert response.status_code == 302
+        assert response.url == pdf_validator.get_absolute_url()
+        assert not pdf_validator.is_signed
+        assert pdf_validator.validation_job.status == ValidationJob.PENDING
+
+        response = authenticated_signer_client.get(response.url)
+        assert response.context["validation_job"].status == ValidationJob.PENDING
+        assert b'http-equiv="refresh"' in response.content
+
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command("run_validation_worker", "--burst")
+        pdf_validator.refresh_from_db()
+        assert pdf_validator.validation_job.status == ValidationJob.DONE
+        assert pdf_validator.validation_job.attempts == 1
+        assert pdf_validator.is_signed
+        assert pdf_validator.is_signatures_valid
+        assert pdf_validator.signaturevalidator_set.count() == 1
+        # the invitation is sent by the worker with the link of the upload
+        assert len(mailoutbox) == 1
+        assert "http://testserver/accounts/signup/" in mailoutbox[0].body
+
+        response = authenticated_signer_client.get(pdf_validator.get_absolute_url())
+        assert b'http-equiv="refresh"' not in response.content
+
+    def test_api_upload_returns_job_to_poll(self, async_validation):
+        """Test the API accepts the upload with 202 and reports the job status."""
+        client = APIClient()
+        with open(PDF_FILE_PATH, "rb") as file:
+            response = client.post(
+                reverse("signatures-list"), {"pdf_file": file}, format="multipart"
+            )
+        assert response.status_code == 202
+        assert response.data["status"] == ValidationJob.PENDING
+        status_url = response["Location"]
+
+        assert ValidationWorker().run(burst=True) == 1
+        response = client.get(status_url)
+        assert response.status_code == 200
+        assert response.data["status"] == ValidationJob.DONE
+        assert response.data["document"]["is_signatures_valid"]
+        assert len(response.data["document"]["validated_list"]) == 1
+
+    def test_job_is_claimed_once(self, async_validation):
+        """Test two workers never claim the same job."""
+        client = APIClient()
+        with open(PDF_FILE_PATH, "rb") as file:
+            client.post(reverse("signatures-list"), {"pdf_file": file})
+        job = ValidationWorker("first").claim_job()
+        assert job.status == ValidationJob.RUNNING
+        assert job.claimed_by == "first"
+        assert ValidationWorker("second").claim_job() is None
+
+    def test_failed_job_is_retried_then_failed(
+        self, async_validation, settings, monkeypatch
+    ):
+        """Test a failing job is queued again until it runs out of attempts."""
+        settings.VALIDATION_JOB_MAX_ATTEMPTS = 2
+        client = APIClient()
+        with open(PDF_FILE_PATH, "rb") as file:
+            client.post(reverse("signatures-list"), {"pdf_file": file})
+        job = ValidationJob.objects.get()
+
+        def fail(service):
+            raise FileNotFoundError("PDF file is gone")
+
+        monkeypatch.setattr(DocumentValidationService, "validate", fail)
+
+        assert ValidationWorker().run(burst=True) == 2
+        job.refresh_from_db()
+        assert job.status == ValidationJob.FAILED
+        assert job.attempts == 2
+        assert job.error.startswith("FileNotFoundError")
+
+    def test_job_requeued_while_running_is_finished_once(self, async_validation):
+        """Test a worker that lost the claim of its job does not save its results."""
+        client = APIClient()
+        with open(PDF_FILE_PATH, "rb") as file:
+            client.post(reverse("signatures-list"), {"pdf_file": file})
+        first_job = ValidationWorker("first").claim_job()
+        # the first worker is taken for dead, the job is queued again
+        ValidationJob.objects.update(
+            claimed_at=first_job.claimed_at - timedelta(days=1)
+        )
+        assert ValidationWorker.requeue_stale_jobs() == 1
+        second_job = ValidationWorker("second").claim_job()
+        assert not JobHeartbeat(first_job).beat()
+        assert JobHeartbeat(second_job).beat()
+
+        first_job = ValidationWorker("first").run_job(first_job)
+        assert first_job.status == ValidationJob.RUNNING
+        assert first_job.claimed_by == "second"
+        assert not SignatureValidator.objects.exists()
+
+        second_job = ValidationWorker("second").run_job(second_job)
+        assert second_job.status == ValidationJob.DONE
+        assert SignatureValidator.objects.count() == 1
+
+    def test_results_of_an_earlier_attempt_are_replaced(self, async_validation):
+        """Test the signatures saved by an earlier attempt are not saved twice."""
+        client = APIClient()
+        with open(PDF_FILE_PATH, "rb") as file:
+            client.post(reverse("signatures-list"), {"pdf_file": file})
+        job = ValidationWorker().claim_job()
+        SignatureValidator.objects.create(
+            pdf_document_validator=job.pdf_document_validator,
+            signature_name="Signature 1",
+            signing_time=timezone.now(),
+        )
+        job = ValidationWorker().run_job(job)
+        assert job.status == ValidationJob.DONE
+        assert SignatureValidator.objects.count() == 1
+
+    def test_invitations_are_sent_once_after_a_retry(
+        self,
+        authenticated_signer_client,
+        async_validation,
+        mailoutbox,
+        monkeypatch,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test an attempt failing after saving its results invites nobody."""
+        with open(PDF_FILE_PATH, "rb") as file:
+            authenticated_signer_client.post(
+                self.validate_url, {"pdf_file": file}, format="multipart"
+            )
+        save_verified_signatures = DocumentValidationService.save_verified_signatures
+        attempts = []
+
+        def fail_once(service, validator):
+            pdf_validator = save_verified_signatures(service, validator)
+            attempts.append(pdf_validator)
+            if len(attempts) == 1:
+                raise ConnectionError("Database connection lost")
+            return pdf_validator
+
+        monkeypatch.setattr(
+            DocumentValidationService, "save_verified_signatures", fail_once
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert ValidationWorker().run(burst=True) == 2
+        job = ValidationJob.objects.get()
+        assert job.status == ValidationJob.DONE
+        assert job.attempts == 2
+        assert SignatureValidator.objects.count() == 1
+        assert len(mailoutbox) == 1
@@ -1,10 +1,25 @@
+import hashlib
+from unittest import mock
+
 import pytest
 from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from accounts.models import SignerUser
-from signature_validator.models import PdfDocumentValidator, SignatureValidator
+from signature_validator.models import (
+    Certificate,
+    PdfDocumentValidator,
+    SignatureValidator,
+    ValidationJob,
+    ValidationResult,
+)
+from signature_validator.services.validation_cache_service import (
+    validation_result_cache,
+)
 
 
 pytestmark = pytest.mark.django_db
@@ -55,6 +70,56 @@ class TestValidateSignatureView:
             "Invalid file format, only PDF is allowed."
         ]
 
+    def test_pdf_file_with_trailing_padding_is_validated(
+        self, authenticated_signer_client
+    ):
+        """Test a PDF without the end of file marker in its last bytes is accepted."""
+        pdf_file_path = f"{settings.TEST_FILES_ROOT}/test_two_person_two_sig.pdf"
+        with open(pdf_file_path, "rb") as file:
+            padded = SimpleUploadedFile("padded.pdf", file.read() + b"\0" * 2048)
+        response = authenticated_signer_client.post(
+            self.validate_url, {"pdf_file": padded}, format="multipart"
+        )
+        assert response.status_code == 302
+        pdf_validator = PdfDocumentValidator.objects.get()
+        assert pdf_validator.is_signed
+        assert pdf_validator.signaturevalidator_set.count() == 2
+
+    def test_cached_upload_is_not_queued(self, authenticated_signer_client, settings):
+        """Test an upload found in the result cache as it arrives skips the queue."""
+        pdf_file_path = f"{settings.TEST_FILES_ROOT}/test_two_person_two_sig.pdf"
+        with open(pdf_file_path, "rb") as file:
+            authenticated_signer_client.post(
+                self.validate_url, {"pdf_file": file}, format="multipart"
+            )
+        settings.VALIDATION_JOBS_ASYNC = True
+        with open(pdf_file_path, "rb") as file:
+            response = authenticated_signer_client.post(
+                self.validate_url, {"pdf_file": file}, format="multipart"
+            )
+        assert response.status_code == 302
+        pdf_validator = PdfDocumentValidator.objects.latest("id")
+        assert not ValidationJob.objects.exists()
+        assert pdf_validator.is_signed
+        assert pdf_validator.signaturevalidator_set.count() == 2
+
+    def test_upload_is_hashed_while_received(self, authenticated_signer_client):
+        """Test the result is cached under the hash computed by the upload handler."""
+        pdf_file_path = f"{settings.TEST_FILES_ROOT}/test_two_person_two_sig.pdf"
+        with open(pdf_file_path, "rb") as file:
+            document_hash = hashlib.sha256(file.read()).hexdigest()
+            file.seek(0)
+            with mock.patch(
+                "signature_validator.services.validation_cache_service"
+                ".get_document_hash"
+            ) as get_document_hash:
+                response = authenticated_signer_client.post(
+                    self.validate_url, {"pdf_file": file}, format="multipart"
+                )
+        assert response.status_code == 302
+        get_document_hash.assert_not_called()
+        assert ValidationResult.objects.get().document_hash == document_hash
+
     @pytest.mark.parametrize(
         "pdf_file, signature_count",
         [
@@ -67,15 +132,17 @@ class TestValidateSignatureView:
         authenticated_signer_client,
         activated_user_signer_type,
         mailoutbox,
+        django_capture_on_commit_callbacks,
         pdf_file,
         signature_count,
     ):
         """Test validation of PDF file when signer is not verified."""
         pdf_file_path = f"{settings.TEST_FILES_ROOT}/{pdf_file}.pdf"
         with open(pdf_file_path, "rb") as file:
-            response = authenticated_signer_client.post(
-                self.validate_url, {"pdf_file": file}, format="multipart"
-            )
+            with django_capture_on_commit_callbacks(execute=True):
+                response = authenticated_signer_client.post(
+                    self.validate_url, {"pdf_file": file}, format="multipart"
+                )
             assert response.status_code == 302
             pdf_validator: QuerySet[PdfDocumentValidator] = (
                 PdfDocumentValidator.objects.filter(user=activated_user_signer_type)
@@ -93,6 +160,7 @@ class TestValidateSignatureView:
             assert validator.distinct_people_signed == 1
             assert validator.user == activated_user_signer_type
             assert pdf_file in validator.pdf_file.name
+            assert {"cache_lookup", "persist"} <= set(validator.timings)
 
             signatures: QuerySet[SignatureValidator] = (
                 SignatureValidator.objects.filter(pdf_document_validator=validator)
@@ -313,3 +381,29 @@ class TestValidateSignatureView:
                 assert signature.public_key == signer_user.public_key
             # email should be not be sent to signer of the document as signer already in system
             assert len(mailoutbox) == 0
+
+    def test_queries_do_not_grow_with_signatures(
+        self, authenticated_signer_client, signer
+    ):
+        """Test saving the results takes as many queries for 1 as for 3 signatures."""
+        query_counts = []
+        # the first upload saves the certificate of the signer
+        for pdf_file in (
+            "Test_File_one_person_one_signature",
+            "Test_File_one_person_one_signature",
+            "test_one_person_three_signatures",
+        ):
+            validation_result_cache.memory.clear()
+            ValidationResult.objects.all().delete()
+            with open(f"{settings.TEST_FILES_ROOT}/{pdf_file}.pdf", "rb") as file:
+                with CaptureQueriesContext(connection) as queries:
+                    response = authenticated_signer_client.post(
+                        self.validate_url, {"pdf_file": file}
+                    )
+            assert response.status_code == 302
+            query_counts.append(len(queries))
+        assert query_counts[1] == query_counts[2]
+        assert Certificate.objects.count() == 1
+        validator = PdfDocumentValidator.objects.order_by("pk").last()
+        assert validator.all_signers_verified
+        assert validator.signaturevalidator_set.filter(signer_user=signer).count() == 3
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
+
+# PDF readers look for the end of file marker in the last kilobyte
+EOF_MARKER_WINDOW_SIZE = 1024
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Upload handler hashing the file while the request body arrives.
+
+    The file is streamed to a temporary file, which the storage moves into
+    place instead of copying it. The SHA-256 of the whole file is set on the
+    uploaded file as ``content_sha256`` and its last bytes, holding the
+    trailer and the signature dictionaries of the last revision, as ``tail``.
+
+    Once the file is received ``has_eof_marker`` flags a tail without the end
+    of file marker. Such files may be truncated or padded, they are still
+    validated.
+    """
+
+    def new_file(self, *args, **kwargs):
+        """Start the digest and the tail window of a new file."""
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.tail = bytearray()
+
+    def receive_data_chunk(self, raw_data, start):
+        """Hash the chunk and keep the end of the file seen so far."""
+        self.sha256.update(raw_data)
+        self.tail += raw_data
+        del self.tail[: -settings.UPLOAD_TAIL_WINDOW_SIZE]
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        """Set the digest and the tail window on the uploaded file."""
+        file = super().file_complete(file_size)
+        file.content_sha256 = self.sha256.hexdigest()
+        file.tail = bytes(self.tail)
+        file.has_eof_marker = b"%%EOF" in file.tail[-EOF_MARKER_WINDOW_SIZE:]
+        if not file.has_eof_marker:
+            logger.info(f"Upload {file.name} has no end of file marker in its tail")
+        return file
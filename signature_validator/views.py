@@ -1,28 +1,48 @@
 # -*- coding: utf-8 -*-
+import hmac
 from datetime import timedelta
+from functools import partial
 
 import pdfkit
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import QuerySet
+from django.db.models import Count, Prefetch
+from django.views import View
 from django.views.generic import CreateView, DetailView, ListView, TemplateView
 
-from accounts.models import CustomUser, SignerUser
-
-from .forms import PdfValidateForm
-from .models import PdfDocumentValidator
+from validator.cache import cached, get_query_key
+from .cache import REPORT_NAMESPACE, get_result_namespace
+from .forms import PdfValidateForm, ReportRangeForm
+from .models import PdfDocumentValidator, SignatureValidator, ValidationJob
+from .pagination import InvalidCursor, KeysetPaginator, is_count_requested
+from .services.daily_stat_service import DailyStatService
+from .services.metrics import metrics
+from .upload_handlers import HashingUploadHandler
 
 
+@method_decorator(csrf_exempt, name="dispatch")
 class ValidateSignatureView(LoginRequiredMixin, CreateView):
     """View to validate the signature of the PDF."""
 
     form_class = PdfValidateForm
     template_name = "signature_validator/home.html"
 
+    def dispatch(self, request, *args, **kwargs):
+        """Hash the upload while it arrives, then check the CSRF token.
+
+        The upload handlers must be set before the CSRF middleware reads the
+        request body, so the CSRF check is done here instead.
+        """
+        request.upload_handlers = [HashingUploadHandler(request)]
+        return csrf_protect(super().dispatch)(request, *args, **kwargs)
+
     def get_success_url(self):
         """Get the success URL."""
         return self.object.get_absolute_url()
@@ -34,29 +54,64 @@ class ValidateSignatureView(LoginRequiredMixin, CreateView):
         return kwargs
 
 
-class PDFResultView(LoginRequiredMixin, DetailView):
-    """View to show the result of the PDF validation."""
+class PdfResultMixin:
+    """Get the document of a result page with its signatures from the cache.
+
+    The document is cached with its signatures and validation job until one
+    of them is saved, see ``get_result_namespace()``.
+    """
 
     model = PdfDocumentValidator
+
+    def get_queryset(self):
+        """Get the documents with everything the result templates show."""
+        return PdfDocumentValidator.objects.select_related(
+            "validation_job"
+        ).prefetch_related(
+            Prefetch(
+                "signaturevalidator_set",
+                queryset=SignatureValidator.objects.select_related("signer_user"),
+            )
+        )
+
+    def get_object(self, queryset=None):
+        """Get the document from the cache, or from the database on a miss."""
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        return cached(
+            (get_result_namespace(pk),),
+            f"pdf-result:{pk}",
+            partial(super().get_object, queryset),
+        )
+
+
+class PDFResultView(LoginRequiredMixin, PdfResultMixin, DetailView):
+    """View to show the result of the PDF validation."""
+
     template_name = "signature_validator/pdf_result.html"
+    # seconds between reloads of the page while the document is validated
+    poll_interval = 2
 
     def get_context_data(self, **kwargs):
         """Get the context data to template."""
         context = super().get_context_data(**kwargs)
-        context["pdf_restult"] = self.get_object()
+        context["pdf_restult"] = self.object
+        try:
+            context["validation_job"] = self.object.validation_job
+        except ValidationJob.DoesNotExist:
+            context["validation_job"] = None
+        context["poll_interval"] = self.poll_interval
         return context
 
 
-class PDFResultReportView(DetailView):
+class PDFResultReportView(PdfResultMixin, DetailView):
     """View to show the result of the PDF validation."""
 
-    model = PdfDocumentValidator
     template_name = "signature_validator/pdf_validation_report_with_styles.html"
 
     def get_context_data(self, **kwargs):
         """Get the context data to template."""
         context = super().get_context_data(**kwargs)
-        context["pdf_restult"] = self.get_object()
+        context["pdf_restult"] = self.object
         return context
 
 
@@ -71,71 +126,95 @@ class ValidatedPDFListView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         """Get the queryset for the view filtered by logged in user."""
         return PdfDocumentValidator.objects.filter(user=self.request.user).order_by(
-            "-created"
+            "-created", "-id"
         )
 
+    def paginate_queryset(self, queryset, page_size):
+        """Get the page of the ``cursor`` of the query string.
+
+        Pages are read after the cursor instead of at an offset, the total is
+        only counted for ``?count=1``.
+        """
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.get_page(self.request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Invalid cursor")
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        """Get the context data with the total count when it is asked for."""
+        context = super().get_context_data(**kwargs)
+        context["show_count"] = is_count_requested(self.request.GET)
+        if context["show_count"]:
+            context["count"] = context["paginator"].count
+        return context
+
 
 class ReportView(TemplateView):
     """View to show the report of the validated PDFs."""
 
     template_name = "signature_validator/report.html"
 
+    # days of each chart without a range, the latest day first
+    signed_documents_days = 5
+    users_days = 6
+
     def get_context_data(self, **kwargs):
-        """Get the context data for the view."""
+        """Get the context data for the view.
+
+        The totals and charts are read from the daily rollup, in one query
+        each, and cached until it changes. The charts show the ``start`` and
+        ``end`` dates of the query string by ``granularity``, day, week or
+        month.
+        """
         context = super().get_context_data(**kwargs)
-        validated_pdf: QuerySet[PdfDocumentValidator] = (
-            PdfDocumentValidator.objects.all()
-        )
-        context["pdf_docs_tested"] = validated_pdf.count()
-        context["verified_pdf"] = validated_pdf.filter(
-            all_signers_verified=True
-        ).count()
-        context["pdf_not_verified"] = validated_pdf.filter(
-            all_signers_verified=False
-        ).count()
-        context["users_count"] = CustomUser.objects.all().count()
-        context["signers_count"] = SignerUser.objects.all().count()
-        context["today_date"] = timezone.now().date()
-        signed_documents_data = []
-        days = []
-
-        for i in range(0, 5):
-            current_day = timezone.now() - timedelta(days=i)
-            start_of_day = current_day.replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            end_of_day = current_day.replace(
-                hour=23, minute=59, second=59, microsecond=999999
-            )
-            signed_documents_count = PdfDocumentValidator.objects.filter(
-                is_signed=True, created__range=(start_of_day, end_of_day)
-            ).count()
-            signed_documents_data.append(signed_documents_count)
-            days.append(str(current_day.date()))
-        context["signed_documents_labels"] = days
-        context["signed_documents_data"] = signed_documents_data
-
-        users_data = []
-        users_label = []
-        for i in range(0, 6):
-            current_day = timezone.now() - timedelta(days=i)
-            start_of_day = current_day.replace(
-                hour=0, minute=0, second=0, microsecond=0
+        context["today_date"] = timezone.localdate()
+        form = ReportRangeForm(self.request.GET or None)
+        context["form"] = form
+        context.update(
+            cached(
+                (REPORT_NAMESPACE,),
+                f"report:{context['today_date']}:{get_query_key(self.request.GET)}",
+                partial(self.get_report, form, context["today_date"]),
             )
-            end_of_day = current_day.replace(
-                hour=23, minute=59, second=59, microsecond=999999
-            )
-            users_joined_count = CustomUser.objects.filter(
-                is_active=True, date_joined__range=(start_of_day, end_of_day)
-            ).count()
-            users_data.append(users_joined_count)
-            users_label.append(str(current_day.date()))
-        context["signed_documents_labels"] = days
-        context["signed_documents_data"] = signed_documents_data
-        context["users_data"] = users_data
-        context["users_label"] = users_label
+        )
         return context
 
+    def get_report(self, form: ReportRangeForm, today) -> dict:
+        """Get the totals and the charts of the report."""
+        totals = DailyStatService.get_totals()
+        report = {
+            "pdf_docs_tested": totals["documents"],
+            "verified_pdf": totals["verified_documents"],
+            "pdf_not_verified": totals["documents"] - totals["verified_documents"],
+            "users_count": totals["users"],
+            "signers_count": totals["signers"],
+        }
+        if form.is_valid():
+            end = form.cleaned_data["end"]
+            granularity = form.cleaned_data["granularity"]
+            signed_documents_start = users_start = form.cleaned_data["start"]
+        else:
+            end = today
+            granularity = "day"
+            signed_documents_start = end - timedelta(
+                days=self.signed_documents_days - 1
+            )
+            users_start = end - timedelta(days=self.users_days - 1)
+        days = DailyStatService.get_days(min(signed_documents_start, users_start), end)
+        (
+            report["signed_documents_labels"],
+            report["signed_documents_data"],
+        ) = DailyStatService.get_series(
+            days, signed_documents_start, end, granularity, "signed_documents"
+        )
+        report["users_label"], report["users_data"] = DailyStatService.get_series(
+            days, users_start, end, granularity, "active_users"
+        )
+        report["granularity"] = granularity
+        return report
+
 
 @login_required
 def generate_pdf_report(request, *args, **kwargs):
@@ -152,3 +231,42 @@ def generate_pdf_report(request, *args, **kwargs):
     response = HttpResponse(pdf, content_type="application/pdf")
     response["Content-Disposition"] = 'attachment; filename="report.pdf"'
     return response
+
+
+class MetricsView(View):
+    """Metrics of all processes of the app in the Prometheus text format.
+
+    Readable by staff users and by scrapers sending ``METRICS_TOKEN`` as a
+    bearer token.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def get(self, request, *args, **kwargs):
+        """Render the metrics with the queue depth measured now."""
+        if not self.has_access(request):
+            return HttpResponseForbidden()
+        queue_depth = dict.fromkeys((ValidationJob.PENDING, ValidationJob.RUNNING), 0)
+        queue_depth.update(
+            ValidationJob.objects.filter(status__in=queue_depth)
+            .order_by()
+            .values_list("status")
+            .annotate(count=Count("id"))
+        )
+        gauges = {
+            "validation_jobs": (
+                "Queued validation jobs by status.",
+                {(("status", status),): count for status, count in queue_depth.items()},
+            )
+        }
+        return HttpResponse(metrics.render(gauges), content_type=self.content_type)
+
+    @staticmethod
+    def has_access(request) -> bool:
+        """Check the request is of a staff user or has the metrics token."""
+        if request.user.is_authenticated and request.user.is_staff:
+            return True
+        authorization = request.headers.get("Authorization", "")
+        return bool(settings.METRICS_TOKEN) and hmac.compare_digest(
+            authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+        )
@@ -15,3 +15,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "validator.settings")
 
 application = get_asgi_application()
+
+# imported after the application is set up, the apps need to be loaded
+from signature_validator.services.certificate_cache import (  # noqa: E402
+    warm_certificate_cache_on_start,
+)
+
+warm_certificate_cache_on_start()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.paginator import Page
+from django.db import transaction
+
+
+MISSING = object()
+
+
+def get_version_key(namespace: str) -> str:
+    """Get the cache key of the version of a namespace."""
+    return f"version:{namespace}"
+
+
+def get_versions(*namespaces) -> list:
+    """Get the current version of each namespace, in one cache lookup.
+
+    A version missing from the cache starts from the clock, so a version
+    evicted by the cache is never reused by entries still in it.
+    """
+    keys = [get_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = cache.get_or_set(key, time.time_ns())
+    return [versions[key] for key in keys]
+
+
+def bump_versions(namespaces):
+    """Move the namespaces to a new version, their entries are then stale."""
+    for key in map(get_version_key, namespaces):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # not in the cache, the next lookup starts a new version
+            pass
+
+
+def invalidate(*namespaces):
+    """Invalidate the entries of the namespaces.
+
+    The versions are bumped at once, for the rest of the transaction, and
+    again on commit, so an entry cached from the data before the commit is
+    not served after it.
+    """
+    bump_versions(namespaces)
+    transaction.on_commit(lambda: bump_versions(namespaces))
+
+
+def get_query_key(params) -> str:
+    """Get a short cache key of the parameters of a query string."""
+    query = urlencode(sorted(params.lists()), doseq=True)
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def cached(namespaces, key: str, compute, timeout=DEFAULT_TIMEOUT):
+    """Get the value of the key, computing and caching it on a miss.
+
+    The key is versioned by the namespaces, see ``invalidate()``.
+    """
+    versions = ".".join(map(str, get_versions(*namespaces)))
+    versioned_key = f"{key}:{versions}"
+    value = cache.get(versioned_key, MISSING)
+    if value is MISSING:
+        value = compute()
+        cache.set(versioned_key, value, timeout)
+    return value
+
+
+class CachedPageMixin:
+    """Cache the page of a ``ListView`` for its query string.
+
+    Only the objects of the page and the count are cached, the paginator
+    and page are built again from them. The entries are versioned by the
+    ``cache_namespaces`` of the view.
+    """
+
+    cache_namespaces = ()
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate the queryset, or get the page from the cache."""
+        count, number, object_list = cached(
+            self.cache_namespaces,
+            f"page:{self.request.path}:{get_query_key(self.request.GET)}",
+            lambda: self.get_page_data(queryset, page_size),
+        )
+        paginator = self.get_paginator(
+            [],
+            page_size,
+            orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty(),
+        )
+        paginator.count = count
+        page = Page(object_list, number, paginator)
+        return paginator, page, object_list, page.has_other_pages()
+
+    def get_page_data(self, queryset, page_size) -> tuple:
+        """Get the count, number and objects of the page to cache."""
+        paginator, page, object_list, _ = super().paginate_queryset(queryset, page_size)
+        return paginator.count, page.number, list(object_list)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import contextvars
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from validator.logger import module_logger
+
+
+logger = module_logger(__name__)
+
+# timings of the request being handled, see add_validation_time()
+request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """SQL, template and validation time spent by one request."""
+
+    def __init__(self):
+        """Initialize the timings before the request is handled."""
+        self.start = time.perf_counter()
+        self.queries = []
+        self.template_seconds = 0.0
+        self.validation_seconds = 0.0
+
+    @property
+    def sql_seconds(self) -> float:
+        """Get the time spent in all queries."""
+        return sum(seconds for _, seconds in self.queries)
+
+    def get_server_timing(self, total_seconds: float) -> str:
+        """Get the value of the ``Server-Timing`` header, durations are in ms."""
+        metrics = [
+            ("sql", self.sql_seconds, f"{len(self.queries)} queries"),
+            ("template", self.template_seconds, "Template render"),
+            ("validation", self.validation_seconds, "Signature validation"),
+            ("total", total_seconds, "Total"),
+        ]
+        return ", ".join(
+            f'{name};dur={seconds * 1000:.1f};desc="{description}"'
+            for name, seconds, description in metrics
+        )
+
+
+def add_validation_time(seconds: float):
+    """Add time spent by the validation engine to the current request."""
+    timings = request_timings.get()
+    if timings is not None:
+        timings.validation_seconds += seconds
+
+
+class ServerTimingMiddleware:
+    """Report the SQL, template and validation time of each request.
+
+    The time is added as a ``Server-Timing`` header, shown by the network
+    panel of the browser devtools, and requests slower than
+    ``SLOW_REQUEST_THRESHOLD`` seconds are logged with their slowest
+    queries. Template time is measured for ``TemplateResponse`` views and
+    includes the queries run while rendering. Streamed responses only
+    report the time until streaming starts.
+    """
+
+    def __init__(self, get_response):
+        """Initialize the middleware with the next handler."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Handle the request while recording its queries."""
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(self.get_query_recorder(timings))
+                    )
+                response = self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        total_seconds = time.perf_counter() - timings.start
+        response["Server-Timing"] = timings.get_server_timing(total_seconds)
+        if total_seconds >= settings.SLOW_REQUEST_THRESHOLD:
+            self.log_slow_request(request, timings, total_seconds)
+        return response
+
+    def process_template_response(self, request, response):
+        """Time the rendering of the template response, done after this hook."""
+        timings = request_timings.get()
+        if timings is not None:
+            start = time.perf_counter()
+
+            def add_template_time(rendered_response):
+                timings.template_seconds += time.perf_counter() - start
+
+            response.add_post_render_callback(add_template_time)
+        return response
+
+    @staticmethod
+    def get_query_recorder(timings: RequestTimings):
+        """Get an ``execute_wrapper`` recording the time of each query."""
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                timings.queries.append((sql, time.perf_counter() - start))
+
+        return record_query
+
+    @staticmethod
+    def log_slow_request(request, timings: RequestTimings, total_seconds: float):
+        """Log the slow request with its slowest queries.
+
+        Identical queries are grouped, so an N+1 shows as one query run many
+        times.
+        """
+        grouped = {}
+        for sql, seconds in timings.queries:
+            count, total = grouped.get(sql, (0, 0.0))
+            grouped[sql] = (count + 1, total + seconds)
+        slowest = sorted(grouped.items(), key=lambda item: item[1][1], reverse=True)
+        top_queries = "".join(
+            f"\n  {total * 1000:.1f} ms x{count} {sql}"
+            for sql, (count, total) in slowest[: settings.SLOW_REQUEST_TOP_QUERIES]
+        )
+        logger.warning(
+            f"Slow request {request.method} {request.path} took "
+            f"{total_seconds * 1000:.1f} ms, {len(timings.queries)} queries in "
+            f"{timings.sql_seconds * 1000:.1f} ms, template "
+            f"{timings.template_seconds * 1000:.1f} ms, validation "
+            f"{timings.validation_seconds * 1000:.1f} ms{top_queries}"
+        )
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 
@@ -49,11 +50,13 @@ INSTALLED_APPS = [
     "rest_framework_simplejwt",
     "crispy_forms",
     "crispy_bootstrap4",
+    "django_filters",
     "accounts",
     "signature_validator",
 ]
 AUTH_USER_MODEL = "accounts.CustomUser"
 MIDDLEWARE = [
+    "validator.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -169,7 +172,11 @@ LOGIN_URL = "/accounts/login/"
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/accounts/login/"
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# use django.core.mail.backends.locmem.EmailBackend to keep mail off the network,
+# e.g. for load tests
+EMAIL_BACKEND = os.environ.get(
+    "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER")
@@ -178,3 +185,84 @@ EMAIL_USE_TLS = True
 EMAIL_USE_SSL = False
 ADMINS = [("Chanuka", EMAIL_HOST_USER)]
 MANAGERS = ADMINS
+
+# options passed to PdfSignatureValidator for the uploaded documents
+PDF_VALIDATOR_OPTIONS = {
+    "use_mmap": bool(int(os.environ.get("PDF_VALIDATOR_USE_MMAP", 0))),
+    "fast_scan": bool(int(os.environ.get("PDF_VALIDATOR_FAST_SCAN", 0))),
+    # threads verifying the signatures of one document
+    "max_workers": int(os.environ.get("PDF_VALIDATOR_MAX_WORKERS", 1)),
+}
+
+# bump when the trust policy changes, cached validation results are then stale
+VALIDATION_POLICY_VERSION = os.environ.get("VALIDATION_POLICY_VERSION", "1")
+# validation results of recently uploaded documents kept in memory by each worker
+VALIDATION_RESULT_CACHE_SIZE = int(os.environ.get("VALIDATION_RESULT_CACHE_SIZE", 256))
+# results of single signatures kept in memory by each worker, they are shared
+# by the revisions of a countersigned document
+SIGNATURE_RESULT_CACHE_SIZE = int(os.environ.get("SIGNATURE_RESULT_CACHE_SIZE", 4096))
+
+# last bytes of an upload kept while it is received, they hold the trailer
+UPLOAD_TAIL_WINDOW_SIZE = int(os.environ.get("UPLOAD_TAIL_WINDOW_SIZE", 64 * 1024))
+
+# queue uploads as validation jobs run by the run_validation_worker command
+VALIDATION_JOBS_ASYNC = bool(int(os.environ.get("VALIDATION_JOBS_ASYNC", 0)))
+# seconds without a heartbeat after which the job of a dead worker is queued again
+VALIDATION_JOB_TIMEOUT = int(os.environ.get("VALIDATION_JOB_TIMEOUT", 300))
+VALIDATION_JOB_MAX_ATTEMPTS = int(os.environ.get("VALIDATION_JOB_MAX_ATTEMPTS", 3))
+
+# largest PDF and number of files accepted by the bulk upload API
+BULK_UPLOAD_MAX_FILE_SIZE = int(
+    os.environ.get("BULK_UPLOAD_MAX_FILE_SIZE", 50 * 1024 * 1024)
+)
+DATA_UPLOAD_MAX_NUMBER_FILES = int(os.environ.get("DATA_UPLOAD_MAX_NUMBER_FILES", 1000))
+
+# worker processes of the batch validation pool, see validate_many()
+BATCH_VALIDATION_PROCESSES = int(
+    os.environ.get("BATCH_VALIDATION_PROCESSES", os.cpu_count() or 1)
+)
+
+# directory shared by all processes of the app, each writes its metrics there
+METRICS_DIR = os.environ.get(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), "signature-validator-metrics")
+)
+# seconds between the background writes of the metrics of a process
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 1))
+# bearer token of the scraper, staff users can read the metrics without it
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# requests slower than this many seconds are logged with their slowest queries
+SLOW_REQUEST_THRESHOLD = float(os.environ.get("SLOW_REQUEST_THRESHOLD", 1))
+SLOW_REQUEST_TOP_QUERIES = int(os.environ.get("SLOW_REQUEST_TOP_QUERIES", 5))
+
+# parsed signer certificates and public keys kept in memory by each worker
+CERTIFICATE_CACHE_SIZE = int(os.environ.get("CERTIFICATE_CACHE_SIZE", 1024))
+# load the certificates of the active signers when the worker starts
+CERTIFICATE_CACHE_WARM_ON_START = bool(
+    int(os.environ.get("CERTIFICATE_CACHE_WARM_ON_START", 0))
+)
+
+# cache of the pages built from the database, e.g. the report and the results,
+# see validator.cache. "file" is shared by the processes of one host, "redis"
+# by all hosts and needs the redis package, "locmem" is per process
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_LOCATIONS = {
+    "locmem": "signature-validator",
+    "file": os.path.join(tempfile.gettempdir(), "signature-validator-cache"),
+    "redis": "redis://127.0.0.1:6379/1",
+}
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "file")
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        "LOCATION": os.environ.get(
+            "CACHE_LOCATION", CACHE_LOCATIONS.get(CACHE_BACKEND, "")
+        ),
+        "TIMEOUT": int(os.environ.get("CACHE_TIMEOUT", 300)),
+        "KEY_PREFIX": "signature-validator",
+    }
+}
@@ -29,6 +29,7 @@ from rest_framework_simplejwt.views import (
 from rest_framework.routers import DefaultRouter
 import accounts.api.urls
 import signature_validator.api.urls
+from signature_validator.views import MetricsView
 from django.conf.urls.static import static
 
 
@@ -39,6 +40,7 @@ router.registry.extend(signature_validator.api.urls.router.registry)
 
 
 urlpatterns = [
+    path("admin/metrics/", MetricsView.as_view(), name="metrics"),
     path("admin/", admin.site.urls),
     path("api/", include(router.urls)),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),